@@ -100,6 +100,7 @@ module "pipeline_runner" {
   evidence_bucket_name         = module.storage.bucket_evidence
   pubsub_push_invoker_sa_email = module.fetcher_pubsub.pubsub_push_invoker_service_account_email
   pipeline_runner_sa_email     = module.service_accounts.pipeline_runner_sa_email
+  fetcher_sa_email             = module.service_accounts.fetcher_sa_email
     # >>> REQUIRED FOR PHASE VI <<<
   perplexity_synth_requests_topic = module.perplexity_synth_worker.topic
 
@@ -7,3 +7,47 @@ resource "google_firestore_database" "default" {
   location_id = var.firestore_location_id
   type        = "FIRESTORE_NATIVE"
 }
+
+# pipeline-runner sweeper (app/routes/sweep.py), collection-group query:
+#   jobs where status == WAITING_EVIDENCE and evidence.due_at <= now order by evidence.due_at
+resource "google_firestore_index" "jobs_sweep" {
+  project     = var.project_id
+  database    = google_firestore_database.default.name
+  collection  = "jobs"
+  query_scope = "COLLECTION_GROUP"
+
+  fields {
+    field_path = "status"
+    order      = "ASCENDING"
+  }
+
+  fields {
+    field_path = "evidence.due_at"
+    order      = "ASCENDING"
+  }
+}
+
+# TTL policies: documents are deleted some time after their expires_at passes.
+# index_config {} drops the single-field indexes nothing queries.
+
+# Pub/Sub dedupe markers (pipeline-runner app/state/dedupe.py)
+resource "google_firestore_field" "dedupe_expires_at" {
+  project    = var.project_id
+  database   = google_firestore_database.default.name
+  collection = "dedupe"
+  field      = "expires_at"
+
+  ttl_config {}
+  index_config {}
+}
+
+# shared SERP result cache (pipeline-runner app/external/serp_cache.py)
+resource "google_firestore_field" "serp_cache_expires_at" {
+  project    = var.project_id
+  database   = google_firestore_database.default.name
+  collection = "serp_cache"
+  field      = "expires_at"
+
+  ttl_config {}
+  index_config {}
+}
@@ -47,6 +47,13 @@ resource "google_cloud_run_v2_service" "pipeline_runner" {
         value = var.evidence_bucket_name
       }
 
+      # Overdue WAITING_EVIDENCE jobs are swept by Cloud Scheduler (below),
+      # not by a loop inside each instance
+      env {
+        name  = "EVIDENCE_SWEEP_INTERVAL_S"
+        value = "0"
+      }
+
       # SerpAPI key comes from Secret Manager
       env {
         name = "SERPAPI_API_KEY"
@@ -91,6 +98,29 @@ resource "google_pubsub_subscription" "jobs_push_to_pipeline_runner" {
   }
 }
 
+# Evidence sweep: re-evaluate WAITING_EVIDENCE jobs whose evidence.due_at
+# has passed (deadline / quorum grace). Runs even when no instance is up.
+resource "google_cloud_scheduler_job" "evidence_sweep" {
+  name             = "ars-evidence-sweep-${var.env}"
+  region           = var.region
+  schedule         = var.evidence_sweep_schedule
+  attempt_deadline = "120s"
+
+  http_target {
+    http_method = "POST"
+    uri         = "${google_cloud_run_v2_service.pipeline_runner.uri}/tasks/sweep/evidence"
+    oidc_token {
+      service_account_email = var.pubsub_push_invoker_sa_email
+      audience              = google_cloud_run_v2_service.pipeline_runner.uri
+    }
+  }
+
+  # the next tick is the retry
+  retry_config {
+    retry_count = 0
+  }
+}
+
 # 3) Evidence-written eventing: GCS finalize -> Pub/Sub topic -> push to pipeline runner
 
 resource "google_pubsub_topic" "evidence_written" {
@@ -164,6 +194,13 @@ resource "google_secret_manager_secret_iam_member" "serpapi_accessor" {
   member    = "serviceAccount:${var.pipeline_runner_sa_email}"
 }
 
+# Fetcher worker → report URLs that will never produce evidence
+resource "google_pubsub_topic_iam_member" "fetcher_failure_publisher" {
+  topic  = google_pubsub_topic.evidence_written.name
+  role   = "roles/pubsub.publisher"
+  member = "serviceAccount:${var.fetcher_sa_email}"
+}
+
 resource "google_pubsub_topic_iam_member" "gcs_service_agent_publisher" {
   topic  = google_pubsub_topic.evidence_written.name
   role   = "roles/pubsub.publisher"
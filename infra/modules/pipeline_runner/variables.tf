@@ -44,6 +44,11 @@ variable "pipeline_runner_sa_email" {
   type = string
 }
 
+variable "fetcher_sa_email" {
+  description = "Fetcher worker SA; publishes EVIDENCE_FETCH_FAILED to the evidence topic"
+  type        = string
+}
+
 variable "project_number" {
   type = string
 }
@@ -53,3 +58,8 @@ variable "perplexity_synth_requests_topic" {
   type        = string
 }
 
+variable "evidence_sweep_schedule" {
+  description = "Cloud Scheduler cron for POST /tasks/sweep/evidence"
+  type        = string
+  default     = "* * * * *"
+}
@@ -0,0 +1,53 @@
+import hashlib
+import json
+import struct
+import zlib
+from typing import Any, Dict, Tuple
+
+# Evidence bundle v1: one object per fetched URL instead of
+# raw.html + clean.txt + meta.json + done.json.
+#
+#   MAGIC (8 bytes) | header_len (u32 big-endian) | header JSON | sections...
+#
+#   header = {"v": 1, "meta": {...}, "sections": {name: {offset, length,
+#             size, codec, sha256}}}
+#
+# Section offsets are relative to the first byte after the header, and each
+# section is compressed on its own, so a reader can fetch the header with one
+# small ranged read and then any single section with another. The bundle is
+# uploaded create-only in one request: its existence is the completion marker.
+
+MAGIC = b"ARSEVB1\n"
+BUNDLE_NAME = "evidence.bundle"
+CONTENT_TYPE = "application/x-ars-evidence-bundle"
+
+
+def build_bundle(meta: Dict[str, Any], sections: Dict[str, bytes], level: int = 6) -> bytes:
+    index: Dict[str, Dict[str, Any]] = {}
+    parts = []
+    offset = 0
+    for name, data in sections.items():
+        z = zlib.compress(data, level)
+        index[name] = {
+            "offset": offset,
+            "length": len(z),
+            "size": len(data),
+            "codec": "zlib",
+            "sha256": hashlib.sha256(data).hexdigest(),
+        }
+        parts.append(z)
+        offset += len(z)
+
+    header = json.dumps({"v": 1, "meta": meta, "sections": index}, separators=(",", ":")).encode("utf-8")
+    return b"".join([MAGIC, struct.pack(">I", len(header)), header, *parts])
+
+
+def parse_header(prefix: bytes) -> Tuple[Dict[str, Any], int]:
+    """(header, data_start) from the first bytes of a bundle; needs the whole header."""
+    if prefix[: len(MAGIC)] != MAGIC:
+        raise ValueError("not an evidence bundle")
+    (n,) = struct.unpack(">I", prefix[len(MAGIC): len(MAGIC) + 4])
+    start = len(MAGIC) + 4
+    if len(prefix) < start + n:
+        raise ValueError("truncated bundle header")
+    return json.loads(prefix[start: start + n]), start + n
@@ -1,14 +1,30 @@
+import codecs
+import multiprocessing
+import os
+import re
+import threading
+from typing import Optional, Union
+
 from bs4 import BeautifulSoup
+from lxml import etree
+
+
+# tags whose subtrees clean_html_to_text removes before taking the text
+REFERENCE_SKIP_TAGS = ("script", "style", "noscript", "header", "footer", "nav", "aside")
 
 
 def clean_html_to_text(html: str) -> str:
     soup = BeautifulSoup(html, "lxml")
 
-    for tag in soup(["script", "style", "noscript", "header", "footer", "nav", "aside"]):
+    for tag in soup(list(REFERENCE_SKIP_TAGS)):
         tag.decompose()
 
     text = soup.get_text(separator="\n", strip=True)
 
+    return _collapse_lines(text)
+
+
+def _collapse_lines(text: str) -> str:
     lines = [ln.strip() for ln in text.splitlines()]
     out = []
     prev_blank = False
@@ -23,3 +39,248 @@ def clean_html_to_text(html: str) -> str:
             prev_blank = False
 
     return "\n".join(out).strip() + "\n"
+
+
+# ---------------------------------------------------------------------------
+# Fast path: lxml directly, no BeautifulSoup tree
+#
+# Same text as clean_html_to_text (kept as the reference, and still the
+# default extractor: CLEAN_EXTRACTOR=lxml opts in). bs4's lxml builder is an
+# lxml parser target fed the whole decoded page in one call; _TextTarget
+# listens to that same event stream, so it sees exactly the strings bs4
+# does, including libxml2's recovery quirks (text before the first tag,
+# content after </html>). tests/test_clean_parity.py holds the two to equal
+# output over tests/fixtures/pages.
+# ---------------------------------------------------------------------------
+
+# Not extra filtering: bs4's get_text() already leaves out strings inside
+# these (TemplateString / RubyTextString / RubyParenthesisString), as it
+# does comments. The target sees raw parser events, so it must skip them
+# itself to produce the reference text.
+_BS4_UNRENDERED_TAGS = ("template", "rt", "rp")
+
+_SKIP_TAGS = frozenset(REFERENCE_SKIP_TAGS + _BS4_UNRENDERED_TAGS)
+
+
+class _TextTarget:
+    """
+    Parser target collecting the stripped, non-empty strings outside the
+    skipped subtrees. As in bs4, consecutive data events form one string
+    and any tag, comment, PI or doctype ends it.
+    """
+
+    def __init__(self):
+        self.parts = []
+        self._data = []
+        self._skip = 0  # depth inside a skipped subtree
+
+    def _end_string(self):
+        if self._data:
+            text = "".join(self._data).strip()
+            if text:
+                self.parts.append(text)
+            self._data = []
+
+    def start(self, tag, attrib):
+        self._end_string()
+        if self._skip or tag in _SKIP_TAGS:
+            self._skip += 1
+
+    def end(self, tag):
+        self._end_string()
+        if self._skip:
+            self._skip -= 1
+
+    def data(self, data):
+        if not self._skip:
+            self._data.append(data)
+
+    def comment(self, text):
+        self._end_string()
+
+    def pi(self, target, data=None):
+        self._end_string()
+
+    def doctype(self, *args):
+        self._end_string()
+
+    def close(self):
+        self._end_string()
+        return self.parts
+
+
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([A-Za-z0-9_.:-]+)""", re.IGNORECASE)
+
+# WHATWG label handling for the declarations that matter in practice
+_CHARSET_ALIASES = {
+    "iso-8859-1": "cp1252",
+    "latin1": "cp1252",
+    "latin-1": "cp1252",
+    "us-ascii": "cp1252",
+    "ascii": "cp1252",
+    "utf-16": "utf-8",      # a meta tag can't honestly declare UTF-16
+    "utf-16le": "utf-8",
+    "utf-16be": "utf-8",
+}
+
+
+def sniff_encoding(raw: Union[bytes, bytearray]) -> str:
+    """BOM, then <meta charset> in the first 1 KiB, else UTF-8."""
+    if raw.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if raw.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    m = _META_CHARSET.search(bytes(raw[:1024]))
+    if m:
+        label = m.group(1).decode("ascii").lower()
+        label = _CHARSET_ALIASES.get(label, label)
+        try:
+            return codecs.lookup(label).name
+        except LookupError:
+            pass
+    return "utf-8"
+
+
+def decode_page(raw: Union[bytes, bytearray]) -> str:
+    """
+    UTF-8 with replacement, as pages have always been decoded. With
+    CLEAN_SNIFF_CHARSET=1, the declared charset (sniff_encoding) instead:
+    fixes non-UTF-8 pages, but changes their stored text, so it is opt-in.
+    """
+    sniff = os.environ.get("CLEAN_SNIFF_CHARSET", "0").lower() in ("1", "true", "yes")
+    return bytes(raw).decode(sniff_encoding(raw) if sniff else "utf-8", errors="replace")
+
+
+def extract_text(raw: Union[bytes, bytearray]) -> str:
+    """Page bytes -> clean text, equal to clean_html_to_text(decode_page(raw))."""
+    html = decode_page(raw)
+    if html.startswith("\ufeff"):  # bs4 drops a leading BOM before parsing
+        html = html[1:]
+    # one parser per call: lxml parsers must not be shared across threads
+    parser = etree.HTMLParser(target=_TextTarget())
+    parser.feed(html)
+    return _collapse_lines("\n".join(parser.close()))
+
+
+def clean_page(raw: Union[bytes, bytearray]) -> str:
+    """Page bytes -> clean text with the configured extractor (CLEAN_EXTRACTOR: bs4 | lxml)."""
+    if os.environ.get("CLEAN_EXTRACTOR", "bs4") == "lxml":
+        return extract_text(raw)
+    return clean_html_to_text(decode_page(raw))
+
+
+# ---------------------------------------------------------------------------
+# Process-pool cleaning
+#
+# Parsing holds the GIL for tens to hundreds of ms on multi-MB pages, stalling
+# every other fetch on the instance. Large pages are cleaned in a bounded
+# pool of worker processes instead.
+# ---------------------------------------------------------------------------
+
+
+class CleanError(Exception):
+    """Input over CLEAN_MAX_INPUT_BYTES, cleaning failed or exceeded CLEAN_TIMEOUT_S, or its worker died."""
+
+
+def _worker_main(conn) -> None:
+    # one page at a time: raw bytes in, (ok, text or error) out
+    while True:
+        try:
+            raw = conn.recv_bytes()
+        except EOFError:  # parent closed the pipe
+            return
+        try:
+            conn.send((True, clean_page(raw)))
+        except Exception as e:
+            conn.send((False, f"{type(e).__name__}: {e}"))
+
+
+class _Worker:
+    def __init__(self, ctx):
+        self.conn, child = ctx.Pipe()
+        self.proc = ctx.Process(target=_worker_main, args=(child,), daemon=True, name="clean-worker")
+        self.proc.start()
+        child.close()
+
+    def run(self, raw: Union[bytes, bytearray], timeout_s: float) -> tuple:
+        """(ok, text or error); CleanError if the page timed out or the worker died."""
+        try:
+            self.conn.send_bytes(raw)
+            if not self.conn.poll(timeout_s):
+                raise CleanError(f"cleaning exceeded {timeout_s}s")
+            return self.conn.recv()  # EOFError if the worker died mid-page
+        except (EOFError, OSError) as e:
+            raise CleanError(f"clean worker exited ({type(e).__name__}, exitcode {self.proc.exitcode})")
+
+    def kill(self) -> None:
+        self.proc.kill()
+        self.proc.join()
+        self.conn.close()
+
+
+class _CleanPool:
+    """
+    Up to `size` worker processes, started on demand and reused. A worker
+    that times out or dies is killed on its own and a fresh one takes its
+    slot; the other workers and their pages are untouched
+    (ProcessPoolExecutor can only stop a stuck task by breaking the pool).
+    """
+
+    def __init__(self, size: int):
+        # spawn: forking a process that runs gRPC/HTTP threads is unsafe
+        self._ctx = multiprocessing.get_context("spawn")
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle: list = []
+        self._lock = threading.Lock()
+
+    def clean(self, raw: Union[bytes, bytearray], timeout_s: float) -> str:
+        with self._slots:
+            with self._lock:
+                worker = self._idle.pop() if self._idle else None
+            if worker is None or not worker.proc.is_alive():
+                worker = _Worker(self._ctx)
+            try:
+                ok, value = worker.run(raw, timeout_s)
+            except BaseException:
+                # stuck, dead or interrupted mid-page: only this worker goes
+                worker.kill()
+                raise
+            self._release(worker)
+        if not ok:
+            raise CleanError(value)
+        return value
+
+    def _release(self, worker: _Worker) -> None:
+        with self._lock:
+            self._idle.append(worker)
+
+
+_pool: Optional[_CleanPool] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> _CleanPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = _CleanPool(int(os.environ.get("CLEAN_PROCESSES", str(os.cpu_count() or 1))))
+    return _pool
+
+
+def clean_html_bytes(raw: Union[bytes, bytearray], timeout_s: Optional[float] = None) -> str:
+    """
+    clean_page(raw), with limits.
+    Pages below CLEAN_INLINE_BELOW_BYTES are cleaned in-thread (process
+    hand-off would cost more than it saves); larger ones go to the pool.
+    """
+    max_bytes = int(os.environ.get("CLEAN_MAX_INPUT_BYTES", str(16 * 1024 * 1024)))
+    if len(raw) > max_bytes:
+        raise CleanError(f"input {len(raw)} bytes exceeds {max_bytes}")
+
+    if len(raw) < int(os.environ.get("CLEAN_INLINE_BELOW_BYTES", str(128 * 1024))):
+        return clean_page(raw)
+
+    if timeout_s is None:
+        timeout_s = float(os.environ.get("CLEAN_TIMEOUT_S", "20"))
+    return _get_pool().clean(raw, timeout_s)
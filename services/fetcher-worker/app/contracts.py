@@ -20,10 +20,14 @@ class FetchRequest:
     tenant_id: str
     trace: Dict[str, Any]
     options: FetchOptions
+    # set by the pipeline runner (top level or in trace); needed to report a failed fetch
+    job_id: str = ""
+    url_id: str = ""
 
     @staticmethod
     def from_dict(d: Dict[str, Any]) -> "FetchRequest":
         opts = d.get("options", {})
+        trace = d.get("trace", {})
         return FetchRequest(
             v=int(d["v"]),
             request_id=d["request_id"],
@@ -32,10 +36,12 @@ class FetchRequest:
             url=d["url"],
             fetch_timestamp=d["fetch_timestamp"],
             tenant_id=d.get("tenant_id", "T-UNSET"),
-            trace=d.get("trace", {}),
+            trace=trace,
             options=FetchOptions(
                 force_refetch=bool(opts.get("force_refetch", False)),
                 max_bytes=int(opts.get("max_bytes", 5_242_880)),
                 timeout_ms=int(opts.get("timeout_ms", 20_000)),
             ),
+            job_id=str(d.get("job_id") or trace.get("job_id") or ""),
+            url_id=str(d.get("url_id") or trace.get("url_id") or ""),
         )
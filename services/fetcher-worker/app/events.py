@@ -0,0 +1,53 @@
+# services/fetcher-worker/app/events.py
+import json
+import os
+import threading
+from typing import Optional
+
+from google.cloud import pubsub_v1
+
+from .contracts import FetchRequest
+
+_publisher: Optional[pubsub_v1.PublisherClient] = None
+_publisher_lock = threading.Lock()
+
+
+def get_publisher_client() -> pubsub_v1.PublisherClient:
+    """One PublisherClient per process, shared by all fetch threads."""
+    global _publisher
+    if _publisher is None:
+        with _publisher_lock:
+            if _publisher is None:
+                _publisher = pubsub_v1.PublisherClient()
+    return _publisher
+
+
+def publish_fetch_failed(fr: FetchRequest, error: str) -> Optional[str]:
+    """
+    Report a URL that will never produce evidence as EVIDENCE_FETCH_FAILED,
+    so the pipeline runner settles it instead of waiting for its object.
+
+    Returns the message id, or None when there is nobody to tell:
+    EVIDENCE_EVENTS_TOPIC is unset, or the request has no job_id/url_id
+    (it was not sent by the pipeline runner).
+    """
+    topic = os.environ.get("EVIDENCE_EVENTS_TOPIC")
+    if not topic or not fr.job_id or not fr.url_id:
+        return None
+    if not topic.startswith("projects/"):
+        topic = f"projects/{os.environ['GCP_PROJECT']}/topics/{topic}"
+
+    event = {
+        "event_type": "EVIDENCE_FETCH_FAILED",
+        "payload": {
+            "tenant_id": fr.tenant_id,
+            "job_id": fr.job_id,
+            "url_id": fr.url_id,
+            "request_id": fr.request_id,
+            "url": fr.url,
+            "error": error,
+        },
+    }
+    future = get_publisher_client().publish(topic, json.dumps(event).encode("utf-8"))
+    # block until accepted: an unpublished failure must fail the push so it is redelivered
+    return future.result(timeout=10)
@@ -1,8 +1,12 @@
+import http.cookiejar
+import os
+import threading
 import requests
 import time
 import hashlib
+from requests.adapters import HTTPAdapter
 from dataclasses import dataclass
-from typing import Dict
+from typing import Dict, Optional
 
 
 @dataclass
@@ -10,44 +14,98 @@ class FetchResult:
     status: int
     final_url: str
     headers: Dict[str, str]
-    raw_bytes: bytes
+    raw_bytes: bytearray
     truncated: bool
     elapsed_ms: int
     content_type: str
+    sha256: str = ""
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    One pooled Session per process: keep-alive connections are reused across
+    fetches, at most FETCH_POOL_PER_HOST open per host (callers block for a
+    free connection instead of opening more).
+
+    The session's cookie jar accepts nothing: fetches for different tenants
+    share the session, so no cookie may carry over between them. Cookies set
+    during one fetch's redirect chain still apply within that chain.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                per_host = int(os.environ.get("FETCH_POOL_PER_HOST", "8"))
+                adapter = HTTPAdapter(
+                    pool_connections=int(os.environ.get("FETCH_POOL_HOSTS", "256")),
+                    pool_maxsize=per_host,
+                    pool_block=True,
+                    max_retries=0,
+                )
+                s = requests.Session()
+                s.headers["User-Agent"] = "ai-research-studio-fetcher/1.0"
+                s.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+                s.mount("http://", adapter)
+                s.mount("https://", adapter)
+                _session = s
+    return _session
+
+
+# initial buffer when the server sends no (usable) Content-Length
+DEFAULT_PREALLOC = 256 * 1024
+
+
+def _prealloc_size(content_length: Optional[str], max_bytes: int) -> int:
+    if content_length and content_length.isdigit():
+        # compressed responses can decode larger; the buffer still grows up to max_bytes
+        return min(int(content_length), max_bytes)
+    return min(DEFAULT_PREALLOC, max_bytes)
 
 
 def fetch_url_streaming(url: str, *, max_bytes: int, timeout_ms: int) -> FetchResult:
+    """
+    Single pass over the body: chunks are copied once into a buffer sized
+    from Content-Length (capped at max_bytes) and hashed as they arrive, so
+    there is no chunk list, no join and no second hashing pass.
+    """
     start = time.time()
-    headers = {"User-Agent": "ai-research-studio-fetcher/1.0"}
     timeout = timeout_ms / 1000.0
 
-    with requests.get(url, headers=headers, stream=True, timeout=(timeout, timeout)) as r:
-        chunks = []
+    with get_session().get(url, stream=True, timeout=(timeout, timeout)) as r:
+        buf = bytearray(_prealloc_size(r.headers.get("Content-Length"), max_bytes))
+        h = hashlib.sha256()
         total = 0
         truncated = False
 
         for chunk in r.iter_content(chunk_size=64 * 1024):
             if not chunk:
                 continue
-            if total + len(chunk) > max_bytes:
-                remain = max_bytes - total
-                if remain > 0:
-                    chunks.append(chunk[:remain])
+            take = min(len(chunk), max_bytes - total)
+            view = memoryview(chunk)[:take]
+            # slice assignment past the end grows the buffer in place
+            buf[total:total + take] = view
+            h.update(view)
+            total += take
+            if take < len(chunk):
                 truncated = True
                 break
-            chunks.append(chunk)
-            total += len(chunk)
 
-        raw = b"".join(chunks)
+        # drop unused preallocation (in place, no copy)
+        del buf[total:]
 
     return FetchResult(
         status=r.status_code,
         final_url=r.url,
         headers={k: v for k, v in r.headers.items()},
-        raw_bytes=raw,
+        raw_bytes=buf,
         truncated=truncated,
         elapsed_ms=int((time.time() - start) * 1000),
         content_type=r.headers.get("Content-Type", ""),
+        sha256=h.hexdigest(),
     )
 
 
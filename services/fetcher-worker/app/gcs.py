@@ -1,5 +1,6 @@
 import json
-from typing import Dict, Any
+from typing import Dict, Any, Union
+from google.api_core.exceptions import PreconditionFailed
 from google.cloud import storage
 
 
@@ -16,11 +17,20 @@ class GcsEvidenceWriter:
     def exists(self, obj: str) -> bool:
         return self.bucket.blob(obj).exists()
 
-    def write_bytes(self, name: str, data: bytes, content_type: str):
-        self.bucket.blob(name).upload_from_string(data, content_type=content_type)
+    def write_bytes(self, name: str, data: Union[bytes, bytearray], content_type: str):
+        # upload_from_string rejects bytearray (FetchResult.raw_bytes)
+        self.bucket.blob(name).upload_from_string(bytes(data), content_type=content_type)
 
     def write_text(self, name: str, text: str):
         self.write_bytes(name, text.encode("utf-8"), "text/plain; charset=utf-8")
 
     def write_json(self, name: str, obj: Dict[str, Any]):
         self.write_bytes(name, json.dumps(obj, indent=2).encode("utf-8"), "application/json")
+
+    def create_once(self, name: str, data: Union[bytes, bytearray], content_type: str) -> bool:
+        """Create-only upload; False if the object already exists (redelivery)."""
+        try:
+            self.bucket.blob(name).upload_from_string(bytes(data), content_type=content_type, if_generation_match=0)
+            return True
+        except PreconditionFailed:
+            return False
@@ -1,13 +1,20 @@
 # services/fetcher-worker/app/server.py
+import asyncio
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 
 from .contracts import FetchRequest
 from .util import decode_pubsub_data, utc_now_iso_z
-from .fetch import fetch_url_streaming, sha256_bytes
-from .clean import clean_html_to_text
+from .fetch import fetch_url_streaming
+from .clean import CleanError, clean_html_bytes
+from .events import publish_fetch_failed
 from .gcs import GcsEvidenceWriter
+from .bundle import BUNDLE_NAME, CONTENT_TYPE, build_bundle
 
     
 def create_app() -> FastAPI:
@@ -29,43 +36,110 @@ def create_app() -> FastAPI:
         if not bucket_name:
             raise RuntimeError("EVIDENCE_BUCKET env var is required")
 
-
-        writer = GcsEvidenceWriter(bucket_name)
-
         body = await req.json()
         msg = body.get("message", {})
         payload = decode_pubsub_data(msg["data"])
         fr = FetchRequest.from_dict(payload)
 
-        prefix = writer.build_prefix(fr.fetch_timestamp, fr.request_id)
+        # Bounded backlog: past it, refuse the push; Pub/Sub redelivers with
+        # backoff (possibly to another instance) instead of queueing here.
+        gate = _admission()
+        if gate.locked():
+            return JSONResponse({"ok": False, "error": "fetcher saturated"}, status_code=429)
 
-        fetch = fetch_url_streaming(
-            fr.url,
-            max_bytes=fr.options.max_bytes,
-            timeout_ms=fr.options.timeout_ms,
-        )
+        # fetch + clean + upload are blocking; run them on the bounded pool so
+        # the loop keeps accepting pushes and throughput follows concurrency
+        async with gate:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(_fetch_executor(), _process_fetch, fr, bucket_name)
 
-        html = fetch.raw_bytes.decode("utf-8", errors="replace")
-        clean = clean_html_to_text(html)
+    return app
 
-        writer.write_bytes(prefix + "raw.html", fetch.raw_bytes, "text/html")
-        writer.write_text(prefix + "clean.txt", clean)
-
-        meta = {
-            "request_id": fr.request_id,
-            "url": fr.url,
-            "final_url": fetch.final_url,
-            "fetched_at": utc_now_iso_z(),
-            "http_status": fetch.status,
-            "truncated": fetch.truncated,
-            "hash_raw": sha256_bytes(fetch.raw_bytes),
-            "clean_chars": len(clean),
-        }
 
+_executor: Optional[ThreadPoolExecutor] = None
+_gate: Optional[asyncio.Semaphore] = None
+_writers: Dict[str, GcsEvidenceWriter] = {}
+_lock = threading.Lock()
+
+
+def _fetch_executor() -> ThreadPoolExecutor:
+    """At most FETCH_MAX_INFLIGHT fetches per instance; admitted pushes beyond that wait their turn."""
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=int(os.environ.get("FETCH_MAX_INFLIGHT", "16")),
+                    thread_name_prefix="fetch",
+                )
+    return _executor
+
+
+def _admission() -> asyncio.Semaphore:
+    """
+    FETCH_MAX_INFLIGHT running plus FETCH_MAX_QUEUED waiting for a thread;
+    only touched from the event loop.
+    """
+    global _gate
+    if _gate is None:
+        inflight = int(os.environ.get("FETCH_MAX_INFLIGHT", "16"))
+        _gate = asyncio.Semaphore(inflight + int(os.environ.get("FETCH_MAX_QUEUED", str(inflight))))
+    return _gate
+
+
+def _writer(bucket_name: str) -> GcsEvidenceWriter:
+    # one storage client per bucket, shared by all fetches
+    with _lock:
+        w = _writers.get(bucket_name)
+        if w is None:
+            w = _writers[bucket_name] = GcsEvidenceWriter(bucket_name)
+        return w
+
+
+def _process_fetch(fr: FetchRequest, bucket_name: str) -> Dict[str, object]:
+    writer = _writer(bucket_name)
+    prefix = writer.build_prefix(fr.fetch_timestamp, fr.request_id)
+
+    fetch = fetch_url_streaming(
+        fr.url,
+        max_bytes=fr.options.max_bytes,
+        timeout_ms=fr.options.timeout_ms,
+    )
+
+    # decoded + cleaned from raw bytes (in a worker process for large pages)
+    try:
+        clean = clean_html_bytes(fetch.raw_bytes)
+    except CleanError as e:
+        # the same bytes fail the same way on every redelivery: settle the URL
+        # as failed and ack, instead of a 500 that Pub/Sub retries forever
+        message_id = publish_fetch_failed(fr, f"clean failed: {e}")
+        return {"ok": True, "failed": "clean", "error": str(e), "reported": message_id is not None}
+
+    clean_bytes = clean.encode("utf-8")
+    meta = {
+        "request_id": fr.request_id,
+        "url": fr.url,
+        "final_url": fetch.final_url,
+        "fetched_at": utc_now_iso_z(),
+        "http_status": fetch.status,
+        "truncated": fetch.truncated,
+        "hash_raw": fetch.sha256,  # computed while streaming
+        "clean_chars": len(clean),
+    }
+
+    if os.environ.get("EVIDENCE_LAYOUT", "bundle") == "bundle":
+        # one compressed object; its creation is the completion marker
+        writer.create_once(
+            prefix + BUNDLE_NAME,
+            build_bundle(meta, {"raw.html": fetch.raw_bytes, "clean.txt": clean_bytes}),
+            CONTENT_TYPE,
+        )
+    else:
+        writer.write_bytes(prefix + "raw.html", fetch.raw_bytes, "text/html")
+        writer.write_bytes(prefix + "clean.txt", clean_bytes, "text/plain; charset=utf-8")
         writer.write_json(prefix + "meta.json", meta)
         writer.write_json(prefix + "done.json", {"ok": True})
+    return {"ok": True}
 
-        return {"ok": True}
 
-    return app
 app = create_app()
@@ -0,0 +1,72 @@
+"""
+extract_text (lxml walk) against the reference clean_html_to_text (bs4)
+over the fixture corpus in tests/fixtures/pages, as-is and with the body
+repeated to ~256 KB, and over the captured pages in tests/fixtures/captured
+as served: any divergence fails. Also reports the speed of both.
+
+    pytest -q tests/test_clean_parity.py -s     # prints the numbers
+"""
+import time
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("lxml")
+pytest.importorskip("bs4")
+
+from app.clean import clean_html_to_text, decode_page, extract_text  # noqa: E402
+
+FIXTURES = Path(__file__).parent / "fixtures" / "pages"
+PAGES = {p.stem: p.read_bytes() for p in sorted(FIXTURES.glob("*.html"))}
+CAPTURED = {p.stem: p.read_bytes() for p in sorted((FIXTURES.parent / "captured").glob("*.html"))}
+LARGE_BYTES = 256 * 1024
+
+
+def _large(raw: bytes) -> bytes:
+    # one document: repeating whole pages would stop parsing at the first </html>
+    body = raw.replace(b"</body>", b"").replace(b"</html>", b"")
+    return b"<html><body>" + body * (LARGE_BYTES // max(len(body), 1) + 1) + b"</body></html>"
+
+
+def _reference(raw: bytes) -> str:
+    return clean_html_to_text(decode_page(raw))
+
+
+@pytest.mark.parametrize("sniff", ["0", "1"])
+@pytest.mark.parametrize("name", sorted(PAGES))
+def test_extract_text_matches_reference(monkeypatch, name, sniff):
+    monkeypatch.setenv("CLEAN_SNIFF_CHARSET", sniff)
+    for raw in (PAGES[name], _large(PAGES[name])):
+        assert extract_text(raw) == _reference(raw)
+
+
+@pytest.mark.parametrize("name", sorted(CAPTURED))
+def test_extract_text_matches_reference_on_captured_pages(name):
+    assert extract_text(CAPTURED[name]) == _reference(CAPTURED[name])
+
+
+def test_default_decoding_is_unchanged(monkeypatch):
+    # without the flag, non-UTF-8 pages decode exactly as before (UTF-8, replace)
+    monkeypatch.delenv("CLEAN_SNIFF_CHARSET", raising=False)
+    raw = PAGES["latin1"]
+    assert decode_page(raw) == raw.decode("utf-8", errors="replace")
+    monkeypatch.setenv("CLEAN_SNIFF_CHARSET", "1")
+    assert "Café naïve résumé" in extract_text(raw)
+
+
+def test_speed_report(monkeypatch):
+    monkeypatch.delenv("CLEAN_SNIFF_CHARSET", raising=False)
+    pages = [_large(raw) for raw in PAGES.values() if raw.strip()] + list(CAPTURED.values())
+    mb = sum(map(len, pages)) / 1e6
+
+    timings = {}
+    for name, fn in (("bs4", _reference), ("lxml", extract_text)):
+        t0 = time.perf_counter()
+        out = [fn(raw) for raw in pages]
+        timings[name] = time.perf_counter() - t0
+        timings[name + "_out"] = out
+        print(f"\n{name}: {len(pages)} pages, {mb:.1f} MB in {timings[name]:.2f}s ({mb / timings[name]:.1f} MB/s)")
+
+    assert timings["lxml_out"] == timings["bs4_out"]
+    print(f"speed-up: {timings['bs4'] / timings['lxml']:.1f}x")
+    assert timings["lxml"] < timings["bs4"]
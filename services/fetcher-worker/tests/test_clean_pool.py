@@ -0,0 +1,147 @@
+"""
+Process-pool cleaning over the fixture corpus (tests/fixtures/pages, each
+body repeated to ~256 KB, plus the captured pages in tests/fixtures/captured):
+pool output equals in-thread output, a stuck or dead worker is replaced on
+its own, and a bs4 vs lxml throughput report over the captured pages.
+
+    pytest -q tests/test_clean_pool.py -s     # prints the numbers
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("lxml")
+pytest.importorskip("bs4")
+
+from app import clean  # noqa: E402
+from app.clean import CleanError, _CleanPool, clean_page  # noqa: E402
+
+FIXTURES = Path(__file__).parent / "fixtures" / "pages"
+CAPTURED = FIXTURES.parent / "captured"
+PAGE_BYTES = 256 * 1024
+
+
+def _large(raw: bytes, size: int) -> bytes:
+    # one document: repeating whole pages would stop parsing at the first </html>
+    body = raw.replace(b"</body>", b"").replace(b"</html>", b"")
+    return b"<html><body>" + body * (size // len(body) + 1) + b"</body></html>"
+
+
+def _corpus(size: int = PAGE_BYTES) -> dict:
+    pages = {}
+    for path in sorted(FIXTURES.glob("*.html")):
+        raw = path.read_bytes()
+        if raw.strip():
+            pages[path.stem] = _large(raw, size)
+    return pages
+
+
+def _captured() -> dict:
+    return {path.stem: path.read_bytes() for path in sorted(CAPTURED.glob("*.html"))}
+
+
+@pytest.fixture
+def pool():
+    p = _CleanPool(2)
+    yield p
+    for w in p._idle:
+        w.kill()
+
+
+def test_pool_output_matches_in_thread(pool):
+    for name, raw in {**_corpus(), **_captured()}.items():
+        assert pool.clean(raw, 30) == clean_page(raw), name
+
+
+def test_timeout_replaces_only_the_stuck_worker(pool):
+    page = _corpus()["article"]
+    with ThreadPoolExecutor(2) as ex:  # start both workers
+        list(ex.map(lambda _: pool.clean(page, 30), range(2)))
+    assert len(pool._idle) == 2
+    pids = {w.proc.pid for w in pool._idle}
+
+    with pytest.raises(CleanError, match="exceeded"):
+        pool.clean(page, 0.001)
+
+    survivor = pool._idle[0]
+    assert len(pool._idle) == 1 and survivor.proc.is_alive() and survivor.proc.pid in pids
+    # the pool keeps working: the survivor, then a fresh worker in the freed slot
+    with ThreadPoolExecutor(2) as ex:
+        assert list(ex.map(lambda _: pool.clean(page, 30), range(2))) == [clean_page(page)] * 2
+    assert survivor in pool._idle and len(pool._idle) == 2
+
+
+def test_worker_death_mid_page_is_a_clean_error(pool):
+    page = _corpus()["article"]
+    pool.clean(page, 30)
+    worker = pool._idle[0]
+    threading.Timer(0.05, worker.proc.kill).start()
+    with pytest.raises(CleanError, match="exited"):
+        pool.clean(_corpus(8 * PAGE_BYTES)["article"], 30)
+    assert pool._idle == []
+    assert pool.clean(page, 30) == clean_page(page)
+
+
+def _reset_pool(monkeypatch):
+    # workers read CLEAN_EXTRACTOR from the environment they were spawned with
+    if clean._pool is not None:
+        for w in clean._pool._idle:
+            w.kill()
+    monkeypatch.setattr(clean, "_pool", None)
+
+
+def test_clean_throughput_report(monkeypatch):
+    """
+    bs4 vs lxml, in-thread and through the pool, over the captured pages,
+    with a ticker thread standing in for the rest of the instance: its
+    worst stall shows how long a parse held the GIL. Pool speed-up needs
+    more than one CPU; the stall drop does not.
+    """
+    pages = list(_captured().values())
+    assert pages and min(map(len, pages)) > 100 * 1024
+    mb = sum(map(len, pages)) / 1e6
+    monkeypatch.setenv("CLEAN_PROCESSES", "2")
+
+    results, rates = {}, {}
+    for extractor in ("bs4", "lxml"):
+        monkeypatch.setenv("CLEAN_EXTRACTOR", extractor)
+        _reset_pool(monkeypatch)
+        monkeypatch.setenv("CLEAN_INLINE_BELOW_BYTES", "0")
+        clean.clean_html_bytes(pages[0], 30)  # start a worker outside the timing
+
+        for mode, inline_below in (("in-thread", str(1 << 30)), ("pool", "0")):
+            monkeypatch.setenv("CLEAN_INLINE_BELOW_BYTES", inline_below)
+            stop, stalls = threading.Event(), [0.0]
+
+            def tick():
+                last = time.perf_counter()
+                while not stop.is_set():
+                    time.sleep(0.001)
+                    now = time.perf_counter()
+                    stalls[0] = max(stalls[0], now - last)
+                    last = now
+
+            ticker = threading.Thread(target=tick)
+            ticker.start()
+            t0 = time.perf_counter()
+            with ThreadPoolExecutor(2) as ex:
+                results[extractor, mode] = list(ex.map(lambda raw: clean.clean_html_bytes(raw, 60), pages))
+            elapsed = time.perf_counter() - t0
+            stop.set()
+            ticker.join()
+            rates[extractor, mode] = mb / elapsed
+            print(
+                f"\n{extractor} {mode}: {len(pages)} pages, {mb:.1f} MB in {elapsed:.2f}s "
+                f"({len(pages) / elapsed:.1f} pages/s, {mb / elapsed:.1f} MB/s), "
+                f"worst ticker stall {stalls[0] * 1000:.0f} ms, cpus={os.cpu_count()}"
+            )
+
+    for mode in ("in-thread", "pool"):
+        print(f"lxml/bs4 throughput {mode}: {rates['lxml', mode] / rates['bs4', mode]:.1f}x")
+
+    _reset_pool(monkeypatch)
+    assert len(set(map(tuple, results.values()))) == 1
@@ -0,0 +1,175 @@
+"""
+/pubsub/push against a local slow-responding fixture server: throughput
+follows FETCH_MAX_INFLIGHT, pushes past the admission limit get 429, a
+page that can't be cleaned is reported as failed and acked, and cookies
+never carry over between fetches on the shared session.
+
+    pytest -q tests/test_fetch_load.py -s     # prints the numbers
+"""
+import asyncio
+import base64
+import concurrent.futures
+import http.server
+import json
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("fastapi")
+pytest.importorskip("google.cloud.storage")
+pytest.importorskip("google.cloud.pubsub_v1")
+httpx = pytest.importorskip("httpx")
+
+from app import events, server as srv  # noqa: E402
+from app.fetch import get_session  # noqa: E402
+
+DELAY_S = 0.2
+PUSHES = 16
+PAGE = b"<html><body><p>slow page</p></body></html>"
+
+
+class _Slow(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path == "/login":
+            body = b"ok"
+            self.send_response(200)
+            self.send_header("Set-Cookie", "sid=tenant-a; Path=/")
+        elif self.path == "/echo":
+            body = (self.headers.get("Cookie") or "").encode("utf-8")
+            self.send_response(200)
+        else:
+            time.sleep(DELAY_S)
+            body = PAGE
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(http.server.ThreadingHTTPServer):
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class _Writer:
+    build_prefix = staticmethod(srv.GcsEvidenceWriter.build_prefix)
+
+    def __init__(self):
+        self.objects = {}
+
+    def create_once(self, name, data, content_type):
+        self.objects[name] = data
+        return True
+
+
+@pytest.fixture(scope="module")
+def origin():
+    httpd = _Server(("127.0.0.1", 0), _Slow)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+
+@pytest.fixture
+def writer(monkeypatch):
+    w = _Writer()
+    monkeypatch.setenv("EVIDENCE_BUCKET", "bench")
+    monkeypatch.setenv("EVIDENCE_LAYOUT", "bundle")
+    monkeypatch.setattr(srv, "_writer", lambda bucket: w)
+    return w
+
+
+class _Publisher:
+    def __init__(self):
+        self.published = []
+
+    def publish(self, topic, data):
+        self.published.append((topic, json.loads(data)))
+        f = concurrent.futures.Future()
+        f.set_result(str(len(self.published)))
+        return f
+
+
+def _push(url: str, i: int, **extra) -> dict:
+    data = {
+        "v": 1,
+        "request_id": f"R-{i}",
+        "url": url,
+        "fetch_timestamp": "2026-01-01T00:00:00Z",
+        "options": {"max_bytes": 1 << 20, "timeout_ms": 10_000},
+        **extra,
+    }
+    return {"message": {"data": base64.b64encode(json.dumps(data).encode()).decode()}}
+
+
+def _run(monkeypatch, origin: str, inflight: int, queued: int, n: int, **extra):
+    # fresh pool and admission gate sized for this run
+    monkeypatch.setenv("FETCH_MAX_INFLIGHT", str(inflight))
+    monkeypatch.setenv("FETCH_MAX_QUEUED", str(queued))
+    monkeypatch.setattr(srv, "_executor", None)
+    monkeypatch.setattr(srv, "_gate", None)
+
+    async def go():
+        transport = httpx.ASGITransport(app=srv.create_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://fetcher") as client:
+            t0 = time.perf_counter()
+            codes = await asyncio.gather(
+                *(client.post("/pubsub/push", json=_push(f"{origin}/page/{i}", i, **extra)) for i in range(n))
+            )
+            return [r.status_code for r in codes], time.perf_counter() - t0
+
+    try:
+        return asyncio.run(go())
+    finally:
+        srv._executor.shutdown(wait=True)
+
+
+def test_throughput_scales_with_inflight(monkeypatch, origin, writer):
+    rates = {}
+    for inflight in (1, 8):
+        codes, elapsed = _run(monkeypatch, origin, inflight, PUSHES, PUSHES)
+        assert codes == [200] * PUSHES
+        rates[inflight] = PUSHES / elapsed
+        print(f"\ninflight={inflight}: {PUSHES} fetches of a {DELAY_S}s page in {elapsed:.2f}s ({rates[inflight]:.1f}/s)")
+
+    assert len(writer.objects) == PUSHES
+    # 8 slots over a latency-bound origin: well above the serial rate
+    assert rates[8] >= 4 * rates[1]
+
+
+def test_saturated_instance_rejects_with_429(monkeypatch, origin, writer):
+    codes, _ = _run(monkeypatch, origin, 2, 1, 6)
+    assert sorted(codes) == [200, 200, 200, 429, 429, 429]
+    assert len(writer.objects) == 3
+
+
+def test_clean_failure_is_reported_and_acked(monkeypatch, origin, writer):
+    publisher = _Publisher()
+    monkeypatch.setattr(events, "get_publisher_client", lambda: publisher)
+    monkeypatch.setenv("EVIDENCE_EVENTS_TOPIC", "projects/p/topics/evidence")
+    monkeypatch.setenv("CLEAN_MAX_INPUT_BYTES", "10")
+
+    codes, _ = _run(monkeypatch, origin, 1, 1, 1, tenant_id="T1", trace={"job_id": "J1", "url_id": "U1"})
+    assert codes == [200]
+    assert writer.objects == {}
+    [(topic, event)] = publisher.published
+    assert topic == "projects/p/topics/evidence"
+    assert event["event_type"] == "EVIDENCE_FETCH_FAILED"
+    p = event["payload"]
+    assert (p["tenant_id"], p["job_id"], p["url_id"]) == ("T1", "J1", "U1")
+    assert "exceeds 10" in p["error"]
+
+
+def test_cookies_do_not_carry_over_between_fetches(origin):
+    s = get_session()
+    s.get(f"{origin}/login", timeout=5).raise_for_status()
+    assert len(s.cookies) == 0
+    assert s.get(f"{origin}/echo", timeout=5).text == ""
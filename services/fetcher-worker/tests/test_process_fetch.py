@@ -0,0 +1,90 @@
+"""
+_process_fetch end to end against a local origin and a fake bucket, for
+both evidence layouts. The fake blob converts its payload the way
+Blob.upload_from_string does, so a bytearray body fails here as in GCS.
+"""
+import http.server
+import threading
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("fastapi")
+pytest.importorskip("google.cloud.storage")
+pytest.importorskip("google.cloud.pubsub_v1")
+
+from google.cloud._helpers import _to_bytes  # noqa: E402
+
+from app import server as srv  # noqa: E402
+from app.bundle import BUNDLE_NAME  # noqa: E402
+from app.contracts import FetchRequest  # noqa: E402
+from app.gcs import GcsEvidenceWriter  # noqa: E402
+
+PAGE = b"<html><body><nav>menu</nav><p>Evidence text.</p></body></html>"
+
+
+class _Page(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, *args):
+        pass
+
+
+class _Blob:
+    def __init__(self, bucket, name):
+        self.bucket, self.name = bucket, name
+
+    def upload_from_string(self, data, content_type=None, if_generation_match=None):
+        self.bucket.objects[self.name] = (_to_bytes(data, encoding="utf-8"), content_type)
+
+
+class _Bucket:
+    def __init__(self):
+        self.objects = {}
+
+    def blob(self, name):
+        return _Blob(self, name)
+
+
+@pytest.fixture(scope="module")
+def origin():
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Page)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+
+@pytest.fixture
+def bucket(monkeypatch):
+    b = _Bucket()
+    writer = GcsEvidenceWriter.__new__(GcsEvidenceWriter)  # no storage.Client
+    writer.bucket = b
+    monkeypatch.setattr(srv, "_writer", lambda name: writer)
+    return b
+
+
+def _request(url: str) -> FetchRequest:
+    return FetchRequest.from_dict(
+        {"v": 1, "request_id": "R-1", "url": url, "fetch_timestamp": "2026-01-01T00:00:00Z"}
+    )
+
+
+def test_files_layout_writes_raw_clean_meta_done(monkeypatch, origin, bucket):
+    monkeypatch.setenv("EVIDENCE_LAYOUT", "files")
+    assert srv._process_fetch(_request(f"{origin}/p"), "bench") == {"ok": True}
+
+    prefix = "evidence/v1/fetch/2026/01/01/00/R-1/"
+    assert set(bucket.objects) == {prefix + n for n in ("raw.html", "clean.txt", "meta.json", "done.json")}
+    assert bucket.objects[prefix + "raw.html"] == (PAGE, "text/html")
+    assert bucket.objects[prefix + "clean.txt"][0] == b"Evidence text.\n"
+
+
+def test_bundle_layout_writes_one_object(monkeypatch, origin, bucket):
+    monkeypatch.setenv("EVIDENCE_LAYOUT", "bundle")
+    assert srv._process_fetch(_request(f"{origin}/p"), "bench") == {"ok": True}
+    assert list(bucket.objects) == ["evidence/v1/fetch/2026/01/01/00/R-1/" + BUNDLE_NAME]
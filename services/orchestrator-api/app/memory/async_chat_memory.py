@@ -0,0 +1,310 @@
+# app/memory/async_chat_memory.py
+from __future__ import annotations
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from google.api_core.exceptions import AlreadyExists, FailedPrecondition, NotFound
+from google.cloud import firestore
+from .chat_memory import (
+    ConversationPaths,
+    PendingAppend,
+    QueryRehydration,
+    RehydrationConfig,
+    Write,
+    alloc_writes,
+    allocated_seq,
+    appended_message,
+    apply_writes,
+    create_conversation_writes,
+    history_from_cache,
+    history_from_view,
+    merge_artifact_ids,
+    message_writes,
+    new_message_doc,
+    pending_key_seq,
+    pin_writes,
+    plan_txn_append,
+    snapshot_dict,
+)
+from .context_window import WINDOW_CHECK_FIELDS, read_window, window_check
+from .firestore_client import get_async_db
+from .rehydration_cache import RehydrationCache
+
+
+class AsyncChatMemoryStore(ConversationPaths):
+    """
+    ChatMemoryStore on firestore.AsyncClient, for use from async routes.
+
+    Same document layout, seq contract and rehydration semantics as the sync
+    store: both run the shared planners in chat_memory and differ only in
+    how the I/O is performed (awaited here instead of blocking the loop).
+    """
+
+    def __init__(self, tenant_id: str = "default", cache: Optional[RehydrationCache] = None):
+        self.tenant_id = tenant_id
+        self.db = get_async_db()
+        self.cache = cache if cache is not None else RehydrationCache.from_env()
+
+    async def _get_all(self, refs) -> Dict[str, Any]:
+        # one batched round trip; snapshots keyed by document path
+        return {snap.reference.path: snap async for snap in self.db.get_all(refs)}
+
+    async def _commit(self, writes: Iterable[Write]):
+        batch = self.db.batch()
+        apply_writes(batch, writes)
+        return await batch.commit()
+
+    async def get_or_create_conversation(
+        self,
+        user_id: str,
+        conversation_id: Optional[str],
+        rehydration: RehydrationConfig = RehydrationConfig(),
+    ) -> str:
+        if conversation_id is None:
+            conversation_id = self._new_conversation_id(user_id)
+
+        snap = await self.refs(user_id, conversation_id).conv.get()
+        if snap.exists:
+            return conversation_id
+
+        await self._create_conversation(user_id, conversation_id, rehydration)
+        return conversation_id
+
+    async def open_conversation(
+        self,
+        user_id: str,
+        conversation_id: Optional[str],
+        rehydration: RehydrationConfig = RehydrationConfig(),
+    ) -> Tuple[str, List[Dict[str, str]]]:
+        """See ChatMemoryStore.open_conversation."""
+        if conversation_id is None:
+            conversation_id = self._new_conversation_id(user_id)
+            await self._create_conversation(user_id, conversation_id, rehydration)
+            return conversation_id, []
+
+        cached = await self._cached_history(user_id, conversation_id)
+        if cached is not None:
+            return conversation_id, cached
+
+        snap = await self.refs(user_id, conversation_id).window.get()
+        if snap.exists:
+            return conversation_id, await self._history_from_window(user_id, conversation_id, snap)
+
+        # no window: a brand-new id, or a conversation that predates window docs
+        if await self._create_conversation(user_id, conversation_id, rehydration):
+            return conversation_id, []
+        return conversation_id, await self._rehydrate_from_messages(user_id, conversation_id)
+
+    async def _create_conversation(
+        self,
+        user_id: str,
+        conversation_id: str,
+        rehydration: RehydrationConfig,
+    ) -> bool:
+        """Create-only; False if the conversation already exists."""
+        refs = self.refs(user_id, conversation_id)
+        try:
+            await self._commit(create_conversation_writes(refs, self.tenant_id, user_id, conversation_id, rehydration))
+        except AlreadyExists:
+            return False
+        return True
+
+    async def rehydrate(
+        self,
+        user_id: str,
+        conversation_id: str,
+    ) -> List[Dict[str, str]]:
+        cached = await self._cached_history(user_id, conversation_id)
+        if cached is not None:
+            return cached
+
+        # Fast path: one read of the materialized window doc
+        snap = await self.refs(user_id, conversation_id).window.get()
+        return await self._history_from_window(user_id, conversation_id, snap)
+
+    def _cache_key(self, user_id: str, conversation_id: str) -> Tuple[str, str, str]:
+        return (self.tenant_id, user_id, conversation_id)
+
+    async def _cached_history(self, user_id: str, conversation_id: str) -> Optional[List[Dict[str, str]]]:
+        """See ChatMemoryStore._cached_history."""
+        key = self._cache_key(user_id, conversation_id)
+        if self.cache.get(key) is None:
+            return None
+        snap = await self.refs(user_id, conversation_id).window.get(field_paths=WINDOW_CHECK_FIELDS)
+        entry = self.cache.history_source(key, window_check(snapshot_dict(snap)))
+        return history_from_cache(entry) if entry is not None else None
+
+    async def _history_from_window(self, user_id: str, conversation_id: str, snap) -> List[Dict[str, str]]:
+        doc = snapshot_dict(snap)
+        view = read_window(doc)
+        if view is None:
+            return await self._rehydrate_from_messages(user_id, conversation_id)
+
+        refs = self.refs(user_id, conversation_id)
+        spilled = (await self._get_all([refs.message(s) for s in view.spilled])).values() if view.spilled else ()
+        history = history_from_view(view, spilled)
+        self.cache.put_view(self._cache_key(user_id, conversation_id), window_check(doc), view)
+        return history
+
+    async def _rehydrate_from_messages(
+        self,
+        user_id: str,
+        conversation_id: str,
+    ) -> List[Dict[str, str]]:
+        refs = self.refs(user_id, conversation_id)
+
+        async def recent_query(n: int) -> List[Dict[str, Any]]:
+            q = refs.messages.order_by("seq", direction=firestore.Query.DESCENDING).limit(n)
+            return [d.to_dict() async for d in q.stream()]
+
+        conv_snap, recent = await asyncio.gather(refs.conv.get(), recent_query(QueryRehydration.GUESS_LAST_N))
+        plan = QueryRehydration(snapshot_dict(conv_snap), recent)
+        if plan.requery:
+            plan.add(await recent_query(plan.last_n))
+        missing = plan.missing_pins()
+        if missing:
+            plan.add_snaps((await self._get_all([refs.message(s) for s in missing])).values())
+        return plan.history()
+
+    async def append_message(
+        self,
+        user_id: str,
+        conversation_id: str,
+        role: str,
+        content: str,
+        request_id: str,
+        pointers: Optional[Dict[str, Any]] = None,
+    ) -> int:
+        """See ChatMemoryStore.append_message."""
+        refs = self.refs(user_id, conversation_id)
+        try:
+            results = await self._commit(alloc_writes(refs, request_id))
+        except AlreadyExists:
+            return await self._resolve_pending(user_id, conversation_id, role, content, request_id, pointers)
+        except NotFound:
+            raise ValueError("Conversation does not exist")
+
+        seq = allocated_seq(results[1])
+        message = new_message_doc(seq, role, content, request_id, pointers)
+        try:
+            await self._commit(
+                message_writes(refs, seq, message, self.db.write_option(last_update_time=results[0].update_time))
+            )
+        except FailedPrecondition:
+            # a replay took this request over (see plan_txn_append); its seq is the request's seq
+            return int((await refs.key(request_id).get()).get("seq"))
+        self.cache.on_append(self._cache_key(user_id, conversation_id), message)
+        return seq
+
+    async def _resolve_pending(
+        self,
+        user_id: str,
+        conversation_id: str,
+        role: str,
+        content: str,
+        request_id: str,
+        pointers: Optional[Dict[str, Any]] = None,
+        artifacts: Optional[List[Dict[str, Any]]] = None,
+    ) -> int:
+        """See ChatMemoryStore._resolve_pending."""
+        key_snap = await self.refs(user_id, conversation_id).key(request_id).get()
+        seq = pending_key_seq(snapshot_dict(key_snap), request_id)
+        if seq is not None:
+            return seq
+        return await self._append_message_txn(
+            user_id, conversation_id, role, content, request_id, pointers, artifacts, takeover=True
+        )
+
+    async def _append_message_txn(
+        self,
+        user_id: str,
+        conversation_id: str,
+        role: str,
+        content: str,
+        request_id: str,
+        pointers: Optional[Dict[str, Any]] = None,
+        artifacts: Optional[List[Dict[str, Any]]] = None,
+        takeover: bool = False,
+    ) -> int:
+        refs = self.refs(user_id, conversation_id)
+
+        @firestore.async_transactional
+        async def _txn(txn: firestore.AsyncTransaction) -> Tuple[int, List[Write]]:
+            snaps = {
+                snap.reference.path: snap
+                async for snap in self.db.get_all([refs.conv, refs.key(request_id)], transaction=txn)
+            }
+            seq, writes = plan_txn_append(
+                refs,
+                snapshot_dict(snaps.get(refs.conv.path)),
+                snapshot_dict(snaps.get(refs.key(request_id).path)),
+                role,
+                content,
+                request_id,
+                pointers,
+                artifacts,
+                takeover,
+            )
+            apply_writes(txn, writes)
+            return seq, writes
+
+        try:
+            seq, writes = await _txn(self.db.transaction())
+        except PendingAppend:
+            return await self._resolve_pending(user_id, conversation_id, role, content, request_id, pointers, artifacts)
+        message = appended_message(refs, seq, writes)
+        if message is not None:
+            self.cache.on_append(self._cache_key(user_id, conversation_id), message)
+        return seq
+
+    async def commit_turn(
+        self,
+        user_id: str,
+        conversation_id: str,
+        content: str,
+        request_id: str,
+        pointers: Optional[Dict[str, Any]] = None,
+        artifacts: Optional[List[Dict[str, Any]]] = None,
+    ) -> int:
+        """See ChatMemoryStore.commit_turn."""
+        if not artifacts:
+            return await self.append_message(
+                user_id, conversation_id, "assistant", content, request_id, pointers
+            )
+        return await self._append_message_txn(
+            user_id, conversation_id, "assistant", content, request_id, pointers, artifacts
+        )
+
+    async def set_pinned_messages(self, user_id: str, conversation_id: str, seqs: Iterable[int]) -> List[int]:
+        """See ChatMemoryStore.set_pinned_messages."""
+        refs = self.refs(user_id, conversation_id)
+        wanted = sorted({int(s) for s in seqs})
+        snaps = await self._get_all([refs.conv, refs.window] + [refs.message(s) for s in wanted])
+        if not snaps[refs.conv.path].exists:
+            raise ValueError("Conversation does not exist")
+        kept, writes = pin_writes(
+            refs, [snaps[refs.message(s).path] for s in wanted], snaps[refs.window.path].exists
+        )
+        await self._commit(writes)
+        self.cache.invalidate(self._cache_key(user_id, conversation_id))
+        return kept
+
+    async def attach_artifacts(
+        self,
+        user_id: str,
+        conversation_id: str,
+        message_seq: int,
+        artifacts: List[Dict[str, Any]],
+    ) -> None:
+        refs = self.refs(user_id, conversation_id)
+
+        # message merge and conversation read are independent
+        _, conv_snap = await asyncio.gather(
+            refs.message(message_seq).set({"artifacts": artifacts}, merge=True),
+            refs.conv.get(),
+        )
+        self.cache.on_artifacts(self._cache_key(user_id, conversation_id), message_seq, artifacts)
+
+        # Update conversation convenience list (bounded to last ~20)
+        conv = conv_snap.to_dict() or {}
+        latest = merge_artifact_ids(conv.get("latest_artifact_ids"), artifacts)
+        await refs.conv.set({"latest_artifact_ids": latest, "updated_at": firestore.SERVER_TIMESTAMP}, merge=True)
@@ -1,19 +1,219 @@
 # app/memory/chat_memory.py
 from __future__ import annotations
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from google.api_core.exceptions import AlreadyExists, FailedPrecondition, NotFound
 from google.cloud import firestore
+from google.cloud.firestore_v1 import transforms
+from .context_window import (
+    WINDOW_CHECK_FIELDS,
+    WINDOW_RING,
+    WindowView,
+    build_window_doc,
+    new_window_doc,
+    read_window,
+    window_append,
+    window_check,
+    window_pins,
+)
 from .firestore_client import get_db
+from .rehydration_cache import CachedWindow, RehydrationCache
 
 @dataclass(frozen=True)
 class RehydrationConfig:
     last_n: int = 24
     max_chars: Optional[int] = 60000
+    mode: str = "last_n"  # or "summary+last_n" (see app/memory/compaction.py)
 
-class ChatMemoryStore:
-    def __init__(self, tenant_id: str = "default"):
-        self.tenant_id = tenant_id
-        self.db = get_db()
+def select_window(
+    messages: Dict[int, Dict[str, Any]],
+    pinned: set,
+    last_n: int,
+    max_chars: Optional[int],
+) -> List[Dict[str, Any]]:
+    """Deterministic last_n + pinned + char-budget selection over messages keyed by seq."""
+    recent = set(sorted(messages)[-last_n:]) if last_n > 0 else set()
+    ordered = [messages[k] for k in sorted(messages) if k in recent or k in pinned]
+
+    if max_chars is not None:
+        budget = int(max_chars)
+        kept: List[Dict[str, Any]] = []
+        # Always keep pinned first (in order), then add from the end
+        pinned_ordered = [m for m in ordered if int(m["seq"]) in pinned]
+        tail = [m for m in ordered if int(m["seq"]) not in pinned]
+
+        def msg_len(m: Dict[str, Any]) -> int:
+            return len((m.get("content") or "")) + 32  # small deterministic overhead
+
+        for m in pinned_ordered:
+            l = msg_len(m)
+            if l <= budget:
+                kept.append(m)
+                budget -= l
+
+        # Add most recent tail messages until budget used
+        for m in reversed(tail):
+            l = msg_len(m)
+            if l <= budget:
+                kept.append(m)
+                budget -= l
+
+        ordered = sorted(kept, key=lambda x: int(x["seq"]))
+
+    return ordered
+
+
+def new_conversation_doc(
+    tenant_id: str,
+    user_id: str,
+    conversation_id: str,
+    rehydration: RehydrationConfig,
+) -> Dict[str, Any]:
+    return {
+        "conversation_id": conversation_id,
+        "user_id": user_id,
+        "tenant_id": tenant_id,
+        "created_at": firestore.SERVER_TIMESTAMP,
+        "updated_at": firestore.SERVER_TIMESTAMP,
+        "status": "active",
+        # highest allocated seq; always next_seq - 1 (its message may still be in flight)
+        "next_seq": 1,
+        "last_message_seq": 0,
+        "rehydration": {
+            "mode": rehydration.mode,
+            "last_n": rehydration.last_n,
+            "max_chars": rehydration.max_chars,
+        },
+        "pinned_message_seqs": [],
+        "latest_artifact_ids": [],
+        "summary": {"through_seq": 0, "segments": []},
+    }
+
+
+def new_message_doc(
+    seq: int,
+    role: str,
+    content: str,
+    request_id: str,
+    pointers: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    return {
+        "seq": seq,
+        "role": role,
+        "content": content,
+        "content_type": "text/plain",
+        "created_at": firestore.SERVER_TIMESTAMP,
+        "request_id": request_id,
+        **(pointers or {}),
+    }
+
+
+def message_key_id(request_id: str) -> str:
+    # request ids are caller-supplied; hash so any value is a valid doc id
+    return hashlib.sha256(request_id.encode("utf-8")).hexdigest()[:40]
+
+
+_TRANSFORMS = (transforms.Increment, transforms.Maximum, transforms.Minimum, transforms.ArrayUnion, transforms.ArrayRemove)
+
+
+def transform_result(write_result, data: Dict[str, Any], field: str):
+    """
+    The result of field's transform in a write of data. The server returns
+    transform_results in field-path order, server timestamps included.
+    """
+    paths = sorted(
+        tuple(k.split("."))
+        for k, v in data.items()
+        if v is firestore.SERVER_TIMESTAMP or isinstance(v, _TRANSFORMS)
+    )
+    return write_result.transform_results[paths.index(tuple(field.split(".")))]
+
+
+def allocated_seq(write_result) -> int:
+    """The seq allocated by alloc_writes' conversation update: last_message_seq after Increment(1)."""
+    return int(transform_result(write_result, alloc_conv_update(), "last_message_seq").integer_value)
+
+
+def merge_artifact_ids(latest: Optional[List[str]], artifacts: List[Dict[str, Any]], limit: int = 20) -> List[str]:
+    # conversation convenience list (bounded to last ~20)
+    out = list(latest or [])
+    for a in artifacts:
+        aid = a.get("artifact_id")
+        if aid and aid not in out:
+            out.append(aid)
+    return out[-limit:]
+
+
+def build_history(
+    messages: Dict[int, Dict[str, Any]],
+    pinned: set,
+    last_n: int,
+    max_chars: Optional[int],
+    mode: str = "last_n",
+    summary: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, str]]:
+    """LLM input: optional summary of compacted history, then the selected window."""
+    prefix: List[Dict[str, str]] = []
+    segments = (summary or {}).get("segments") or []
+    if mode == "summary+last_n" and segments:
+        text = "\n\n".join(
+            f"[Summary of messages {seg['start_seq']}-{seg['end_seq']}]\n{seg['text']}" for seg in segments
+        )
+        prefix.append({"role": "system", "content": text})
+        if max_chars is not None:
+            # summary shares the char budget with the raw window
+            max_chars = max(0, int(max_chars) - len(text) - 32)
+
+    ordered = select_window(messages, pinned, last_n, max_chars)
+    # return minimal structure for LLM input
+    return prefix + [{"role": m["role"], "content": m.get("content", "")} for m in ordered]
+
+
+# ---------------------------------------------------------------------------
+# Shared by ChatMemoryStore and AsyncChatMemoryStore.
+#
+# Everything that decides what to read and what to write lives below; the
+# stores only perform that I/O (blocking or awaited), so the two cannot drift.
+# ---------------------------------------------------------------------------
+
+# (method, ref, data, kwargs), applied in order to a WriteBatch or Transaction
+Write = Tuple[str, Any, Dict[str, Any], Dict[str, Any]]
+
+
+def apply_writes(writer, writes: Iterable[Write]) -> None:
+    for method, ref, data, kwargs in writes:
+        getattr(writer, method)(ref, data, **kwargs)
+
+
+@dataclass(frozen=True)
+class ConversationRefs:
+    """Document layout of one conversation; works with Client and AsyncClient refs."""
+
+    conv: Any
+
+    @property
+    def messages(self):
+        return self.conv.collection("messages")
+
+    @property
+    def window(self):
+        return self.conv.collection("window").document("current")
+
+    def message(self, seq: int):
+        return self.messages.document(f"{int(seq):08d}")
+
+    def key(self, request_id: str):
+        return self.conv.collection("message_keys").document(message_key_id(request_id))
+
+    def summary(self, start_seq: int, end_seq: int):
+        return self.conv.collection("summaries").document(f"{int(start_seq):08d}-{int(end_seq):08d}")
+
+
+class ConversationPaths:
+    """Ref helpers for a store with .db and .tenant_id."""
 
     def _conv_ref(self, user_id: str, conversation_id: str):
         return (
@@ -22,8 +222,239 @@ class ChatMemoryStore:
             .collection("conversations").document(conversation_id)
         )
 
-    def _msgs_col(self, user_id: str, conversation_id: str):
-        return self._conv_ref(user_id, conversation_id).collection("messages")
+    def refs(self, user_id: str, conversation_id: str) -> ConversationRefs:
+        """Document refs of one conversation, for maintenance jobs (compaction, rebuilds)."""
+        return ConversationRefs(self._conv_ref(user_id, conversation_id))
+
+    def _new_conversation_id(self, user_id: str) -> str:
+        # deterministic enough: Firestore auto id is fine; caller returns it to client
+        return self._conv_ref(user_id, "_").collection("_tmp").document().id
+
+
+def create_conversation_writes(
+    refs: ConversationRefs,
+    tenant_id: str,
+    user_id: str,
+    conversation_id: str,
+    rehydration: RehydrationConfig,
+) -> List[Write]:
+    """Create-only: the commit fails with AlreadyExists if the conversation exists."""
+    conv_doc = new_conversation_doc(tenant_id, user_id, conversation_id, rehydration)
+    return [
+        ("create", refs.conv, conv_doc, {}),
+        ("set", refs.window, new_window_doc(conv_doc["rehydration"]), {}),
+    ]
+
+
+# A replay that finds the request key claimed but without a seq takes the
+# request over once the key is this old (the original append died); before
+# that it fails fast with PendingAppend instead of waiting on the request path.
+PENDING_TAKEOVER_S = 10.0
+
+
+class PendingAppend(Exception):
+    """
+    The request key is claimed by an append whose message is not written yet.
+    Retryable: the replay resolves once that append finishes or goes stale.
+    """
+
+    retry_after_s = 1
+
+
+def pending_key_seq(key: Optional[Dict[str, Any]], request_id: str, now: Optional[datetime] = None) -> Optional[int]:
+    """
+    Replay of a claimed request, from one read of its key: the seq once the
+    original append finished; None if the key is gone or stale (take the
+    request over); PendingAppend while the original append may still land.
+    """
+    if key is None:
+        return None
+    if key.get("seq") is not None:
+        return int(key["seq"])
+    created_at = key.get("created_at")
+    now = now or datetime.now(timezone.utc)
+    if created_at is None or (now - created_at).total_seconds() >= PENDING_TAKEOVER_S:
+        return None
+    raise PendingAppend(request_id)
+
+
+def alloc_conv_update() -> Dict[str, Any]:
+    return {
+        "last_message_seq": firestore.Increment(1),
+        "next_seq": firestore.Increment(1),
+        "updated_at": firestore.SERVER_TIMESTAMP,
+    }
+
+
+def alloc_writes(refs: ConversationRefs, request_id: str) -> List[Write]:
+    """
+    Fast-path commit 1: claim the request key (create-only) and allocate a seq.
+    This is the only conversation-doc write of the fast path; allocated_seq()
+    reads the seq from its transform results.
+    """
+    return [
+        ("create", refs.key(request_id), {"request_id": request_id, "created_at": firestore.SERVER_TIMESTAMP}, {}),
+        ("update", refs.conv, alloc_conv_update(), {}),
+    ]
+
+
+def message_writes(refs: ConversationRefs, seq: int, message: Dict[str, Any], key_option) -> List[Write]:
+    """
+    Fast-path commit 2: the message at its allocated seq and its window slot.
+    key_option pins the request key to commit 1's write, so the commit fails
+    (FailedPrecondition) if a replay took the request over in the meantime.
+    """
+    return [
+        ("create", refs.message(seq), message, {}),
+        ("update", refs.key(message["request_id"]), {"seq": seq}, {"option": key_option}),
+        ("set", refs.window, window_append(seq, message), {"merge": True}),
+    ]
+
+
+def plan_txn_append(
+    refs: ConversationRefs,
+    conv: Optional[Dict[str, Any]],
+    key: Optional[Dict[str, Any]],
+    role: str,
+    content: str,
+    request_id: str,
+    pointers: Optional[Dict[str, Any]] = None,
+    artifacts: Optional[List[Dict[str, Any]]] = None,
+    takeover: bool = False,
+) -> Tuple[int, List[Write]]:
+    """
+    Transactional append from the conversation and request-key docs read in
+    the transaction. Returns (seq, writes); no writes on an idempotent replay.
+
+    A key without a seq belongs to a fast-path append still in flight: raise
+    PendingAppend unless the caller found it stale (takeover). Taking over
+    rewrites the key, which fails the original append's commit 2; the seq that
+    append allocated stays unused.
+    """
+    if conv is None:
+        raise ValueError("Conversation does not exist")
+    if key is not None:
+        if key.get("seq") is not None:
+            return int(key["seq"]), []
+        if not takeover:
+            raise PendingAppend(request_id)
+
+    seq = int(conv.get("next_seq", 1))
+    message = new_message_doc(seq, role, content, request_id, pointers)
+    conv_update: Dict[str, Any] = {
+        "next_seq": seq + 1,
+        "last_message_seq": seq,
+        "updated_at": firestore.SERVER_TIMESTAMP,
+    }
+    if artifacts:
+        message["artifacts"] = artifacts
+        conv_update["latest_artifact_ids"] = merge_artifact_ids(conv.get("latest_artifact_ids"), artifacts)
+
+    return seq, [
+        ("set", refs.message(seq), message, {}),
+        ("set", refs.key(request_id), {"request_id": request_id, "seq": seq}, {"merge": True}),
+        ("set", refs.window, window_append(seq, message), {"merge": True}),
+        ("update", refs.conv, conv_update, {}),
+    ]
+
+
+def pin_writes(refs: ConversationRefs, pinned_snaps: Iterable[Any], window_exists: bool) -> Tuple[List[int], List[Write]]:
+    """
+    Replace the conversation's pins. pinned_snaps are the reads of the
+    requested seqs; pins whose message does not exist are dropped. The window
+    copy is written in the same commit so rehydrate never sees stale pins.
+    """
+    pins = window_pins(snap.to_dict() for snap in pinned_snaps if snap.exists)
+    writes: List[Write] = [
+        (
+            "update",
+            refs.conv,
+            {"pinned_message_seqs": pins["pinned_seqs"], "updated_at": firestore.SERVER_TIMESTAMP},
+            {},
+        )
+    ]
+    if window_exists:
+        # field-path update: the pinned map is replaced, not merged
+        writes.append(("update", refs.window, {**pins, "updated_at": firestore.SERVER_TIMESTAMP}, {}))
+    return pins["pinned_seqs"], writes
+
+
+def snapshot_dict(snap) -> Optional[Dict[str, Any]]:
+    return (snap.to_dict() or {}) if snap is not None and snap.exists else None
+
+
+def history_from_view(view: WindowView, spilled_snaps: Iterable[Any] = ()) -> List[Dict[str, str]]:
+    """Window fast path; spilled_snaps are the reads of view.spilled."""
+    for snap in spilled_snaps:
+        if snap.exists:
+            m = snap.to_dict()
+            view.messages[int(m["seq"])] = m
+    return build_history(view.messages, view.pinned, view.last_n, view.max_chars, view.mode, view.summary)
+
+
+def history_from_cache(entry: CachedWindow) -> List[Dict[str, str]]:
+    return build_history(entry.messages, entry.pinned, entry.last_n, entry.max_chars, entry.mode, entry.summary)
+
+
+def appended_message(refs: ConversationRefs, seq: int, writes: Iterable[Write]) -> Optional[Dict[str, Any]]:
+    """The message doc among an append's writes (None on an idempotent replay)."""
+    path = refs.message(seq).path
+    return next((data for _, ref, data, _ in writes if ref.path == path), None)
+
+
+class QueryRehydration:
+    """
+    Query path, for conversations without a usable window doc:
+
+        1) conversation doc  ||  last_n query (last_n guessed: GUESS_LAST_N)
+        2) the query again if the conversation's last_n is larger (requery)
+        3) one get_all for pinned messages outside the recent window (missing_pins)
+    """
+
+    GUESS_LAST_N = RehydrationConfig().last_n
+
+    def __init__(self, conv: Optional[Dict[str, Any]], recent: Iterable[Dict[str, Any]]):
+        conv = conv or {}
+        rh = conv.get("rehydration", {}) or {}
+        self.last_n = int(rh.get("last_n", 24))
+        self.max_chars = rh.get("max_chars", 60000)
+        self.mode = rh.get("mode", "last_n")
+        self.summary = conv.get("summary")
+        self.pinned = set(conv.get("pinned_message_seqs", []) or [])
+        self.requery = self.last_n > self.GUESS_LAST_N
+        self.messages: Dict[int, Dict[str, Any]] = {}
+        self.add(recent)
+
+    def add(self, messages: Iterable[Dict[str, Any]]) -> None:
+        for m in messages:
+            self.messages[int(m["seq"])] = m
+
+    def add_snaps(self, snaps: Iterable[Any]) -> None:
+        self.add(snap.to_dict() for snap in snaps if snap.exists)
+
+    def missing_pins(self) -> List[int]:
+        return [s for s in sorted(self.pinned) if s not in self.messages]
+
+    def history(self) -> List[Dict[str, str]]:
+        # merge + dedupe happened in add(); select + deterministic char cap here
+        return build_history(self.messages, self.pinned, self.last_n, self.max_chars, self.mode, self.summary)
+
+
+class ChatMemoryStore(ConversationPaths):
+    def __init__(self, tenant_id: str = "default", cache: Optional[RehydrationCache] = None):
+        self.tenant_id = tenant_id
+        self.db = get_db()
+        self.cache = cache if cache is not None else RehydrationCache.from_env()
+        self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="chat-memory")
+
+    def _get_all(self, refs) -> Dict[str, Any]:
+        # one batched round trip; snapshots keyed by document path
+        return {snap.reference.path: snap for snap in self.db.get_all(refs)}
+
+    def _commit(self, writes: Iterable[Write]):
+        batch = self.db.batch()
+        apply_writes(batch, writes)
+        return batch.commit()
 
     def get_or_create_conversation(
         self,
@@ -32,100 +463,149 @@ class ChatMemoryStore:
         rehydration: RehydrationConfig = RehydrationConfig(),
     ) -> str:
         if conversation_id is None:
-            # deterministic enough: Firestore auto id is fine; caller returns it to client
-            conversation_id = self._conv_ref(user_id, "_").collection("_tmp").document().id
+            conversation_id = self._new_conversation_id(user_id)
 
-        conv_ref = self._conv_ref(user_id, conversation_id)
-        snap = conv_ref.get()
+        snap = self.refs(user_id, conversation_id).conv.get()
         if snap.exists:
             return conversation_id
 
-        conv_ref.set(
-            {
-                "conversation_id": conversation_id,
-                "user_id": user_id,
-                "tenant_id": self.tenant_id,
-                "created_at": firestore.SERVER_TIMESTAMP,
-                "updated_at": firestore.SERVER_TIMESTAMP,
-                "status": "active",
-                "next_seq": 1,
-                "last_message_seq": 0,
-                "rehydration": {
-                    "mode": "last_n",
-                    "last_n": rehydration.last_n,
-                    "max_chars": rehydration.max_chars,
-                },
-                "pinned_message_seqs": [],
-                "latest_artifact_ids": [],
-            }
-        )
+        self._create_conversation(user_id, conversation_id, rehydration)
         return conversation_id
 
+    def open_conversation(
+        self,
+        user_id: str,
+        conversation_id: Optional[str],
+        rehydration: RehydrationConfig = RehydrationConfig(),
+    ) -> Tuple[str, List[Dict[str, str]]]:
+        """
+        get_or_create_conversation + rehydrate, fused:
+        - new conversation: one write, no reads (history is empty)
+        - existing conversation: the window read doubles as the existence check
+        """
+        if conversation_id is None:
+            conversation_id = self._new_conversation_id(user_id)
+            self._create_conversation(user_id, conversation_id, rehydration)
+            return conversation_id, []
+
+        cached = self._cached_history(user_id, conversation_id)
+        if cached is not None:
+            return conversation_id, cached
+
+        snap = self.refs(user_id, conversation_id).window.get()
+        if snap.exists:
+            return conversation_id, self._history_from_window(user_id, conversation_id, snap)
+
+        # no window: a brand-new id, or a conversation that predates window docs
+        if self._create_conversation(user_id, conversation_id, rehydration):
+            return conversation_id, []
+        return conversation_id, self._rehydrate_from_messages(user_id, conversation_id)
+
+    def _create_conversation(
+        self,
+        user_id: str,
+        conversation_id: str,
+        rehydration: RehydrationConfig,
+    ) -> bool:
+        """Create-only; False if the conversation already exists."""
+        refs = self.refs(user_id, conversation_id)
+        try:
+            self._commit(create_conversation_writes(refs, self.tenant_id, user_id, conversation_id, rehydration))
+        except AlreadyExists:
+            return False
+        return True
+
     def rehydrate(
         self,
         user_id: str,
         conversation_id: str,
     ) -> List[Dict[str, str]]:
-        conv_ref = self._conv_ref(user_id, conversation_id)
-        conv = conv_ref.get().to_dict() or {}
-        rh = conv.get("rehydration", {}) or {}
-        last_n = int(rh.get("last_n", 24))
-        max_chars = rh.get("max_chars", 60000)
-        pinned = set(conv.get("pinned_message_seqs", []) or [])
-
-        # 1) pull last_n
-        q = (
-            self._msgs_col(user_id, conversation_id)
-            .order_by("seq", direction=firestore.Query.DESCENDING)
-            .limit(last_n)
-        )
-        recent = list(q.stream())
-        recent_msgs = [d.to_dict() for d in reversed(recent)]  # seq asc
-
-        # 2) fetch pinned (by seq) if outside recent window
-        pinned_msgs: List[Dict[str, Any]] = []
-        if pinned:
-            # Firestore doesn't support IN on different field types well at scale; keep pinned small.
-            for seq in sorted(pinned):
-                doc_id = f"{seq:08d}"
-                snap = self._msgs_col(user_id, conversation_id).document(doc_id).get()
-                if snap.exists:
-                    pinned_msgs.append(snap.to_dict())
-
-        # 3) merge + dedupe
-        merged: Dict[int, Dict[str, Any]] = {}
-        for m in pinned_msgs + recent_msgs:
-            merged[int(m["seq"])] = m
-        ordered = [merged[k] for k in sorted(merged.keys())]
-
-        # 4) apply deterministic char cap
-        if max_chars is not None:
-            budget = int(max_chars)
-            kept: List[Dict[str, Any]] = []
-            # Always keep pinned first (in order), then add from the end
-            pinned_ordered = [m for m in ordered if int(m["seq"]) in pinned]
-            tail = [m for m in ordered if int(m["seq"]) not in pinned]
+        cached = self._cached_history(user_id, conversation_id)
+        if cached is not None:
+            return cached
+
+        # Fast path: one read of the materialized window doc
+        snap = self.refs(user_id, conversation_id).window.get()
+        return self._history_from_window(user_id, conversation_id, snap)
+
+    def _cache_key(self, user_id: str, conversation_id: str) -> Tuple[str, str, str]:
+        return (self.tenant_id, user_id, conversation_id)
 
-            def msg_len(m: Dict[str, Any]) -> int:
-                return len((m.get("content") or "")) + 32  # small deterministic overhead
+    def _cached_history(self, user_id: str, conversation_id: str) -> Optional[List[Dict[str, str]]]:
+        """History from the cache, checked with a masked read of the window doc; None on a miss."""
+        key = self._cache_key(user_id, conversation_id)
+        if self.cache.get(key) is None:
+            return None
+        snap = self.refs(user_id, conversation_id).window.get(field_paths=WINDOW_CHECK_FIELDS)
+        entry = self.cache.history_source(key, window_check(snapshot_dict(snap)))
+        return history_from_cache(entry) if entry is not None else None
 
-            for m in pinned_ordered:
-                l = msg_len(m)
-                if l <= budget:
-                    kept.append(m)
-                    budget -= l
+    def _history_from_window(self, user_id: str, conversation_id: str, snap) -> List[Dict[str, str]]:
+        doc = snapshot_dict(snap)
+        view = read_window(doc)
+        if view is None:
+            return self._rehydrate_from_messages(user_id, conversation_id)
 
-            # Add most recent tail messages until budget used
-            for m in reversed(tail):
-                l = msg_len(m)
-                if l <= budget:
-                    kept.append(m)
-                    budget -= l
+        refs = self.refs(user_id, conversation_id)
+        spilled = self._get_all([refs.message(s) for s in view.spilled]).values() if view.spilled else ()
+        history = history_from_view(view, spilled)
+        self.cache.put_view(self._cache_key(user_id, conversation_id), window_check(doc), view)
+        return history
 
-            ordered = sorted(kept, key=lambda x: int(x["seq"]))
+    def _rehydrate_from_messages(
+        self,
+        user_id: str,
+        conversation_id: str,
+    ) -> List[Dict[str, str]]:
+        refs = self.refs(user_id, conversation_id)
 
-        # return minimal structure for LLM input
-        return [{"role": m["role"], "content": m.get("content", "")} for m in ordered]
+        def recent_query(n: int) -> List[Dict[str, Any]]:
+            q = refs.messages.order_by("seq", direction=firestore.Query.DESCENDING).limit(n)
+            return [d.to_dict() for d in q.stream()]
+
+        conv_f = self._pool.submit(refs.conv.get)
+        recent_f = self._pool.submit(recent_query, QueryRehydration.GUESS_LAST_N)
+        plan = QueryRehydration(snapshot_dict(conv_f.result()), recent_f.result())
+        if plan.requery:
+            plan.add(recent_query(plan.last_n))
+        missing = plan.missing_pins()
+        if missing:
+            plan.add_snaps(self._get_all([refs.message(s) for s in missing]).values())
+        return plan.history()
+
+    def set_pinned_messages(self, user_id: str, conversation_id: str, seqs: Iterable[int]) -> List[int]:
+        """Replace the conversation's pinned messages; returns the pins that were kept."""
+        refs = self.refs(user_id, conversation_id)
+        wanted = sorted({int(s) for s in seqs})
+        snaps = self._get_all([refs.conv, refs.window] + [refs.message(s) for s in wanted])
+        if not snaps[refs.conv.path].exists:
+            raise ValueError("Conversation does not exist")
+        kept, writes = pin_writes(
+            refs, [snaps[refs.message(s).path] for s in wanted], snaps[refs.window.path].exists
+        )
+        self._commit(writes)
+        self.cache.invalidate(self._cache_key(user_id, conversation_id))
+        return kept
+
+    def rebuild_window(self, user_id: str, conversation_id: str) -> bool:
+        """(Re)materialize the context window doc from the messages collection."""
+        refs = self.refs(user_id, conversation_id)
+
+        conv_snap = refs.conv.get()
+        if not conv_snap.exists:
+            return False
+        conv = conv_snap.to_dict() or {}
+        pinned = sorted(int(s) for s in (conv.get("pinned_message_seqs") or []))
+
+        q = refs.messages.order_by("seq", direction=firestore.Query.DESCENDING).limit(WINDOW_RING)
+        recent = [d.to_dict() for d in q.stream()]
+        pinned_snaps = self._get_all([refs.message(s) for s in pinned]) if pinned else {}
+        pinned_msgs = [snap.to_dict() for snap in pinned_snaps.values() if snap.exists]
+
+        doc = build_window_doc(conv.get("rehydration") or {}, pinned, recent, pinned_msgs, conv.get("summary"))
+        refs.window.set(doc)
+        self.cache.invalidate(self._cache_key(user_id, conversation_id))
+        return True
 
     def append_message(
         self,
@@ -136,50 +616,112 @@ class ChatMemoryStore:
         request_id: str,
         pointers: Optional[Dict[str, Any]] = None,
     ) -> int:
-        pointers = pointers or {}
-        conv_ref = self._conv_ref(user_id, conversation_id)
-        msgs_col = self._msgs_col(user_id, conversation_id)
+        """
+        Fast path, no reads and no transaction:
+        1) create the request_id key doc (create-only) + Increment the seq counters in one commit;
+           a replay fails the precondition and returns the seq stored on the key doc.
+        2) write the message at the allocated seq, its window slot and the key's seq,
+           preconditioned on the key doc still being the one written in 1).
+        """
+        refs = self.refs(user_id, conversation_id)
+        try:
+            results = self._commit(alloc_writes(refs, request_id))
+        except AlreadyExists:
+            return self._resolve_pending(user_id, conversation_id, role, content, request_id, pointers)
+        except NotFound:
+            raise ValueError("Conversation does not exist")
+
+        seq = allocated_seq(results[1])
+        message = new_message_doc(seq, role, content, request_id, pointers)
+        try:
+            self._commit(message_writes(refs, seq, message, self.db.write_option(last_update_time=results[0].update_time)))
+        except FailedPrecondition:
+            # a replay took this request over (see plan_txn_append); its seq is the request's seq
+            return int(refs.key(request_id).get().get("seq"))
+        self.cache.on_append(self._cache_key(user_id, conversation_id), message)
+        return seq
 
-        # Idempotency: if request_id already stored, return existing seq
-        existing = list(msgs_col.where("request_id", "==", request_id).limit(1).stream())
-        if existing:
-            return int(existing[0].to_dict()["seq"])
+    def _resolve_pending(
+        self,
+        user_id: str,
+        conversation_id: str,
+        role: str,
+        content: str,
+        request_id: str,
+        pointers: Optional[Dict[str, Any]] = None,
+        artifacts: Optional[List[Dict[str, Any]]] = None,
+    ) -> int:
+        """Replay of a claimed request: its seq, a takeover of a stale claim, or PendingAppend."""
+        seq = pending_key_seq(snapshot_dict(self.refs(user_id, conversation_id).key(request_id).get()), request_id)
+        if seq is not None:
+            return seq
+        return self._append_message_txn(
+            user_id, conversation_id, role, content, request_id, pointers, artifacts, takeover=True
+        )
+
+    def _append_message_txn(
+        self,
+        user_id: str,
+        conversation_id: str,
+        role: str,
+        content: str,
+        request_id: str,
+        pointers: Optional[Dict[str, Any]] = None,
+        artifacts: Optional[List[Dict[str, Any]]] = None,
+        takeover: bool = False,
+    ) -> int:
+        refs = self.refs(user_id, conversation_id)
 
         @firestore.transactional
-        def _txn(txn: firestore.Transaction) -> int:
-            conv_snap = conv_ref.get(transaction=txn)
-            if not conv_snap.exists:
-                raise ValueError("Conversation does not exist")
-
-            conv = conv_snap.to_dict()
-            next_seq = int(conv.get("next_seq", 1))
-            doc_id = f"{next_seq:08d}"
-            msg_ref = msgs_col.document(doc_id)
-
-            txn.set(
-                msg_ref,
-                {
-                    "seq": next_seq,
-                    "role": role,
-                    "content": content,
-                    "content_type": "text/plain",
-                    "created_at": firestore.SERVER_TIMESTAMP,
-                    "request_id": request_id,
-                    **pointers,
-                },
-            )
-            txn.update(
-                conv_ref,
-                {
-                    "next_seq": next_seq + 1,
-                    "last_message_seq": next_seq,
-                    "updated_at": firestore.SERVER_TIMESTAMP,
-                },
+        def _txn(txn: firestore.Transaction) -> Tuple[int, List[Write]]:
+            snaps = {snap.reference.path: snap for snap in self.db.get_all([refs.conv, refs.key(request_id)], transaction=txn)}
+            seq, writes = plan_txn_append(
+                refs,
+                snapshot_dict(snaps.get(refs.conv.path)),
+                snapshot_dict(snaps.get(refs.key(request_id).path)),
+                role,
+                content,
+                request_id,
+                pointers,
+                artifacts,
+                takeover,
             )
-            return next_seq
+            apply_writes(txn, writes)
+            return seq, writes
 
-        txn = self.db.transaction()
-        return _txn(txn)
+        try:
+            seq, writes = _txn(self.db.transaction())
+        except PendingAppend:
+            return self._resolve_pending(user_id, conversation_id, role, content, request_id, pointers, artifacts)
+        message = appended_message(refs, seq, writes)
+        if message is not None:
+            self.cache.on_append(self._cache_key(user_id, conversation_id), message)
+        return seq
+
+    def commit_turn(
+        self,
+        user_id: str,
+        conversation_id: str,
+        content: str,
+        request_id: str,
+        pointers: Optional[Dict[str, Any]] = None,
+        artifacts: Optional[List[Dict[str, Any]]] = None,
+    ) -> int:
+        """
+        Persist the assistant message of a turn together with its artifact pointers.
+
+        With artifacts, one transaction writes the message (artifacts included),
+        its request key, the window slot, last_message_seq and the bounded
+        latest_artifact_ids; concurrent turns can't drop each other's ids.
+        Without artifacts this is the blind append_message path.
+        """
+        if not artifacts:
+            return self.append_message(
+                user_id, conversation_id, "assistant", content, request_id, pointers
+            )
+        return self._append_message_txn(
+            user_id, conversation_id, "assistant", content, request_id, pointers, artifacts
+        )
 
     def attach_artifacts(
         self,
@@ -188,17 +730,12 @@ class ChatMemoryStore:
         message_seq: int,
         artifacts: List[Dict[str, Any]],
     ) -> None:
+        refs = self.refs(user_id, conversation_id)
         # Update message doc with artifact pointers (merge)
-        msg_ref = self._msgs_col(user_id, conversation_id).document(f"{message_seq:08d}")
-        msg_ref.set({"artifacts": artifacts}, merge=True)
+        refs.message(message_seq).set({"artifacts": artifacts}, merge=True)
+        self.cache.on_artifacts(self._cache_key(user_id, conversation_id), message_seq, artifacts)
 
         # Update conversation convenience list (bounded to last ~20)
-        conv_ref = self._conv_ref(user_id, conversation_id)
-        conv = conv_ref.get().to_dict() or {}
-        latest = list(conv.get("latest_artifact_ids", []) or [])
-        for a in artifacts:
-            aid = a.get("artifact_id")
-            if aid and aid not in latest:
-                latest.append(aid)
-        latest = latest[-20:]
-        conv_ref.set({"latest_artifact_ids": latest, "updated_at": firestore.SERVER_TIMESTAMP}, merge=True)
+        conv = refs.conv.get().to_dict() or {}
+        latest = merge_artifact_ids(conv.get("latest_artifact_ids"), artifacts)
+        refs.conv.set({"latest_artifact_ids": latest, "updated_at": firestore.SERVER_TIMESTAMP}, merge=True)
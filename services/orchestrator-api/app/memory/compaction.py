@@ -0,0 +1,203 @@
+# app/memory/compaction.py
+"""
+Rolling compaction of long conversations into summary segments.
+
+Messages older than the raw last_n window are folded, segment_size at a time
+(the newest segment may be partial), into summaries stored with their seq ranges:
+
+    conversations/{id}/summaries/{start:08d}-{end:08d}   (durable record)
+    conversation.summary / window.summary                (bounded copy read by rehydrate)
+
+The bounded copy never holds more than max_segments entries; when it would,
+the two oldest segments are folded into one. With rehydration.mode set to
+"summary+last_n", rehydrate prepends these summaries to the raw window, so
+both the LLM input and the rehydrate read stay constant-size as a
+conversation grows.
+
+Runs off the request path:
+
+    python -m app.memory.compaction --tenant default [--user U --conversation C] [--set-mode]
+"""
+from __future__ import annotations
+import argparse
+import logging
+from typing import Any, Dict, List, Protocol
+
+from google.cloud import firestore
+
+from .chat_memory import ChatMemoryStore
+from .context_window import window_summary
+
+SUMMARY_MODE = "summary+last_n"
+
+
+class Summarizer(Protocol):
+    name: str
+
+    def summarize(self, messages: List[Dict[str, Any]]) -> str:
+        ...
+
+
+class ExtractiveSummarizer:
+    """
+    Deterministic local summarizer: the head of each message, bounded overall.
+    Used in tests and until an LLM summarizer is wired into the pipeline.
+    """
+
+    name = "extractive.v1"
+
+    def __init__(self, per_message_chars: int = 160, max_chars: int = 2000):
+        self.per_message_chars = per_message_chars
+        self.max_chars = max_chars
+
+    def summarize(self, messages: List[Dict[str, Any]]) -> str:
+        lines = []
+        for m in messages:
+            text = " ".join((m.get("content") or "").split())
+            if len(text) > self.per_message_chars:
+                text = text[: self.per_message_chars].rstrip() + "…"
+            lines.append(f"{m.get('role', 'user')}: {text}")
+        out = "\n".join(lines)
+        return out if len(out) <= self.max_chars else out[: self.max_chars].rstrip() + "…"
+
+
+def _fold(summarizer: Summarizer, a: Dict[str, Any], b: Dict[str, Any]) -> Dict[str, Any]:
+    text = summarizer.summarize(
+        [{"role": "system", "content": a["text"]}, {"role": "system", "content": b["text"]}]
+    )
+    return {"start_seq": a["start_seq"], "end_seq": b["end_seq"], "text": text}
+
+
+def compact_conversation(
+    store: ChatMemoryStore,
+    user_id: str,
+    conversation_id: str,
+    summarizer: Summarizer,
+    segment_size: int = 24,
+    max_segments: int = 8,
+    set_mode: bool = False,
+) -> int:
+    """
+    Summarize everything older than the raw last_n window, segment_size at a time.
+    The newest segment may be partial; the next run re-summarizes it together
+    with the messages that followed. Returns the number of segments written.
+    Safe to re-run; not meant to run concurrently for the same conversation.
+    """
+    refs = store.refs(user_id, conversation_id)
+
+    conv_snap = refs.conv.get()
+    if not conv_snap.exists:
+        return 0
+    conv = conv_snap.to_dict() or {}
+    rh = conv.get("rehydration") or {}
+    last_n = int(rh.get("last_n", 24))
+    summary = conv.get("summary") or {"through_seq": 0, "segments": []}
+    through = int(summary.get("through_seq", 0) or 0)
+    segments: List[Dict[str, Any]] = list(summary.get("segments") or [])
+
+    # The raw window is the last last_n existing messages. Compact up to the one
+    # just before it: anything between through_seq and the window would be in neither.
+    if last_n > 0:
+        q = refs.messages.order_by("seq", direction=firestore.Query.DESCENDING).limit(last_n)
+        raw = [int(d.to_dict()["seq"]) for d in q.stream()]
+        horizon = min(raw) - 1 if len(raw) >= last_n else 0
+    else:
+        horizon = int(conv.get("last_message_seq", 0) or 0)
+
+    written = 0
+    while through < horizon:
+        start = through + 1
+        superseded = None
+        if segments and segments[-1]["end_seq"] - segments[-1]["start_seq"] + 1 < segment_size:
+            superseded = segments.pop()
+            start = superseded["start_seq"]
+        end = min(start + segment_size - 1, horizon)
+        q = (
+            refs.messages.where("seq", ">=", start)
+            .where("seq", "<=", end)
+            .order_by("seq")
+        )
+        msgs = [d.to_dict() for d in q.stream()]
+        seg = {"start_seq": start, "end_seq": end, "text": summarizer.summarize(msgs)}
+
+        batch = store.db.batch()
+        batch.set(
+            refs.summary(start, end),
+            {
+                **seg,
+                "message_count": len(msgs),
+                "summarizer": summarizer.name,
+                "created_at": firestore.SERVER_TIMESTAMP,
+            },
+        )
+        if superseded is not None:
+            batch.delete(refs.summary(superseded["start_seq"], superseded["end_seq"]))
+        batch.commit()
+
+        segments.append(seg)
+        while len(segments) > max_segments:
+            segments[:2] = [_fold(summarizer, segments[0], segments[1])]
+        through = end
+        written += 1
+
+    if not written and not (set_mode and rh.get("mode") != SUMMARY_MODE):
+        return 0
+
+    summary = {"through_seq": through, "segments": segments, "summarizer": summarizer.name}
+    update: Dict[str, Any] = {"summary": summary}
+    if set_mode:
+        update["rehydration.mode"] = SUMMARY_MODE
+
+    # field-level updates: no contention with concurrent message appends.
+    # A conversation without a window doc picks the summary up on rebuild_window.
+    batch = store.db.batch()
+    batch.update(refs.conv, update)
+    if refs.window.get().exists:
+        batch.update(refs.window, {**update, "summary": window_summary(summary)})
+    batch.commit()
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenant", default="default")
+    parser.add_argument("--user", default=None)
+    parser.add_argument("--conversation", default=None)
+    parser.add_argument("--segment-size", type=int, default=24)
+    parser.add_argument("--max-segments", type=int, default=8)
+    parser.add_argument("--set-mode", action="store_true", help=f"switch conversations to {SUMMARY_MODE}")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    store = ChatMemoryStore(tenant_id=args.tenant)
+    summarizer = ExtractiveSummarizer()
+
+    def run(user_id: str, conversation_id: str) -> int:
+        return compact_conversation(
+            store,
+            user_id,
+            conversation_id,
+            summarizer,
+            segment_size=args.segment_size,
+            max_segments=args.max_segments,
+            set_mode=args.set_mode,
+        )
+
+    if args.conversation:
+        if not args.user:
+            parser.error("--conversation requires --user")
+        logging.info("compacted %s/%s: %d segments", args.user, args.conversation, run(args.user, args.conversation))
+        return
+
+    users_col = store.db.collection("tenants").document(args.tenant).collection("users")
+    user_ids = [args.user] if args.user else [u.id for u in users_col.list_documents()]
+
+    total = 0
+    for user_id in user_ids:
+        for conv_ref in users_col.document(user_id).collection("conversations").list_documents():
+            total += run(user_id, conv_ref.id)
+    logging.info("wrote %d summary segments for tenant %s", total, args.tenant)
+
+
+if __name__ == "__main__":
+    main()
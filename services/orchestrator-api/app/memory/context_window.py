@@ -0,0 +1,215 @@
+# app/memory/context_window.py
+"""
+Materialized context window: conversations/{id}/window/current.
+
+A fixed-size ring of the latest messages (slot = seq % ring), maintained by
+append_message in the same commit as the message itself, plus the pinned
+messages and the rehydration config. rehydrate reads this one document
+instead of the conversation doc, the last_n query and the pinned reads.
+
+Every slot has the same keys so merge writes fully replace it. Messages too
+large to inline are "spilled": the slot keeps only seq/role/chars and the
+reader fetches the message doc if it can still fit the char budget. The
+summary copy spills the same way (rehydrate then takes the query path).
+Every part is bounded, so the doc stays under Firestore's 1 MiB limit:
+
+    ring     WINDOW_RING * SLOT_MAX_BYTES   512 KiB
+    pinned   PINNED_MAX_BYTES                96 KiB
+    summary  SUMMARY_MAX_BYTES               64 KiB
+
+Slots whose message is missing (an append in flight, or a seq left unused by
+a taken-over append) are skipped, as the query would skip them. Pins are
+written by set_pinned_messages / rebuild_window together with the
+conversation's pinned_message_seqs. An unknown pin, a spilled summary, or a
+ring too short for last_n makes read_window return None and the caller falls
+back to the query path.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+from google.cloud import firestore
+
+WINDOW_RING = 32
+SLOT_MAX_BYTES = 16 * 1024
+PINNED_MAX_BYTES = 96 * 1024
+SUMMARY_MAX_BYTES = 64 * 1024
+
+
+def make_slot(m: Dict[str, Any], inline: bool = True) -> Dict[str, Any]:
+    content = m.get("content") or ""
+    spilled = not inline or len(content.encode("utf-8")) > SLOT_MAX_BYTES
+    return {
+        "seq": int(m["seq"]),
+        "role": m["role"],
+        "content": "" if spilled else content,
+        "chars": len(content),
+        "spilled": spilled,
+    }
+
+
+def window_append(seq: int, message: Dict[str, Any]) -> Dict[str, Any]:
+    """Payload for window_ref.set(..., merge=True) alongside the message write."""
+    return {
+        "head_seq": firestore.Maximum(seq),
+        "slots": {str(seq % WINDOW_RING): make_slot(message)},
+        "updated_at": firestore.SERVER_TIMESTAMP,
+    }
+
+
+def window_pins(pinned_msgs: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """pinned_seqs + pinned slots for the existing pinned messages, inlined up to PINNED_MAX_BYTES."""
+    pins: Dict[str, Any] = {"pinned_seqs": [], "pinned": {}}
+    budget = PINNED_MAX_BYTES
+    for m in sorted(pinned_msgs, key=lambda x: int(x["seq"])):
+        size = len((m.get("content") or "").encode("utf-8"))
+        slot = make_slot(m, inline=size <= budget)
+        if not slot["spilled"]:
+            budget -= size
+        pins["pinned_seqs"].append(slot["seq"])
+        pins["pinned"][str(slot["seq"])] = slot
+    return pins
+
+
+def window_summary(summary: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """The window's copy of the conversation summary; spilled past SUMMARY_MAX_BYTES."""
+    summary = summary or {"through_seq": 0, "segments": []}
+    size = sum(len((seg.get("text") or "").encode("utf-8")) for seg in summary.get("segments") or [])
+    if size <= SUMMARY_MAX_BYTES:
+        return summary
+    return {"through_seq": summary.get("through_seq", 0), "segments": [], "spilled": True}
+
+
+def new_window_doc(
+    rehydration: Dict[str, Any],
+    summary: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    return {
+        "v": 1,
+        "ring": WINDOW_RING,
+        "rehydration": dict(rehydration),
+        "pinned_seqs": [],
+        "pinned": {},
+        "slots": {},
+        "head_seq": 0,
+        "summary": window_summary(summary),
+        "updated_at": firestore.SERVER_TIMESTAMP,
+    }
+
+
+def build_window_doc(
+    rehydration: Dict[str, Any],
+    pinned_seqs: Iterable[int],
+    recent: List[Dict[str, Any]],
+    pinned_msgs: List[Dict[str, Any]],
+    summary: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Full window doc from existing messages (rebuild tool).
+
+    pinned_msgs must hold every existing pinned message; pins whose message
+    does not exist are dropped, as rehydrate has always done.
+    """
+    wanted = {int(s) for s in pinned_seqs}
+    doc = new_window_doc(rehydration, summary)
+    doc.update(window_pins(m for m in pinned_msgs if int(m["seq"]) in wanted))
+    for m in sorted(recent, key=lambda x: int(x["seq"]))[-WINDOW_RING:]:
+        doc["slots"][str(int(m["seq"]) % WINDOW_RING)] = make_slot(m)
+        doc["head_seq"] = max(doc["head_seq"], int(m["seq"]))
+    return doc
+
+
+@dataclass
+class WindowView:
+    last_n: int
+    max_chars: Optional[int]
+    mode: str
+    summary: Optional[Dict[str, Any]]
+    pinned: set
+    messages: Dict[int, Dict[str, Any]]
+    spilled: List[int]  # seqs that must be read from the messages collection
+    complete: bool = True  # False if a recent slot was a hole (an append still in flight)
+
+
+# What a cached copy of the window is checked against: a masked read of these
+# fields changes whenever a write could change the rehydrated history.
+WINDOW_CHECK_FIELDS = ["head_seq", "pinned_seqs", "rehydration", "summary.through_seq"]
+
+
+def window_check(doc: Optional[Dict[str, Any]]) -> Optional[tuple]:
+    """Comparable value of WINDOW_CHECK_FIELDS; doc may be the full or the masked read."""
+    if not doc:
+        return None
+    return (
+        int(doc.get("head_seq", 0) or 0),
+        tuple(int(s) for s in (doc.get("pinned_seqs") or [])),
+        tuple(sorted((doc.get("rehydration") or {}).items())),
+        int((doc.get("summary") or {}).get("through_seq", 0) or 0),
+    )
+
+
+def read_window(doc: Optional[Dict[str, Any]]) -> Optional[WindowView]:
+    if not doc or "rehydration" not in doc:
+        return None
+
+    ring = int(doc.get("ring", WINDOW_RING))
+    rh = doc.get("rehydration") or {}
+    last_n = int(rh.get("last_n", 24))
+    max_chars = rh.get("max_chars", 60000)
+    if last_n > ring:
+        return None
+
+    summary = doc.get("summary") or {}
+    if summary.get("spilled") and rh.get("mode") == "summary+last_n":
+        return None
+
+    def fits(slot: Dict[str, Any]) -> bool:
+        return max_chars is None or int(slot.get("chars", 0)) + 32 <= int(max_chars)
+
+    slots = doc.get("slots") or {}
+    pinned_slots = doc.get("pinned") or {}
+    pinned = set(int(s) for s in (doc.get("pinned_seqs") or []))
+    head = int(doc.get("head_seq", 0) or 0)
+
+    messages: Dict[int, Dict[str, Any]] = {}
+    spilled: List[int] = []
+
+    def take(slot: Dict[str, Any]) -> None:
+        seq = int(slot["seq"])
+        if slot.get("spilled"):
+            if fits(slot):
+                spilled.append(seq)
+            # an oversize message can never be selected; leave it out
+            return
+        messages[seq] = {"seq": seq, "role": slot["role"], "content": slot.get("content", "")}
+
+    # newest first; a slot still holding an older seq (or nothing) is a hole
+    low, found, holes = head + 1, 0, 0
+    while found < last_n and low > max(1, head - ring + 1):
+        low -= 1
+        slot = slots.get(str(low % ring))
+        if slot and int(slot.get("seq", -1)) == low:
+            take(slot)
+            found += 1
+        else:
+            holes += 1
+    if found < last_n and low > 1:
+        return None  # older messages fell out of the ring (or the ring predates them)
+
+    for seq in sorted(pinned):
+        if seq in messages or seq in spilled or seq >= low:
+            continue
+        slot = pinned_slots.get(str(seq))
+        if not slot:
+            return None
+        take(slot)
+
+    return WindowView(
+        last_n=last_n,
+        max_chars=max_chars,
+        mode=rh.get("mode", "last_n"),
+        summary=doc.get("summary"),
+        pinned=pinned,
+        messages=messages,
+        spilled=spilled,
+        complete=holes == 0,
+    )
@@ -14,3 +14,12 @@ def get_db():
         )
         _db = firestore.Client(project=project)
     return _db
+
+_async_db = None
+
+def get_async_db():
+    global _async_db
+    if _async_db is None:
+        _, project = default()
+        _async_db = firestore.AsyncClient(project=project)
+    return _async_db
@@ -0,0 +1,46 @@
+# app/memory/rebuild_windows.py
+"""
+Materialize context window docs for existing conversations.
+
+    python -m app.memory.rebuild_windows --tenant default [--user USER_ID] [--conversation CONV_ID]
+
+Conversations created before the window doc existed (or whose window went
+stale) are served by the query fallback until this has run for them.
+"""
+from __future__ import annotations
+import argparse
+import logging
+
+from .chat_memory import ChatMemoryStore
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tenant", default="default")
+    parser.add_argument("--user", default=None)
+    parser.add_argument("--conversation", default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    store = ChatMemoryStore(tenant_id=args.tenant)
+
+    if args.conversation:
+        if not args.user:
+            parser.error("--conversation requires --user")
+        ok = store.rebuild_window(args.user, args.conversation)
+        logging.info("rebuilt %s/%s: %s", args.user, args.conversation, ok)
+        return
+
+    users_col = store.db.collection("tenants").document(args.tenant).collection("users")
+    user_ids = [args.user] if args.user else [u.id for u in users_col.list_documents()]
+
+    rebuilt = 0
+    for user_id in user_ids:
+        for conv_ref in users_col.document(user_id).collection("conversations").list_documents():
+            if store.rebuild_window(user_id, conv_ref.id):
+                rebuilt += 1
+    logging.info("rebuilt %d conversation windows for tenant %s", rebuilt, args.tenant)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+# app/memory/rehydration_cache.py
+"""
+Per-process LRU of rehydrated context windows, in front of the window doc.
+
+A hit costs one masked read of the window doc (WINDOW_CHECK_FIELDS: head_seq,
+pins, rehydration config, summary horizon) instead of the whole doc and the
+spilled message reads; the entry is served only if those fields still match.
+Appends and attach_artifacts from this process update the entry in place, so
+the next turn of the same conversation is a hit. Firestore stays the source
+of truth: a write from another process moves one of the checked fields and
+the entry is re-read.
+"""
+from __future__ import annotations
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from .context_window import WindowView
+
+CacheKey = Tuple[str, str, str]  # (tenant_id, user_id, conversation_id)
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+# Only what build_history needs (plus artifact pointers) is kept in memory.
+_CACHED_FIELDS = ("seq", "role", "content", "artifacts")
+_MSG_OVERHEAD_BYTES = 160  # rough per-message dict/str overhead
+
+
+def compact_message(m: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: m[k] for k in _CACHED_FIELDS if k in m}
+
+
+def _msg_size(m: Dict[str, Any]) -> int:
+    return len((m.get("content") or "").encode("utf-8")) + _MSG_OVERHEAD_BYTES
+
+
+@dataclass
+class CachedWindow:
+    check: tuple  # window_check() of the doc this entry matches
+    last_n: int
+    max_chars: Optional[int]
+    mode: str
+    summary: Optional[Dict[str, Any]]
+    pinned: set
+    messages: Dict[int, Dict[str, Any]] = field(default_factory=dict)  # seq -> compact msg
+    size_bytes: int = 0
+
+    @classmethod
+    def from_view(cls, check: tuple, view: WindowView) -> "CachedWindow":
+        entry = cls(check, view.last_n, view.max_chars, view.mode, view.summary, set(view.pinned))
+        for m in view.messages.values():
+            entry.put(m)
+        summary_text = sum(len(seg.get("text") or "") for seg in (view.summary or {}).get("segments") or [])
+        entry.size_bytes += summary_text
+        return entry
+
+    @property
+    def head_seq(self) -> int:
+        return self.check[0]
+
+    def put(self, m: Dict[str, Any]) -> None:
+        seq = int(m["seq"])
+        old = self.messages.get(seq)
+        if old is not None:
+            self.size_bytes -= _msg_size(old)
+        cm = compact_message(m)
+        self.messages[seq] = cm
+        self.size_bytes += _msg_size(cm)
+
+    def fits(self, m: Dict[str, Any]) -> bool:
+        # read_window leaves out messages that can never fit the char budget
+        return self.max_chars is None or len(m.get("content") or "") + 32 <= int(self.max_chars)
+
+    def trim(self) -> None:
+        # keep the last_n most recent seqs plus pinned ones
+        keep = set(sorted(self.messages)[-self.last_n:]) if self.last_n > 0 else set()
+        keep.update(s for s in self.pinned if s in self.messages)
+        for seq in [s for s in self.messages if s not in keep]:
+            self.size_bytes -= _msg_size(self.messages.pop(seq))
+
+
+class RehydrationCache:
+    """
+    LRU of CachedWindow keyed by conversation, bounded by approximate bytes
+    (message content plus a fixed per-message overhead). Thread-safe.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[CacheKey, CachedWindow]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "RehydrationCache":
+        # CHAT_MEMORY_CACHE_BYTES=0 disables the cache
+        return cls(max_bytes=int(os.environ.get("CHAT_MEMORY_CACHE_BYTES", DEFAULT_MAX_BYTES)))
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: CacheKey) -> Optional[CachedWindow]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: CacheKey, entry: CachedWindow) -> None:
+        with self._lock:
+            self._drop(key)
+            if entry.size_bytes > self.max_bytes:
+                return
+            self._entries[key] = entry
+            self._bytes += entry.size_bytes
+            self._evict()
+
+    def put_view(self, key: CacheKey, check: Optional[tuple], view: WindowView) -> None:
+        """
+        Cache a window as read (after history_from_view filled in the spilled
+        messages). A window with holes is not cached: the message in flight
+        would land without moving head_seq.
+        """
+        if check is None or not view.complete or any(s not in view.messages for s in view.spilled):
+            self.invalidate(key)
+            return
+        self.put(key, CachedWindow.from_view(check, view))
+
+    def invalidate(self, key: CacheKey) -> None:
+        with self._lock:
+            self._drop(key)
+
+    def history_source(self, key: CacheKey, check: Optional[tuple]) -> Optional[CachedWindow]:
+        """The entry if it still matches the window's checked fields, else drop it."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.check != check:
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def on_append(self, key: CacheKey, message: Dict[str, Any]) -> None:
+        """
+        Apply a message this process just wrote to the window. Only the next
+        seq advances the entry; anything else means another writer got in
+        between and the entry is dropped.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            seq = int(message["seq"])
+            if seq != entry.head_seq + 1:
+                self._drop(key)
+                return
+            before = entry.size_bytes
+            if entry.fits(message):
+                entry.put(message)
+            entry.check = (seq,) + entry.check[1:]
+            entry.trim()
+            self._bytes += entry.size_bytes - before
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def on_artifacts(self, key: CacheKey, message_seq: int, artifacts: List[Dict[str, Any]]) -> None:
+        # the window doc does not carry artifacts, so the entry stays valid
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            m = entry.messages.get(int(message_seq))
+            if m is not None:
+                m["artifacts"] = artifacts
+
+    def _drop(self, key: CacheKey) -> None:
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old.size_bytes
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes and self._entries:
+            _, old = self._entries.popitem(last=False)
+            self._bytes -= old.size_bytes
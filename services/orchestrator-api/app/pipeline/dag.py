@@ -0,0 +1,132 @@
+# app/pipeline/dag.py
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+STATUS_OK = "ok"
+STATUS_TIMEOUT = "timeout"
+STATUS_ERROR = "error"
+STATUS_SKIPPED = "skipped"
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    One pipeline node.
+
+    fn receives {dep_name: output} for the dependencies that completed OK.
+    With requires_all=False the stage still runs when some dependency timed
+    out or failed (partial inputs); otherwise it is skipped.
+    """
+
+    name: str
+    fn: Callable[[Dict[str, Any]], Awaitable[Any]]
+    deps: Tuple[str, ...] = ()
+    timeout_s: float = 30.0
+    requires_all: bool = True
+
+
+@dataclass
+class StageOutcome:
+    status: str
+    wall_ms: int = 0
+    output: Any = None
+    error: Optional[str] = None
+
+
+def _check_graph(stages: Sequence[Stage]) -> None:
+    names = [s.name for s in stages]
+    if len(set(names)) != len(names):
+        raise ValueError("duplicate stage names")
+    known = set(names)
+    for s in stages:
+        missing = [d for d in s.deps if d not in known]
+        if missing:
+            raise ValueError(f"stage {s.name} depends on unknown stages {missing}")
+
+    # Kahn's algorithm: any leftover node is on a cycle
+    indeg = {s.name: len(s.deps) for s in stages}
+    children: Dict[str, List[str]] = {n: [] for n in names}
+    for s in stages:
+        for d in s.deps:
+            children[d].append(s.name)
+    ready = [n for n, k in indeg.items() if k == 0]
+    seen = 0
+    while ready:
+        n = ready.pop()
+        seen += 1
+        for c in children[n]:
+            indeg[c] -= 1
+            if indeg[c] == 0:
+                ready.append(c)
+    if seen != len(names):
+        raise ValueError("stage graph has a cycle")
+
+
+async def run_dag(
+    stages: Sequence[Stage],
+    *,
+    max_concurrency: int = 4,
+    on_event: Optional[Callable[[str, dict], Awaitable[None]]] = None,
+) -> Dict[str, StageOutcome]:
+    """
+    Run stages as soon as their dependencies settle, at most max_concurrency at
+    a time, each bounded by its own timeout. Never raises for a stage failure:
+    every stage ends with an outcome (ok / timeout / error / skipped), so the
+    caller can assemble a partial result.
+    """
+    _check_graph(stages)
+
+    sem = asyncio.Semaphore(max_concurrency)
+    settled = {s.name: asyncio.Event() for s in stages}
+    outcomes: Dict[str, StageOutcome] = {}
+
+    async def emit(data: dict) -> None:
+        if on_event is not None:
+            await on_event("stage", data)
+
+    async def run_one(stage: Stage) -> None:
+        try:
+            for d in stage.deps:
+                await settled[d].wait()
+
+            inputs = {d: outcomes[d].output for d in stage.deps if outcomes[d].status == STATUS_OK}
+            if stage.requires_all and len(inputs) != len(stage.deps):
+                outcomes[stage.name] = StageOutcome(status=STATUS_SKIPPED)
+                await emit({"stage": stage.name, "status": STATUS_SKIPPED})
+                return
+
+            async with sem:
+                await emit({"stage": stage.name, "status": "started"})
+                t0 = time.monotonic()
+                try:
+                    out = await asyncio.wait_for(stage.fn(inputs), timeout=stage.timeout_s)
+                    outcome = StageOutcome(status=STATUS_OK, output=out)
+                except asyncio.TimeoutError:
+                    outcome = StageOutcome(status=STATUS_TIMEOUT, error=f"exceeded {stage.timeout_s}s")
+                except Exception as e:
+                    outcome = StageOutcome(status=STATUS_ERROR, error=f"{type(e).__name__}: {e}")
+                outcome.wall_ms = int((time.monotonic() - t0) * 1000)
+                outcomes[stage.name] = outcome
+
+            await emit({"stage": stage.name, "status": outcome.status, "wall_ms": outcome.wall_ms})
+        finally:
+            outcomes.setdefault(stage.name, StageOutcome(status=STATUS_ERROR, error="cancelled"))
+            settled[stage.name].set()
+
+    await asyncio.gather(*(run_one(s) for s in stages))
+    return outcomes
+
+
+def timings(outcomes: Dict[str, StageOutcome], names: Sequence[str]) -> Dict[str, Any]:
+    """Per-stage wall time + status, for the llm / evidence_pack result fields."""
+    out: Dict[str, Any] = {}
+    for n in names:
+        o = outcomes.get(n)
+        if o is None:
+            continue
+        out[n] = {"status": o.status, "wall_ms": o.wall_ms}
+        if o.error:
+            out[n]["error"] = o.error
+    return out
@@ -1,10 +1,50 @@
 # app/pipeline/pubsub_client.py
+import asyncio
+import concurrent.futures
 import json
 import os
+import threading
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
 from google.cloud import pubsub_v1
 
 from .contracts import FetchRequestV1
 
+_publisher: Optional[pubsub_v1.PublisherClient] = None
+_publisher_lock = threading.Lock()
+
+
+def get_publisher_client() -> pubsub_v1.PublisherClient:
+    """
+    One PublisherClient per process (one gRPC channel, one auth session).
+    Batching is tuned for fan-out: a burst of fetch requests goes out in a
+    few RPCs instead of one per message.
+    """
+    global _publisher
+    if _publisher is None:
+        with _publisher_lock:
+            if _publisher is None:
+                _publisher = pubsub_v1.PublisherClient(
+                    batch_settings=pubsub_v1.types.BatchSettings(
+                        max_messages=int(os.environ.get("PUBSUB_BATCH_MAX_MESSAGES", "100")),
+                        max_bytes=int(os.environ.get("PUBSUB_BATCH_MAX_BYTES", str(1024 * 1024))),
+                        max_latency=float(os.environ.get("PUBSUB_BATCH_MAX_LATENCY_S", "0.01")),
+                    )
+                )
+    return _publisher
+
+
+@dataclass
+class PublishOutcome:
+    request_id: str
+    message_id: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.message_id is not None
+
 
 class FetchPublisher:
     """
@@ -12,6 +52,8 @@ class FetchPublisher:
     - Publishes fetch requests to Pub/Sub
     - Synchronous publish (fire-and-forget)
     - No retries, no async orchestration here
+    - publish_many / publish_many_async: fan-out through the shared batching
+      client, waiting on all futures together; failures are per message
     """
 
     def __init__(self):
@@ -19,17 +61,53 @@ class FetchPublisher:
         topic_name = os.environ["FETCH_REQUESTS_TOPIC"]
 
         self._topic_path = f"projects/{project_id}/topics/{topic_name}"
-        self._publisher = pubsub_v1.PublisherClient()
+        self._publisher = get_publisher_client()
 
-    def publish(self, req: FetchRequestV1) -> str:
+    def _submit(self, req: FetchRequestV1) -> concurrent.futures.Future:
         payload = json.dumps(req.to_dict()).encode("utf-8")
-
-        future = self._publisher.publish(
+        return self._publisher.publish(
             self._topic_path,
             payload,
             version=req.VERSION,
         )
 
+    def _submit_all(self, reqs: Sequence[FetchRequestV1]) -> List[concurrent.futures.Future]:
+        futures = []
+        for r in reqs:
+            try:
+                futures.append(self._submit(r))
+            except Exception as e:
+                # rejected before it was queued (oversized payload, stopped client): fail this message only
+                failed: concurrent.futures.Future = concurrent.futures.Future()
+                failed.set_exception(e)
+                futures.append(failed)
+        return futures
+
+    def publish(self, req: FetchRequestV1) -> str:
+        future = self._submit(req)
+
         # Block only until Pub/Sub accepts the message
         message_id = future.result(timeout=10)
         return message_id
+
+    def publish_many(self, reqs: Sequence[FetchRequestV1], timeout: float = 10) -> List[PublishOutcome]:
+        """Publish all requests, then wait for every ack at once (one shared deadline)."""
+        futures = self._submit_all(reqs)
+        concurrent.futures.wait(futures, timeout=timeout)
+        return [_outcome(r, f) for r, f in zip(reqs, futures)]
+
+    async def publish_many_async(self, reqs: Sequence[FetchRequestV1], timeout: float = 10) -> List[PublishOutcome]:
+        """publish_many for the event loop: awaits the acks without blocking it."""
+        futures = self._submit_all(reqs)
+        if futures:
+            await asyncio.wait([asyncio.wrap_future(f) for f in futures], timeout=timeout)
+        return [_outcome(r, f) for r, f in zip(reqs, futures)]
+
+
+def _outcome(req: FetchRequestV1, future: concurrent.futures.Future) -> PublishOutcome:
+    if not future.done():
+        return PublishOutcome(request_id=req.request_id, error="timeout waiting for publish ack")
+    exc = future.exception()
+    if exc is not None:
+        return PublishOutcome(request_id=req.request_id, error=f"{type(exc).__name__}: {exc}")
+    return PublishOutcome(request_id=req.request_id, message_id=future.result())
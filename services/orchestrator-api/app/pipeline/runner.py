@@ -1,14 +1,85 @@
 # app/pipeline/runner.py
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 
-async def run_pipeline(*, history, user_message):
+from .dag import STATUS_OK, Stage, run_dag, timings
+
+# on_event(event, data): "stage" for progress, "delta" for assistant text chunks
+EventCallback = Callable[[str, dict], Awaitable[None]]
+
+EVIDENCE_STAGES = ("serpapi", "fetcher", "perplexity", "normalization")
+LLM_STAGES = ("debate", "referee", "artifacts")
+
+# Per-stage latency budgets (seconds). A stage over budget is cut off and the
+# turn continues with partial results where the graph allows it.
+STAGE_TIMEOUTS_S: Dict[str, float] = {
+    "serpapi": 15.0,
+    "fetcher": 30.0,
+    "perplexity": 45.0,
+    "normalization": 5.0,
+    "debate": 60.0,
+    "referee": 30.0,
+    "artifacts": 15.0,
+}
+
+
+def _locked_stages(history, user_message) -> List[Stage]:
+    """
+    The locked pipeline as a DAG. Stage bodies are placeholders until each
+    service is wired in; the graph, budgets and result shape are final.
+    """
+
+    async def serpapi(_: Dict[str, Any]) -> Dict[str, Any]:
+        return {"urls": []}
+
+    async def fetcher(inputs: Dict[str, Any]) -> Dict[str, Any]:
+        return {"snapshots": []}
+
+    async def perplexity(inputs: Dict[str, Any]) -> Dict[str, Any]:
+        # search + synthesis only, never debate
+        return {"synthesis": {}}
+
+    async def normalization(inputs: Dict[str, Any]) -> Dict[str, Any]:
+        return {"evidence_pack": {}}
+
+    async def debate(inputs: Dict[str, Any]) -> Dict[str, Any]:
+        # web-blind: sees only the normalized pack (possibly partial) and history
+        return {"positions": []}
+
+    async def referee(inputs: Dict[str, Any]) -> Dict[str, Any]:
+        return {"assistant_text": f"(Phase 4 placeholder) Received: {user_message}"}
+
+    async def artifacts(inputs: Dict[str, Any]) -> Dict[str, Any]:
+        return {"artifacts": []}
+
+    t = STAGE_TIMEOUTS_S
+    return [
+        Stage("serpapi", serpapi, timeout_s=t["serpapi"]),
+        Stage("fetcher", fetcher, deps=("serpapi",), timeout_s=t["fetcher"]),
+        Stage("perplexity", perplexity, deps=("fetcher",), timeout_s=t["perplexity"]),
+        Stage("normalization", normalization, deps=("perplexity",), timeout_s=t["normalization"]),
+        # evidence may be partial or missing; debate still runs and says so
+        Stage("debate", debate, deps=("normalization",), timeout_s=t["debate"], requires_all=False),
+        Stage("referee", referee, deps=("debate",), timeout_s=t["referee"]),
+        Stage("artifacts", artifacts, deps=("referee",), timeout_s=t["artifacts"]),
+    ]
+
+
+async def run_pipeline(*, history, user_message, on_event: Optional[EventCallback] = None):
     """
     Phase 4:
     - This function wires the locked pipeline.
     - Memory is already rehydrated before this call.
     - This function must be PURE: no Firestore access.
+    - on_event (optional) receives progress for streaming clients; it must not
+      change the result.
+
+    Stages run on app.pipeline.dag with bounded concurrency and per-stage
+    timeouts. Per-stage wall time/status is recorded under
+    evidence_pack["stages"] and llm["stages"].
     """
 
-    # TODO (Phase 4+):
+    # Locked stages:
     # SerpAPI
     # Fetcher
     # Perplexity (search only)
@@ -16,11 +87,26 @@ async def run_pipeline(*, history, user_message):
     # Debate LLMs (web-blind)
     # Referee
     # Artifact generation
+    outcomes = await run_dag(
+        _locked_stages(history, user_message),
+        max_concurrency=int(os.environ.get("PIPELINE_MAX_CONCURRENCY", "4")),
+        on_event=on_event,
+    )
+
+    def output(name: str) -> Dict[str, Any]:
+        o = outcomes.get(name)
+        return (o.output or {}) if o is not None and o.status == STATUS_OK else {}
+
+    evidence_pack = dict(output("normalization").get("evidence_pack") or {})
+    evidence_pack["stages"] = timings(outcomes, EVIDENCE_STAGES)
+
+    assistant_text = output("referee").get("assistant_text")
+    if assistant_text is None:
+        assistant_text = f"(pipeline incomplete: referee {outcomes['referee'].status}) Received: {user_message}"
 
-    # Temporary placeholder until full pipeline is wired
     return {
-        "assistant_text": f"(Phase 4 placeholder) Received: {user_message}",
-        "evidence_pack": {},
-        "llm": {},
-        "artifacts": [],
+        "assistant_text": assistant_text,
+        "evidence_pack": evidence_pack,
+        "llm": {"stages": timings(outcomes, LLM_STAGES)},
+        "artifacts": output("artifacts").get("artifacts") or [],
     }
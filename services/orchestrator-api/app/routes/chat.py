@@ -1,21 +1,43 @@
 # app/routes/chat.py
 
 from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import asyncio
+import json
 import uuid
 
-from app.memory.chat_memory import ChatMemoryStore
+from app.memory.async_chat_memory import AsyncChatMemoryStore
+from app.memory.chat_memory import PendingAppend
+from app.pipeline.runner import run_pipeline
 
 
 router = APIRouter()
 
-# Firestore-backed chat memory (singleton per process)
-memory = ChatMemoryStore(tenant_id="default")
+# Firestore-backed chat memory (singleton per process, AsyncClient so turns don't block the loop)
+memory = AsyncChatMemoryStore(tenant_id="default")
+
+# assistant text is sent in chunks of this many chars when the pipeline doesn't stream deltas itself
+SSE_TEXT_CHUNK = 256
+
+
+def _wants_stream(req: Request, payload: dict) -> bool:
+    return bool(payload.get("stream")) or "text/event-stream" in req.headers.get("accept", "")
+
+
+def _sse(event: str, data: dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
 
 
 @router.post("/chat")
 async def chat(req: Request, payload: dict):
     """
     Chat endpoint with deterministic Firestore-backed memory.
+
+    Send `"stream": true` (or `Accept: text/event-stream`) to receive the turn
+    as server-sent events instead of a single JSON body:
+      conversation -> (stage | delta | user_message)* -> done   (or error)
+    A client that disconnects mid-turn does not abort it: the turn still
+    persists both messages.
     """
 
     # 1. Identify user (already handled elsewhere in your stack)
@@ -25,44 +47,98 @@ async def chat(req: Request, payload: dict):
     # 2. Conversation + request identity
     conversation_id = payload.get("conversation_id")
     request_id = payload.get("request_id") or f"req-{uuid.uuid4()}"
+    user_text = payload["message"]
 
-    # 3. Get or create conversation
-    conversation_id = memory.get_or_create_conversation(
-        user_id=user_id,
-        conversation_id=conversation_id,
-    )
+    if _wants_stream(req, payload):
+        return StreamingResponse(
+            _chat_events(user_id, conversation_id, request_id, user_text),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
 
-    # 4. Rehydrate chat history (deterministic)
-    history = memory.rehydrate(
-        user_id=user_id,
-        conversation_id=conversation_id,
-    )
+    try:
+        # 3-6. Conversation + history, then user message and pipeline concurrently
+        conversation_id, history, user_task = await _start_turn(user_id, conversation_id, request_id, user_text)
+        pipeline_task = asyncio.create_task(
+            run_pipeline(
+                history=history,
+                user_message=user_text,
+            )
+        )
+        user_seq, result = await _join_turn(user_task, pipeline_task)
+
+        # 7-8. Assistant message + artifact pointers
+        assistant_seq = await _finish_turn(user_id, conversation_id, request_id, result)
+    except PendingAppend as e:
+        # a retry of this request_id while the original is still being written
+        return JSONResponse(
+            status_code=409,
+            content={"error": "request_in_progress", "request_id": request_id, "retryable": True},
+            headers={"Retry-After": str(e.retry_after_s)},
+        )
 
-    # 5. Persist user message
-    user_text = payload["message"]
-    user_seq = memory.append_message(
+    # 9. Return response
+    return {
+        "conversation_id": conversation_id,
+        "user_message_seq": user_seq,
+        "assistant_message_seq": assistant_seq,
+        "assistant": result["assistant_text"],
+        "artifacts": result.get("artifacts", []),
+    }
+
+
+# Turn dependency graph:
+#
+#   open_conversation ──┬──► append(user) ──┬──► commit_turn(assistant + artifacts)
+#   (create|rehydrate)  └──► run_pipeline ──┘
+#
+# The user message and the pipeline only need the rehydrated history, so they
+# run concurrently. The assistant message waits for both, which keeps its seq
+# after the user's.
+
+
+async def _start_turn(user_id: str, conversation_id, request_id: str, user_text: str):
+    # 3-4. Get or create conversation, fused with the history read
+    conversation_id, history = await memory.open_conversation(
         user_id=user_id,
         conversation_id=conversation_id,
-        role="user",
-        content=user_text,
-        request_id=f"{request_id}:user",
     )
 
-    # 6. Run LOCKED pipeline (unchanged)
-    # Phase 3 stub — pipeline wired in Phase 4
-    from app.pipeline.runner import run_pipeline
-
-    result = await run_pipeline(
-        history=history,
-        user_message=user_text,
+    # 5. Persist user message (in the background, see _join_turn)
+    user_task = asyncio.create_task(
+        memory.append_message(
+            user_id=user_id,
+            conversation_id=conversation_id,
+            role="user",
+            content=user_text,
+            request_id=f"{request_id}:user",
+        )
     )
+    return conversation_id, history, user_task
 
 
-    # 7. Persist assistant message
-    assistant_seq = memory.append_message(
+async def _join_turn(user_task: asyncio.Task, pipeline_task: asyncio.Task):
+    """
+    Failure semantics:
+    - user message write fails: the pipeline is cancelled and the error raised;
+      nothing else is persisted for the turn.
+    - pipeline fails: the user message is still persisted (as in the sequential
+      flow), then the pipeline error is raised.
+    """
+    try:
+        user_seq = await user_task
+    except BaseException:
+        pipeline_task.cancel()
+        raise
+    result = await pipeline_task
+    return user_seq, result
+
+
+async def _finish_turn(user_id: str, conversation_id: str, request_id: str, result: dict) -> int:
+    # 7-8. Persist assistant message with its artifact pointers in one commit
+    return await memory.commit_turn(
         user_id=user_id,
         conversation_id=conversation_id,
-        role="assistant",
         content=result["assistant_text"],
         request_id=f"{request_id}:assistant",
         pointers={
@@ -71,22 +147,74 @@ async def chat(req: Request, payload: dict):
             },
             "llm": result.get("llm", {}),
         },
+        artifacts=result.get("artifacts") or [],
     )
 
-    # 8. Attach artifact pointers (if any)
-    if result.get("artifacts"):
-        memory.attach_artifacts(
-            user_id=user_id,
-            conversation_id=conversation_id,
-            message_seq=assistant_seq,
-            artifacts=result["artifacts"],
-        )
 
-    # 9. Return response
-    return {
-        "conversation_id": conversation_id,
-        "user_message_seq": user_seq,
-        "assistant_message_seq": assistant_seq,
-        "assistant": result["assistant_text"],
-        "artifacts": result.get("artifacts", []),
-    }
+async def _chat_events(user_id: str, conversation_id, request_id: str, user_text: str):
+    """SSE body for a streaming turn: forwards the events of _stream_turn as they are emitted."""
+    events: asyncio.Queue = asyncio.Queue()
+    turn = asyncio.create_task(
+        _stream_turn(user_id, conversation_id, request_id, user_text, lambda e, d: events.put_nowait((e, d)))
+    )
+    # The turn is not owned by this generator: if the client disconnects, the
+    # generator is closed but the turn still persists its messages.
+    _turns.add(turn)
+    turn.add_done_callback(_turns.discard)
+    turn.add_done_callback(lambda _: events.put_nowait(None))
+
+    while True:
+        item = await events.get()
+        if item is None:
+            return
+        yield _sse(*item)
+
+
+# strong refs to streaming turns still running (possibly after their client left)
+_turns: set = set()
+
+
+async def _stream_turn(user_id: str, conversation_id, request_id: str, user_text: str, emit) -> None:
+    """A streaming turn, run to completion. Persistence is identical to the JSON path."""
+    try:
+        conversation_id, history, user_task = await _start_turn(user_id, conversation_id, request_id, user_text)
+        emit("conversation", {"conversation_id": conversation_id, "request_id": request_id})
+
+        # Pipeline events (stage progress, optional text deltas) are forwarded as they happen,
+        # while the user message is still being written.
+        streamed_text = False
+
+        async def on_event(event: str, data: dict) -> None:
+            nonlocal streamed_text
+            streamed_text = streamed_text or event == "delta"
+            emit(event, data)
+
+        def on_user_message(task: asyncio.Task) -> None:
+            if not task.cancelled() and task.exception() is None:
+                emit("user_message", {"user_message_seq": task.result()})
+
+        user_task.add_done_callback(on_user_message)
+        pipeline_task = asyncio.create_task(
+            run_pipeline(history=history, user_message=user_text, on_event=on_event)
+        )
+        user_seq, result = await _join_turn(user_task, pipeline_task)
+
+        if not streamed_text:
+            text = result["assistant_text"]
+            for i in range(0, len(text), SSE_TEXT_CHUNK):
+                emit("delta", {"text": text[i:i + SSE_TEXT_CHUNK]})
+
+        assistant_seq = await _finish_turn(user_id, conversation_id, request_id, result)
+        emit("done", {
+            "conversation_id": conversation_id,
+            "user_message_seq": user_seq,
+            "assistant_message_seq": assistant_seq,
+            "artifacts": result.get("artifacts", []),
+        })
+    except Exception as e:
+        # headers are already sent; report in-band
+        emit("error", {
+            "request_id": request_id,
+            "error": f"{type(e).__name__}: {e}",
+            "retryable": isinstance(e, PendingAppend),
+        })
@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+# services are run from their own root (`uvicorn main:app`); tests import `app` the same way
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+@pytest.fixture
+def fs(monkeypatch):
+    """One in-memory Firestore (tests/fake_firestore.py) behind both stores' clients."""
+    pytest.importorskip("google.cloud.firestore")
+    import fake_firestore
+    from app.memory import async_chat_memory, chat_memory
+
+    fake_firestore.install_transactional(monkeypatch)
+    store = fake_firestore.Store()
+    monkeypatch.setattr(chat_memory, "get_db", lambda: fake_firestore.Client(store))
+    monkeypatch.setattr(async_chat_memory, "get_async_db", lambda: fake_firestore.AsyncClient(store))
+    return store
@@ -0,0 +1,443 @@
+"""
+In-memory stand-in for google.cloud.firestore Client / AsyncClient, with the
+semantics the chat memory code relies on:
+
+- create() fails with AlreadyExists, update() on a missing doc with NotFound;
+- write_option(last_update_time=...) preconditions fail with FailedPrecondition;
+- a batch commits atomically and returns one WriteResult per write, whose
+  transform_results are ordered by field path (server timestamps included),
+  as the real client sends them;
+- get(field_paths=[...]) returns only the masked fields;
+- an async commit yields to the event loop before it applies;
+- transactions re-run when a document they read changed before commit
+  (install the fake transactional decorators with install_transactional).
+
+Only the calls the services make are implemented.
+"""
+import asyncio
+import copy
+import itertools
+import threading
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from google.api_core.exceptions import Aborted, AlreadyExists, FailedPrecondition, NotFound
+from google.cloud import firestore
+from google.cloud.firestore_v1 import transforms
+
+
+class Store:
+    def __init__(self):
+        self.docs = {}  # path -> (data, update_time)
+        self.lock = threading.RLock()
+        self.reads = 0
+        self.log = []  # (doc path, field_paths) of every document read
+        self.before_commit = []  # callables(paths) run before each commit applies
+        self._clock = itertools.count(1)
+
+    def tick(self) -> int:
+        return next(self._clock)
+
+
+def _get_path(d, dotted):
+    for p in dotted.split("."):
+        if not isinstance(d, dict) or p not in d:
+            return None
+        d = d[p]
+    return d
+
+
+def _set_path(d, dotted, value):
+    parts = dotted.split(".")
+    for p in parts[:-1]:
+        d = d.setdefault(p, {})
+    d[parts[-1]] = value
+
+
+def _is_transform(v) -> bool:
+    return v is firestore.SERVER_TIMESTAMP or isinstance(
+        v, (transforms.Increment, transforms.Maximum, transforms.Minimum)
+    )
+
+
+def _apply_transform(old, v):
+    if v is firestore.SERVER_TIMESTAMP:
+        now = datetime.now(timezone.utc)
+        return now, SimpleNamespace(timestamp_value=now)
+    if isinstance(v, transforms.Increment):
+        new = (old or 0) + v.value
+    elif isinstance(v, transforms.Maximum):
+        new = v.value if old is None else max(old, v.value)
+    else:
+        new = v.value if old is None else min(old, v.value)
+    return new, SimpleNamespace(integer_value=new)
+
+
+def _flatten(data, prefix=()):
+    """(path parts, value) for every leaf; nested dicts are descended into."""
+    for k, v in data.items():
+        parts = prefix + tuple(k.split("."))
+        if isinstance(v, dict) and v:
+            yield from _flatten(v, parts)
+        else:
+            yield parts, v
+
+
+def _write(cur, data, merge_paths):
+    """
+    Apply data on top of cur (None = replace). Returns (new doc, transform
+    results sorted by field path).
+    """
+    new = copy.deepcopy(cur) if cur is not None else {}
+    results = []
+    for parts, v in _flatten(data) if merge_paths else _flatten_replace(data):
+        path = ".".join(parts)
+        if _is_transform(v):
+            value, result = _apply_transform(_get_path(new, path), v)
+            _set_path(new, path, value)
+            results.append((parts, result))
+        else:
+            _set_path(new, path, copy.deepcopy(v))
+    return new, [r for _, r in sorted(results, key=lambda x: x[0])]
+
+
+def _flatten_replace(data):
+    # replace: empty dicts are values too
+    for k, v in data.items():
+        if isinstance(v, dict) and v:
+            for parts, leaf in _flatten(v, (k,)):
+                yield parts, leaf
+        else:
+            yield (k,), v
+
+
+class Snapshot:
+    def __init__(self, ref, data, update_time=None):
+        self.reference = ref
+        self.id = ref.id
+        self._data = copy.deepcopy(data)
+        self.exists = data is not None
+        self.update_time = update_time
+
+    def to_dict(self):
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field):
+        return copy.deepcopy(_get_path(self._data or {}, field))
+
+
+def _mask(data, field_paths):
+    if data is None or field_paths is None:
+        return data
+    out = {}
+    for f in field_paths:
+        v = _get_path(data, f)
+        if v is not None:
+            _set_path(out, f, v)
+    return out
+
+
+class DocumentReference:
+    def __init__(self, client, path):
+        self._client = client
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    def collection(self, name):
+        return CollectionReference(self._client, f"{self.path}/{name}")
+
+    def _snapshot(self, field_paths=None):
+        st = self._client._store
+        with st.lock:
+            st.reads += 1
+            st.log.append((self.path, list(field_paths) if field_paths is not None else None))
+            data, ut = st.docs.get(self.path, (None, None))
+            return Snapshot(self, _mask(data, field_paths), ut)
+
+    def get(self, field_paths=None, transaction=None):
+        if transaction is not None:
+            transaction._track(self.path)
+        return self._client._result(self._snapshot(field_paths))
+
+    def set(self, data, merge=False):
+        return self._client.batch().set(self, data, merge=merge).commit()
+
+    def create(self, data):
+        return self._client.batch().create(self, data).commit()
+
+    def update(self, data, option=None):
+        return self._client.batch().update(self, data, option=option).commit()
+
+    def delete(self):
+        return self._client.batch().delete(self).commit()
+
+
+_OPS = {
+    "==": lambda a, b: a == b,
+    "<": lambda a, b: a is not None and a < b,
+    "<=": lambda a, b: a is not None and a <= b,
+    ">": lambda a, b: a is not None and a > b,
+    ">=": lambda a, b: a is not None and a >= b,
+}
+
+
+class Query:
+    def __init__(self, parent, filters=(), orders=(), limit_n=None):
+        self._parent = parent
+        self._filters = list(filters)
+        self._orders = list(orders)
+        self._limit = limit_n
+
+    def where(self, field_path=None, op_string=None, value=None, filter=None):
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return Query(self._parent, self._filters + [(field_path, op_string, value)], self._orders, self._limit)
+
+    def order_by(self, field_path, direction="ASCENDING"):
+        return Query(self._parent, self._filters, self._orders + [(field_path, direction)], self._limit)
+
+    def limit(self, n):
+        return Query(self._parent, self._filters, self._orders, n)
+
+    def _rows(self):
+        st = self._parent._client._store
+        with st.lock:
+            rows = [(p, d, ut) for p, (d, ut) in st.docs.items() if self._parent._contains(p)]
+        rows = [r for r in rows if all(_OPS[op](_get_path(r[1], f), v) for f, op, v in self._filters)]
+        for field, direction in reversed(self._orders):
+            rows.sort(key=lambda r: _get_path(r[1], field), reverse=direction == "DESCENDING")
+        if self._limit is not None:
+            rows = rows[: self._limit]
+        with st.lock:
+            st.reads += max(1, len(rows))
+        client = self._parent._client
+        return [Snapshot(DocumentReference(client, p), d, ut) for p, d, ut in rows]
+
+    def stream(self, transaction=None):
+        rows = self._rows()
+        if self._parent._client.is_async:
+            async def gen():
+                for s in rows:
+                    yield s
+            return gen()
+        return iter(rows)
+
+
+class CollectionReference(Query):
+    def __init__(self, client, path):
+        self._client = client
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+        super().__init__(self)
+
+    def _contains(self, doc_path):
+        prefix = self.path + "/"
+        return doc_path.startswith(prefix) and "/" not in doc_path[len(prefix):]
+
+    def document(self, document_id=None):
+        return DocumentReference(self._client, f"{self.path}/{document_id or uuid.uuid4().hex[:20]}")
+
+    def list_documents(self):
+        prefix = self.path + "/"
+        st = self._client._store
+        with st.lock:
+            ids = sorted({p[len(prefix):].split("/")[0] for p in st.docs if p.startswith(prefix)})
+        return [self.document(i) for i in ids]
+
+
+class WriteBatch:
+    def __init__(self, client):
+        self._client = client
+        self._writes = []
+
+    def create(self, ref, data):
+        self._writes.append(("create", ref, data, None))
+        return self
+
+    def set(self, ref, data, merge=False):
+        self._writes.append(("merge" if merge else "set", ref, data, None))
+        return self
+
+    def update(self, ref, data, option=None):
+        self._writes.append(("update", ref, data, option))
+        return self
+
+    def delete(self, ref, option=None):
+        self._writes.append(("delete", ref, None, option))
+        return self
+
+    def _apply(self):
+        st = self._client._store
+        for hook in list(st.before_commit):
+            hook([w[1].path for w in self._writes])
+        with st.lock:
+            staged = dict(st.docs)
+            t = st.tick()
+            results = []
+            for kind, ref, data, option in self._writes:
+                cur, ut = staged.get(ref.path, (None, None))
+                if option is not None:
+                    if option.last_update_time is not None and ut != option.last_update_time:
+                        raise FailedPrecondition(f"{ref.path} changed since {option.last_update_time}")
+                    if option.exists is True and cur is None:
+                        raise NotFound(ref.path)
+                tr = []
+                if kind == "create":
+                    if cur is not None:
+                        raise AlreadyExists(ref.path)
+                    new, tr = _write(None, data, merge_paths=False)
+                elif kind == "set":
+                    new, tr = _write(None, data, merge_paths=False)
+                elif kind == "merge":
+                    new, tr = _write(cur or {}, data, merge_paths=True)
+                elif kind == "update":
+                    if cur is None:
+                        raise NotFound(ref.path)
+                    new, tr = _update(cur, data)
+                else:
+                    staged.pop(ref.path, None)
+                    results.append(SimpleNamespace(transform_results=[], update_time=t))
+                    continue
+                staged[ref.path] = (new, t)
+                results.append(SimpleNamespace(transform_results=tr, update_time=t))
+            st.docs = staged
+            return results
+
+    def commit(self):
+        if self._client.is_async:
+            async def go():
+                # yield first, as a network round trip would: concurrent
+                # coroutines interleave between their commits
+                await asyncio.sleep(0)
+                return self._apply()
+            return go()
+        return self._apply()
+
+
+def _update(cur, data):
+    new = copy.deepcopy(cur)
+    results = []
+    for k, v in data.items():
+        parts = tuple(k.split("."))
+        if _is_transform(v):
+            value, result = _apply_transform(_get_path(new, k), v)
+            _set_path(new, k, value)
+            results.append((parts, result))
+        else:
+            _set_path(new, k, copy.deepcopy(v))
+    return new, [r for _, r in sorted(results, key=lambda x: x[0])]
+
+
+class Transaction(WriteBatch):
+    def __init__(self, client):
+        super().__init__(client)
+        self._read_times = {}
+
+    def _track(self, path):
+        st = self._client._store
+        with st.lock:
+            self._read_times[path] = st.docs.get(path, (None, None))[1]
+
+    def _commit_checked(self):
+        st = self._client._store
+        with st.lock:
+            for path, ut in self._read_times.items():
+                if st.docs.get(path, (None, None))[1] != ut:
+                    raise Aborted(f"{path} changed during the transaction")
+            return self._apply()
+
+
+MAX_ATTEMPTS = 20
+
+
+def transactional(fn):
+    def run(transaction, *args, **kwargs):
+        for _ in range(MAX_ATTEMPTS):
+            txn = Transaction(transaction._client)
+            out = fn(txn, *args, **kwargs)
+            try:
+                txn._commit_checked()
+                return out
+            except Aborted:
+                continue
+        raise Aborted("too much contention")
+    return run
+
+
+def async_transactional(fn):
+    async def run(transaction, *args, **kwargs):
+        for _ in range(MAX_ATTEMPTS):
+            txn = Transaction(transaction._client)
+            out = await fn(txn, *args, **kwargs)
+            try:
+                txn._commit_checked()
+                return out
+            except Aborted:
+                await asyncio.sleep(0)
+        raise Aborted("too much contention")
+    return run
+
+
+def install_transactional(monkeypatch) -> None:
+    monkeypatch.setattr(firestore, "transactional", transactional)
+    monkeypatch.setattr(firestore, "async_transactional", async_transactional)
+
+
+class Client:
+    is_async = False
+
+    def __init__(self, store=None):
+        self._store = store or Store()
+
+    def _result(self, value):
+        return value
+
+    def collection(self, name):
+        return CollectionReference(self, name)
+
+    def batch(self):
+        return WriteBatch(self)
+
+    def transaction(self):
+        return Transaction(self)
+
+    def write_option(self, last_update_time=None, exists=None):
+        return SimpleNamespace(last_update_time=last_update_time, exists=exists)
+
+    def _get_all(self, refs, transaction=None):
+        snaps = []
+        for ref in refs:
+            if transaction is not None:
+                transaction._track(ref.path)
+            snaps.append(ref._snapshot())
+        return snaps
+
+    def get_all(self, refs, transaction=None):
+        return iter(self._get_all(refs, transaction))
+
+    # test helpers
+
+    def doc(self, path):
+        data, _ = self._store.docs.get(path, (None, None))
+        return copy.deepcopy(data)
+
+    def paths(self, prefix=""):
+        return sorted(p for p in self._store.docs if p.startswith(prefix))
+
+
+class AsyncClient(Client):
+    is_async = True
+
+    def _result(self, value):
+        async def go():
+            return value
+        return go()
+
+    def get_all(self, refs, transaction=None):
+        snaps = self._get_all(refs, transaction)
+
+        async def gen():
+            for s in snaps:
+                yield s
+        return gen()
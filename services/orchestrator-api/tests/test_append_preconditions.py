@@ -0,0 +1,93 @@
+"""
+The create-only / precondition behaviour of the append fast path, against the
+in-memory client (tests/fake_firestore.py). The same properties run against
+the emulator in test_async_chat_memory_emulator.py when it is available.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("google.cloud.firestore")
+
+from app.memory import chat_memory  # noqa: E402
+from app.memory.async_chat_memory import AsyncChatMemoryStore  # noqa: E402
+from app.memory.chat_memory import ChatMemoryStore  # noqa: E402
+
+N = 32
+
+
+def conv(store, cid):
+    return store.db.doc(store.refs("u", cid).conv.path)
+
+
+def message(store, cid, seq):
+    return store.db.doc(store.refs("u", cid).message(seq).path)
+
+
+def test_concurrent_appends_get_unique_contiguous_seqs(fs):
+    store = AsyncChatMemoryStore()
+
+    async def run():
+        cid, _ = await store.open_conversation("u", None)
+        seqs = await asyncio.gather(*[store.append_message("u", cid, "user", f"m{i}", f"req-{i}") for i in range(N)])
+        return cid, seqs
+
+    cid, seqs = asyncio.run(run())
+    assert sorted(seqs) == list(range(1, N + 1))
+    assert all(message(store, cid, seq)["content"] == f"m{i}" for i, seq in enumerate(seqs))
+    assert conv(store, cid)["last_message_seq"] == conv(store, cid)["next_seq"] - 1 == N
+
+
+def test_concurrent_appends_from_threads_get_unique_contiguous_seqs(fs):
+    store = ChatMemoryStore()
+    cid, _ = store.open_conversation("u", None)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        seqs = list(pool.map(lambda i: store.append_message("u", cid, "user", f"m{i}", f"req-{i}"), range(N)))
+    assert sorted(seqs) == list(range(1, N + 1))
+    assert conv(store, cid)["last_message_seq"] == N
+
+
+def test_replays_return_the_original_seq_and_write_nothing(fs):
+    store = AsyncChatMemoryStore()
+
+    async def run():
+        cid, _ = await store.open_conversation("u", None)
+        for i in range(3):
+            await store.append_message("u", cid, "user", f"m{i}", f"req-{i}")
+        before = dict(fs.docs)
+        replayed = [
+            await store.append_message("u", cid, "user", "again", "req-1"),
+            await store.commit_turn("u", cid, "again", "req-2", artifacts=[{"artifact_id": "a"}]),
+        ]
+        return cid, before, replayed
+
+    cid, before, replayed = asyncio.run(run())
+    assert replayed == [2, 3]
+    assert fs.docs == before
+    assert "again" not in [message(store, cid, s)["content"] for s in (1, 2, 3)]
+
+
+def test_takeover_fails_the_original_commit_precondition(fs, monkeypatch):
+    # every claim without a seq is stale: the replay takes the request over at once
+    monkeypatch.setattr(chat_memory, "PENDING_TAKEOVER_S", 0.0)
+    store = AsyncChatMemoryStore()
+
+    async def run():
+        cid, _ = await store.open_conversation("u", None)
+        # the original claims the key and Increments the seq (1), then yields
+        # before writing its message; the replay finds the claim and takes over
+        seqs = await asyncio.gather(
+            store.append_message("u", cid, "user", "q", "r1"),
+            store.append_message("u", cid, "user", "q", "r1"),
+        )
+        return cid, seqs
+
+    cid, seqs = asyncio.run(run())
+    # the original's message commit failed its precondition on the rewritten
+    # key, so both return the takeover's seq; the seq the original allocated
+    # stays unused
+    assert seqs == [2, 2]
+    assert message(store, cid, 1) is None
+    assert message(store, cid, 2)["content"] == "q"
+    assert store.db.doc(store.refs("u", cid).key("r1").path)["seq"] == 2
@@ -0,0 +1,78 @@
+"""
+AsyncChatMemoryStore against the Firestore emulator:
+
+    gcloud emulators firestore start --host-port=localhost:8080
+    FIRESTORE_EMULATOR_HOST=localhost:8080 pytest tests/test_async_chat_memory_emulator.py
+
+Without the emulator, test_append_preconditions.py covers the same
+create-only / precondition behaviour against the in-memory client.
+"""
+import asyncio
+import os
+import time
+import uuid
+
+import pytest
+
+if not os.environ.get("FIRESTORE_EMULATOR_HOST"):
+    pytest.skip("FIRESTORE_EMULATOR_HOST not set", allow_module_level=True)
+
+firestore = pytest.importorskip("google.cloud.firestore")
+
+from app.memory import async_chat_memory  # noqa: E402
+from app.memory.async_chat_memory import AsyncChatMemoryStore  # noqa: E402
+
+CONVERSATIONS = 16
+TURNS = 4
+
+
+@pytest.fixture
+def store(monkeypatch):
+    db = firestore.AsyncClient(project="ars-emulator-test")
+    monkeypatch.setattr(async_chat_memory, "get_async_db", lambda: db)
+    return AsyncChatMemoryStore(tenant_id=f"t-{uuid.uuid4().hex[:8]}")
+
+
+async def _turns(store, user_id: str, conversation_id: str) -> list:
+    seqs = []
+    for i in range(TURNS):
+        seqs.append(await store.append_message(user_id, conversation_id, "user", f"m{i}", f"{conversation_id}-{i}"))
+    return seqs
+
+
+def test_concurrent_appends_get_unique_contiguous_seqs(store):
+    async def run():
+        cid, _ = await store.open_conversation("u", None)
+        seqs = await asyncio.gather(
+            *[store.append_message("u", cid, "user", f"m{i}", f"req-{i}") for i in range(32)]
+        )
+        assert sorted(seqs) == list(range(1, 33))
+
+        # replays return the original seq and write nothing new
+        assert await store.append_message("u", cid, "user", "again", "req-7") == seqs[7]
+        history = await store.rehydrate("u", cid)
+        assert len(history) == 24
+        assert all(m["content"] != "again" for m in history)
+
+    asyncio.run(run())
+
+
+def test_conversations_overlap_on_one_event_loop(store):
+    async def run():
+        cids = [(await store.open_conversation("u", None))[0] for _ in range(2 * CONVERSATIONS)]
+        serial, concurrent = cids[:CONVERSATIONS], cids[CONVERSATIONS:]
+
+        t0 = time.perf_counter()
+        for cid in serial:
+            assert await _turns(store, "u", cid) == list(range(1, TURNS + 1))
+        serial_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        results = await asyncio.gather(*[_turns(store, "u", cid) for cid in concurrent])
+        concurrent_s = time.perf_counter() - t0
+
+        assert all(seqs == list(range(1, TURNS + 1)) for seqs in results)
+        # awaited I/O: conversations proceed in parallel rather than one at a time
+        assert concurrent_s < serial_s / 2, (serial_s, concurrent_s)
+
+    asyncio.run(run())
@@ -0,0 +1,95 @@
+"""
+/chat turn latency with stub backends: the overlapped turn against the same
+steps run one after another. Each stub sleeps a fixed round-trip time.
+
+    pytest -q tests/test_chat_latency.py -s     # prints the per-turn numbers
+"""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("google.cloud.firestore")
+
+from app.memory import async_chat_memory  # noqa: E402
+
+RTT_S = 0.03  # one Firestore round trip
+PIPELINE_S = 0.06
+TURNS = 5
+
+
+class StubMemory:
+    def __init__(self):
+        self.seq = 0
+
+    async def _rtt(self):
+        await asyncio.sleep(RTT_S)
+
+    async def get_or_create_conversation(self, user_id, conversation_id):
+        await self._rtt()
+        return conversation_id or "c1"
+
+    async def rehydrate(self, user_id, conversation_id):
+        await self._rtt()
+        return []
+
+    async def open_conversation(self, user_id, conversation_id):
+        await self._rtt()
+        return conversation_id or "c1", []
+
+    async def append_message(self, user_id, conversation_id, role, content, request_id, pointers=None):
+        await self._rtt()
+        self.seq += 1
+        return self.seq
+
+    async def commit_turn(self, user_id, conversation_id, content, request_id, pointers=None, artifacts=None):
+        await self._rtt()
+        self.seq += 1
+        return self.seq
+
+    async def attach_artifacts(self, user_id, conversation_id, message_seq, artifacts):
+        await self._rtt()
+
+
+async def stub_pipeline(*, history, user_message, on_event=None):
+    await asyncio.sleep(PIPELINE_S)
+    return {"assistant_text": "answer", "artifacts": [{"artifact_id": "a1"}]}
+
+
+async def sequential_turn(memory: StubMemory, request_id: str) -> None:
+    # the handler before the turn graph: every step waits for the previous one
+    cid = await memory.get_or_create_conversation("u", None)
+    history = await memory.rehydrate("u", cid)
+    await memory.append_message("u", cid, "user", "hi", f"{request_id}:user")
+    result = await stub_pipeline(history=history, user_message="hi")
+    seq = await memory.append_message("u", cid, "assistant", result["assistant_text"], f"{request_id}:assistant")
+    await memory.attach_artifacts("u", cid, seq, result["artifacts"])
+
+
+def test_overlapped_turn_is_faster(monkeypatch):
+    monkeypatch.setattr(async_chat_memory, "get_async_db", lambda: None)
+    from app.routes import chat
+
+    memory = StubMemory()
+    monkeypatch.setattr(chat, "memory", memory)
+    monkeypatch.setattr(chat, "run_pipeline", stub_pipeline)
+    req = SimpleNamespace(state=SimpleNamespace(user_id="u"), headers={})
+
+    async def timed(turn) -> float:
+        t0 = time.perf_counter()
+        for i in range(TURNS):
+            await turn(f"r{i}")
+        return (time.perf_counter() - t0) / TURNS
+
+    async def overlapped(request_id: str) -> None:
+        body = await chat.chat(req, {"message": "hi", "request_id": request_id})
+        assert body["assistant_message_seq"] > body["user_message_seq"]
+
+    before = asyncio.run(timed(lambda r: sequential_turn(memory, r)))
+    after = asyncio.run(timed(overlapped))
+    print(f"\n/chat per turn: sequential {before * 1000:.0f} ms, overlapped {after * 1000:.0f} ms")
+
+    # sequential: 5 round trips + pipeline; overlapped: open, max(append, pipeline), commit
+    assert after < before - 2 * RTT_S
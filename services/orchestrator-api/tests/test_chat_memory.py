@@ -0,0 +1,126 @@
+import threading
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("google.cloud.firestore")
+
+from google.cloud import firestore  # noqa: E402
+
+from app.memory import chat_memory  # noqa: E402
+from app.memory.chat_memory import PENDING_TAKEOVER_S, ChatMemoryStore, PendingAppend, transform_result  # noqa: E402
+
+
+@pytest.fixture
+def store(fs):
+    return ChatMemoryStore()
+
+
+def test_racing_turns_with_artifacts_keep_both_and_end_with_the_highest_seq(store, monkeypatch):
+    cid, _ = store.open_conversation("u", None)
+    store.append_message("u", cid, "user", "q", "r0")
+
+    # both transactions read the conversation before either commits
+    barrier = threading.Barrier(2, timeout=5)
+    plan = chat_memory.plan_txn_append
+    attempts = []
+
+    def planned_after_both_read(*args, **kwargs):
+        attempts.append(threading.current_thread().name)
+        if attempts.count(threading.current_thread().name) == 1:
+            barrier.wait()
+        return plan(*args, **kwargs)
+
+    monkeypatch.setattr(chat_memory, "plan_txn_append", planned_after_both_read)
+
+    seqs = {}
+
+    def turn(name):
+        seqs[name] = store.commit_turn("u", cid, f"answer {name}", f"req-{name}", artifacts=[{"artifact_id": name}])
+
+    threads = [threading.Thread(target=turn, args=(n,), name=n) for n in ("a", "b")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(seqs.values()) == [2, 3]
+    assert len(attempts) == 3  # the loser re-read and re-planned once
+    last = max(seqs, key=seqs.get)
+    conv = store.db.doc(store.refs("u", cid).conv.path)
+    assert conv["latest_artifact_ids"][-1] == last
+    assert sorted(conv["latest_artifact_ids"]) == ["a", "b"]
+    assert conv["last_message_seq"] == conv["next_seq"] - 1 == 3
+    for name, seq in seqs.items():
+        msg = store.db.doc(store.refs("u", cid).message(seq).path)
+        assert msg["artifacts"] == [{"artifact_id": name}] and msg["content"] == f"answer {name}"
+
+
+def test_transform_result_is_found_by_field_path():
+    data = {
+        "updated_at": firestore.SERVER_TIMESTAMP,
+        "title": "not a transform",
+        "summary.through_seq": firestore.Increment(1),
+        "next_seq": firestore.Increment(1),
+        "last_message_seq": firestore.Increment(1),
+        "summary_seq": firestore.Maximum(3),
+    }
+    # the server's order: last_message_seq, next_seq, summary.through_seq, summary_seq, updated_at
+    result = SimpleNamespace(transform_results=["L", "N", "S.T", "S_S", "U"])
+    got = [transform_result(result, data, f) for f in ("updated_at", "summary.through_seq", "last_message_seq")]
+    assert got == ["U", "S.T", "L"]
+
+
+# -- replays of a request whose fast-path append is between its two commits
+
+
+def between_commits(fs, store, cid, request_id, action):
+    """Run action(key_path) once, after the request key is claimed and before its message is written."""
+    key_path = store.refs("u", cid).key(request_id).path
+    calls = []
+
+    def hook(paths):
+        if key_path in paths and any("/messages/" in p for p in paths):
+            fs.before_commit.remove(hook)
+            calls.append(action(key_path))
+
+    fs.before_commit.append(hook)
+    return calls
+
+
+def test_replay_while_pending_fails_fast(fs, store):
+    cid, _ = store.open_conversation("u", None)
+
+    def replay(key_path):
+        with pytest.raises(PendingAppend) as e:
+            store.append_message("u", cid, "user", "q", "r1")
+        return e.value
+
+    calls = between_commits(fs, store, cid, "r1", replay)
+    assert store.append_message("u", cid, "user", "q", "r1") == 1
+    assert len(calls) == 1 and calls[0].retry_after_s > 0
+
+    # once the original append finished, a replay returns its seq
+    assert store.append_message("u", cid, "user", "q", "r1") == 1
+    assert store.db.doc(store.refs("u", cid).conv.path)["last_message_seq"] == 1
+
+
+def test_replay_takes_over_a_stale_claim(fs, store):
+    cid, _ = store.open_conversation("u", None)
+
+    def replay_after_takeover_window(key_path):
+        data, update_time = fs.docs[key_path]
+        fs.docs[key_path] = ({**data, "created_at": data["created_at"] - timedelta(seconds=PENDING_TAKEOVER_S)}, update_time)
+        return store.append_message("u", cid, "user", "q", "r1")
+
+    calls = between_commits(fs, store, cid, "r1", replay_after_takeover_window)
+    # the original's message commit fails its precondition on the rewritten key
+    # and it returns the takeover's seq; the seq it allocated (1) stays unused
+    assert store.append_message("u", cid, "user", "q", "r1") == 2
+    assert calls == [2]
+
+    refs = store.refs("u", cid)
+    assert store.db.doc(refs.key("r1").path)["seq"] == 2
+    assert store.db.doc(refs.message(1).path) is None
+    assert store.db.doc(refs.message(2).path)["content"] == "q"
@@ -0,0 +1,122 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("google.cloud.firestore")
+
+from app.memory import async_chat_memory  # noqa: E402
+
+
+class FakeMemory:
+    """In-process stand-in for AsyncChatMemoryStore; user writes block until released."""
+
+    def __init__(self):
+        self.user_written = asyncio.Event()
+        self.release_user = asyncio.Event()
+        self.messages = []
+
+    async def open_conversation(self, user_id, conversation_id):
+        return conversation_id or "c1", []
+
+    async def append_message(self, user_id, conversation_id, role, content, request_id):
+        await self.release_user.wait()
+        self.messages.append((role, request_id))
+        self.user_written.set()
+        return 1
+
+    async def commit_turn(self, user_id, conversation_id, content, request_id, pointers=None, artifacts=None):
+        self.messages.append(("assistant", request_id))
+        return 2
+
+
+@pytest.fixture
+def chat(monkeypatch):
+    monkeypatch.setattr(async_chat_memory, "get_async_db", lambda: None)
+    from app.routes import chat
+
+    return chat
+
+
+def _events(chunks):
+    return [(c.split(b"\n")[0][len(b"event: "):].decode(), json.loads(c.split(b"\n")[1][len(b"data: "):])) for c in chunks]
+
+
+def test_pipeline_events_are_not_held_behind_the_user_write(chat, monkeypatch):
+    async def run():
+        memory = FakeMemory()
+        monkeypatch.setattr(chat, "memory", memory)
+
+        async def pipeline(*, history, user_message, on_event=None):
+            await on_event("stage", {"stage": "serp", "status": "started"})
+            await memory.user_written.wait()
+            return {"assistant_text": "answer"}
+
+        monkeypatch.setattr(chat, "run_pipeline", pipeline)
+        stream = chat._chat_events("u", None, "r1", "hi")
+
+        first = [await stream.__anext__(), await stream.__anext__()]
+        assert [e for e, _ in _events(first)] == ["conversation", "stage"]
+
+        memory.release_user.set()
+        rest = _events([c async for c in stream])
+        names = [e for e, _ in rest]
+        assert names == ["user_message", "delta", "done"]
+        assert rest[-1][1]["assistant_message_seq"] == 2
+
+    asyncio.run(run())
+
+
+def test_disconnect_does_not_abort_the_turn(chat, monkeypatch):
+    async def run():
+        memory = FakeMemory()
+        memory.release_user.set()
+        monkeypatch.setattr(chat, "memory", memory)
+        finished = asyncio.Event()
+
+        async def pipeline(*, history, user_message, on_event=None):
+            await on_event("stage", {"stage": "serp", "status": "started"})
+            await finished.wait()
+            return {"assistant_text": "answer"}
+
+        monkeypatch.setattr(chat, "run_pipeline", pipeline)
+        stream = chat._chat_events("u", None, "r1", "hi")
+        await stream.__anext__()
+        await stream.aclose()  # client went away
+
+        finished.set()
+        for _ in range(50):
+            if not chat._turns:
+                break
+            await asyncio.sleep(0.01)
+        assert memory.messages == [("user", "r1:user"), ("assistant", "r1:assistant")]
+
+    asyncio.run(run())
+
+
+def test_replay_of_a_pending_request_is_a_retryable_409(chat, monkeypatch):
+    from app.memory.chat_memory import PendingAppend
+
+    class PendingMemory(FakeMemory):
+        async def append_message(self, user_id, conversation_id, role, content, request_id):
+            raise PendingAppend(request_id)
+
+    async def pipeline(*, history, user_message, on_event=None):
+        await asyncio.sleep(5)
+
+    monkeypatch.setattr(chat, "memory", PendingMemory())
+    monkeypatch.setattr(chat, "run_pipeline", pipeline)
+    req = SimpleNamespace(state=SimpleNamespace(user_id="u"), headers={})
+
+    resp = asyncio.run(chat.chat(req, {"message": "hi", "request_id": "r1"}))
+    assert resp.status_code == 409
+    assert resp.headers["retry-after"] == str(PendingAppend.retry_after_s)
+    assert json.loads(resp.body) == {"error": "request_in_progress", "request_id": "r1", "retryable": True}
+
+    async def stream():
+        return _events([c async for c in chat._chat_events("u", None, "r1", "hi")])
+
+    event, data = asyncio.run(stream())[-1]
+    assert event == "error" and data["retryable"] is True
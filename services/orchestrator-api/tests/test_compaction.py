@@ -0,0 +1,124 @@
+import pytest
+
+pytest.importorskip("google.cloud.firestore")
+
+from app.memory.chat_memory import ChatMemoryStore, RehydrationConfig  # noqa: E402
+from app.memory.compaction import SUMMARY_MODE, ExtractiveSummarizer, compact_conversation  # noqa: E402
+
+
+@pytest.fixture
+def store(fs):
+    return ChatMemoryStore()
+
+
+def conversation(store, n, last_n=4):
+    cid, _ = store.open_conversation("u", None, RehydrationConfig(last_n=last_n))
+    append(store, cid, 1, n)
+    return cid
+
+
+def append(store, cid, first, last):
+    for i in range(first, last + 1):
+        store.append_message("u", cid, "user" if i % 2 else "assistant", f"message {i}", f"r{i}")
+
+
+def compact(store, cid, **kwargs):
+    return compact_conversation(store, "u", cid, ExtractiveSummarizer(), **kwargs)
+
+
+def ranges(segments):
+    return [(s["start_seq"], s["end_seq"]) for s in segments]
+
+
+def summary_docs(store, cid):
+    prefix = store.refs("u", cid).conv.path + "/summaries/"
+    return [p[len(prefix):] for p in store.db.paths(prefix)]
+
+
+def conv(store, cid):
+    return store.db.doc(store.refs("u", cid).conv.path)
+
+
+def window(store, cid):
+    return store.db.doc(store.refs("u", cid).window.path)
+
+
+def test_fewer_messages_than_last_n_compacts_nothing(store):
+    cid = conversation(store, 3)
+    assert compact(store, cid, segment_size=2) == 0
+    assert summary_docs(store, cid) == []
+    assert conv(store, cid)["summary"] == {"through_seq": 0, "segments": []}
+
+
+def test_horizon_is_just_before_the_raw_window(store):
+    cid = conversation(store, 10)
+    # raw window = seqs 7..10, so 1..6 are summarized; the second segment is partial
+    assert compact(store, cid, segment_size=4) == 2
+
+    summary = conv(store, cid)["summary"]
+    assert summary["through_seq"] == 6
+    assert ranges(summary["segments"]) == [(1, 4), (5, 6)]
+    assert summary["segments"][0]["text"].splitlines()[0] == "user: message 1"
+    assert summary_docs(store, cid) == ["00000001-00000004", "00000005-00000006"]
+    assert window(store, cid)["summary"] == summary
+
+    # nothing new past the horizon: no writes
+    assert compact(store, cid, segment_size=4) == 0
+
+
+def test_partial_segment_is_resummarized_and_replaced(store):
+    cid = conversation(store, 10)
+    compact(store, cid, segment_size=4)
+    append(store, cid, 11, 13)
+
+    assert compact(store, cid, segment_size=4) == 2
+    summary = conv(store, cid)["summary"]
+    assert summary["through_seq"] == 9
+    assert ranges(summary["segments"]) == [(1, 4), (5, 8), (9, 9)]
+    # the superseded 5-6 doc went in the same batch as its replacement
+    assert summary_docs(store, cid) == ["00000001-00000004", "00000005-00000008", "00000009-00000009"]
+    assert "message 8" in summary["segments"][1]["text"]
+
+
+def test_segments_fold_past_max_segments(store):
+    cid = conversation(store, 10, last_n=2)
+    assert compact(store, cid, segment_size=2, max_segments=2) == 4
+
+    summary = conv(store, cid)["summary"]
+    assert summary["through_seq"] == 8
+    assert ranges(summary["segments"]) == [(1, 6), (7, 8)]
+    # the durable record keeps every segment; only the bounded copy folds
+    assert len(summary_docs(store, cid)) == 4
+
+
+def test_set_mode_without_new_segments(store):
+    cid = conversation(store, 3)
+    assert compact(store, cid, set_mode=True) == 0
+    assert conv(store, cid)["rehydration"]["mode"] == SUMMARY_MODE
+    assert window(store, cid)["rehydration"]["mode"] == SUMMARY_MODE
+    assert summary_docs(store, cid) == []
+
+    # already in summary mode: nothing to write
+    before = store.db._store.docs[store.refs("u", cid).conv.path][1]
+    assert compact(store, cid, set_mode=True) == 0
+    assert store.db._store.docs[store.refs("u", cid).conv.path][1] == before
+
+
+def test_missing_window_doc_is_left_alone(store):
+    cid = conversation(store, 10)
+    store.refs("u", cid).window.delete()
+
+    assert compact(store, cid, segment_size=4, set_mode=True) == 2
+    assert conv(store, cid)["summary"]["through_seq"] == 6
+    assert window(store, cid) is None
+
+    # rebuild_window picks the summary up
+    assert store.rebuild_window("u", cid)
+    assert ranges(window(store, cid)["summary"]["segments"]) == [(1, 4), (5, 6)]
+
+
+def test_extractive_summarizer_is_bounded():
+    msgs = [{"role": "user", "content": "a  b\nc " * 10}, {"role": "assistant", "content": "ok"}]
+    assert ExtractiveSummarizer(per_message_chars=10).summarize(msgs) == "user: a b c a b…\nassistant: ok"
+    assert ExtractiveSummarizer(per_message_chars=10, max_chars=20).summarize(msgs) == "user: a b c a b…\nass…"
+    assert ExtractiveSummarizer().summarize([]) == ""
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+pytest.importorskip("google.cloud.firestore")
+
+from app.memory.context_window import (  # noqa: E402
+    PINNED_MAX_BYTES,
+    SLOT_MAX_BYTES,
+    SUMMARY_MAX_BYTES,
+    WINDOW_RING,
+    build_window_doc,
+    read_window,
+    window_pins,
+    window_summary,
+)
+
+RH = {"mode": "last_n", "last_n": 4, "max_chars": None}
+
+
+def _msg(seq: int, content: str = None) -> dict:
+    return {"seq": seq, "role": "user", "content": f"m{seq}" if content is None else content}
+
+
+def _doc(seqs, pinned=(), summary=None, rehydration=RH) -> dict:
+    msgs = [_msg(s) for s in seqs]
+    doc = build_window_doc(rehydration, pinned, msgs, [m for m in msgs if m["seq"] in pinned], summary)
+    doc.pop("updated_at")
+    return doc
+
+
+def test_worst_case_window_fits_under_1_mib():
+    # every part at its inline limit
+    recent = [_msg(s, "x" * SLOT_MAX_BYTES) for s in range(101, 101 + WINDOW_RING)]
+    pinned = [_msg(s, "p" * (PINNED_MAX_BYTES // 6)) for s in range(1, 7)]
+    summary = {"through_seq": 0, "segments": [{"start_seq": 1, "end_seq": 2, "text": "s" * SUMMARY_MAX_BYTES}]}
+    doc = build_window_doc(RH, [m["seq"] for m in pinned], recent, pinned, summary)
+    assert not any(slot["spilled"] for slot in list(doc["slots"].values()) + list(doc["pinned"].values()))
+    doc.pop("updated_at")
+    assert len(json.dumps(doc).encode("utf-8")) < 1024 * 1024
+
+
+def test_oversized_summary_spills_and_falls_back():
+    summary = {"through_seq": 4, "segments": [{"start_seq": 1, "end_seq": 4, "text": "s" * (SUMMARY_MAX_BYTES + 1)}]}
+    assert window_summary(summary)["spilled"]
+    assert read_window(_doc(range(5, 9), summary=summary, rehydration={**RH, "mode": "summary+last_n"})) is None
+    assert read_window(_doc(range(5, 9), summary=summary)) is not None
+
+
+def test_holes_are_skipped_like_the_query():
+    view = read_window(_doc([1, 2, 3, 5, 6, 8]))
+    assert sorted(view.messages) == [3, 5, 6, 8]
+
+
+def test_ring_without_enough_messages_falls_back():
+    seqs = [40, 60, 80]  # older messages exist but the ring only reaches back to 49
+    assert read_window(_doc(seqs)) is None
+
+
+def test_pins_outside_the_ring_come_from_pinned_slots():
+    doc = _doc(list(range(1, 50)), pinned=[2])
+    view = read_window(doc)
+    assert sorted(view.messages) == [2, 46, 47, 48, 49]
+
+    doc.update(window_pins([_msg(3)]))
+    view = read_window(doc)
+    assert sorted(view.messages) == [3, 46, 47, 48, 49]
@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+
+from app.pipeline.dag import (
+    STATUS_ERROR,
+    STATUS_OK,
+    STATUS_SKIPPED,
+    STATUS_TIMEOUT,
+    Stage,
+    run_dag,
+    timings,
+)
+
+
+def const(value, delay=0.0):
+    async def fn(inputs):
+        await asyncio.sleep(delay)
+        return value
+    return fn
+
+
+async def fail(inputs):
+    raise RuntimeError("boom")
+
+
+def run(stages, **kwargs):
+    return asyncio.run(run_dag(stages, **kwargs))
+
+
+def test_inputs_are_the_dependency_outputs():
+    seen = {}
+
+    async def join(inputs):
+        seen.update(inputs)
+        return inputs["a"] + inputs["b"]
+
+    out = run([Stage("a", const(1)), Stage("b", const(2)), Stage("c", join, deps=("a", "b"))])
+    assert seen == {"a": 1, "b": 2}
+    assert out["c"].status == STATUS_OK and out["c"].output == 3
+
+
+def test_stage_timeout_is_per_stage():
+    out = run([Stage("slow", const("x", delay=5), timeout_s=0.05), Stage("fast", const("y"), timeout_s=0.05)])
+    assert out["slow"].status == STATUS_TIMEOUT
+    assert out["slow"].error == "exceeded 0.05s"
+    assert out["fast"].status == STATUS_OK
+
+
+@pytest.mark.parametrize("upstream", [fail, const(None, delay=5)])
+def test_failure_skips_downstream_when_all_inputs_are_required(upstream):
+    out = run([
+        Stage("a", upstream, timeout_s=0.05),
+        Stage("b", const(1), deps=("a",)),
+        Stage("c", const(2), deps=("b",)),
+    ])
+    assert out["a"].status in (STATUS_ERROR, STATUS_TIMEOUT)
+    assert out["b"].status == STATUS_SKIPPED and out["b"].output is None
+    # a skipped stage is not OK either, so the skip propagates
+    assert out["c"].status == STATUS_SKIPPED
+
+
+def test_partial_inputs_when_not_all_are_required():
+    seen = {}
+
+    async def debate(inputs):
+        seen.update(inputs)
+        return sorted(inputs)
+
+    out = run([
+        Stage("ok", const("evidence")),
+        Stage("bad", fail),
+        Stage("debate", debate, deps=("ok", "bad"), requires_all=False),
+        Stage("referee", const("verdict"), deps=("debate",)),
+    ])
+    assert out["bad"].status == STATUS_ERROR and out["bad"].error == "RuntimeError: boom"
+    assert seen == {"ok": "evidence"}
+    assert out["debate"].status == STATUS_OK and out["debate"].output == ["ok"]
+    assert out["referee"].status == STATUS_OK
+
+
+def test_requires_all_false_still_runs_with_no_inputs():
+    out = run([Stage("a", fail), Stage("b", const("alone"), deps=("a",), requires_all=False)])
+    assert out["b"].status == STATUS_OK and out["b"].output == "alone"
+
+
+def test_concurrency_is_bounded():
+    running, peak = [0], [0]
+
+    async def work(inputs):
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        await asyncio.sleep(0.02)
+        running[0] -= 1
+
+    out = run([Stage(f"s{i}", work) for i in range(8)], max_concurrency=3)
+    assert all(o.status == STATUS_OK for o in out.values())
+    assert peak[0] == 3
+
+
+@pytest.mark.parametrize(
+    "stages, message",
+    [
+        ([Stage("a", fail, deps=("b",)), Stage("b", fail, deps=("a",))], "cycle"),
+        ([Stage("a", fail, deps=("a",))], "cycle"),
+        ([Stage("a", fail, deps=("nope",))], "unknown stages"),
+        ([Stage("a", fail), Stage("a", fail)], "duplicate"),
+    ],
+)
+def test_invalid_graphs_are_rejected_before_running(stages, message):
+    with pytest.raises(ValueError, match=message):
+        run(stages)
+
+
+def test_timings_and_events_are_recorded():
+    events = []
+
+    async def on_event(kind, data):
+        events.append((kind, data["stage"], data["status"]))
+
+    stages = [Stage("a", const(1, delay=0.05)), Stage("b", fail, deps=("a",)), Stage("c", const(0), deps=("b",))]
+    out = run(stages, on_event=on_event)
+    assert out["a"].wall_ms >= 50
+    assert timings(out, ["a", "b", "c", "missing"]) == {
+        "a": {"status": STATUS_OK, "wall_ms": out["a"].wall_ms},
+        "b": {"status": STATUS_ERROR, "wall_ms": out["b"].wall_ms, "error": "RuntimeError: boom"},
+        "c": {"status": STATUS_SKIPPED, "wall_ms": 0},
+    }
+    assert events == [
+        ("stage", "a", "started"),
+        ("stage", "a", STATUS_OK),
+        ("stage", "b", "started"),
+        ("stage", "b", STATUS_ERROR),
+        ("stage", "c", STATUS_SKIPPED),
+    ]
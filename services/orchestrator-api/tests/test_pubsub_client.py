@@ -0,0 +1,48 @@
+import asyncio
+import concurrent.futures
+
+import pytest
+
+pytest.importorskip("google.cloud.pubsub_v1")
+
+from app.pipeline.contracts import FetchRequestV1  # noqa: E402
+from app.pipeline.pubsub_client import FetchPublisher  # noqa: E402
+
+
+class FakePublisherClient:
+    """Acks every message except those whose url says otherwise."""
+
+    def publish(self, topic, data, **attrs):
+        if b"rejected" in data:
+            raise ValueError("message too large")
+        f = concurrent.futures.Future()
+        if b"failed" in data:
+            f.set_exception(RuntimeError("publish failed"))
+        else:
+            f.set_result(f"m-{len(data)}")
+        return f
+
+
+def _publisher() -> FetchPublisher:
+    p = FetchPublisher.__new__(FetchPublisher)
+    p._topic_path = "projects/p/topics/fetch"
+    p._publisher = FakePublisherClient()
+    return p
+
+
+def _reqs(*urls):
+    return [
+        FetchRequestV1(url=u, request_id=f"r{i}", fetch_timestamp="t", rank=i, serp_query_id="q")
+        for i, u in enumerate(urls)
+    ]
+
+
+def test_publish_many_reports_each_failure_without_aborting_the_rest():
+    reqs = _reqs("https://a", "https://rejected", "https://failed", "https://b")
+    for outcomes in (
+        _publisher().publish_many(reqs),
+        asyncio.run(_publisher().publish_many_async(reqs)),
+    ):
+        assert [o.ok for o in outcomes] == [True, False, False, True]
+        assert outcomes[1].error == "ValueError: message too large"
+        assert outcomes[2].error == "RuntimeError: publish failed"
@@ -0,0 +1,73 @@
+import pytest
+
+pytest.importorskip("google.cloud.firestore")
+
+from app.memory.chat_memory import ChatMemoryStore, QueryRehydration, RehydrationConfig  # noqa: E402
+from app.memory.context_window import WINDOW_RING  # noqa: E402
+from app.memory.rehydration_cache import RehydrationCache  # noqa: E402
+
+GUESS = QueryRehydration.GUESS_LAST_N
+
+
+@pytest.fixture
+def store(fs):
+    return ChatMemoryStore(cache=RehydrationCache(max_bytes=0))  # every read goes to the store
+
+
+def conversation(store, n, **config):
+    cid, _ = store.open_conversation("u", None, RehydrationConfig(**config))
+    for i in range(1, n + 1):
+        store.append_message("u", cid, "user" if i % 2 else "assistant", f"message {i}", f"r{i}")
+    return cid
+
+
+def rehydrate(fs, store, cid):
+    fs.reads = 0
+    return [m["content"] for m in store.rehydrate("u", cid)]
+
+
+def messages(first, last):
+    return [f"message {i}" for i in range(first, last + 1)]
+
+
+def test_missing_window_falls_back_to_the_query_path(fs, store):
+    cid = conversation(store, 30, last_n=4)
+    from_window = rehydrate(fs, store, cid)
+    assert fs.reads == 1
+
+    store.refs("u", cid).window.delete()
+    assert rehydrate(fs, store, cid) == from_window == messages(27, 30)
+    # window miss + conversation doc + the guessed query, no requery
+    assert fs.reads == 1 + 1 + GUESS
+
+
+def test_oversized_window_falls_back_to_the_query_path(fs, store):
+    last_n = WINDOW_RING + 8  # more than the ring holds
+    cid = conversation(store, last_n + 2, last_n=last_n)
+    assert store.db.doc(store.refs("u", cid).window.path) is not None
+
+    assert rehydrate(fs, store, cid) == messages(3, last_n + 2)
+    assert fs.reads == 1 + 1 + GUESS + last_n
+
+
+def test_spilled_summary_falls_back_to_the_query_path(fs, store):
+    cid = conversation(store, 6, last_n=2, mode="summary+last_n")
+    summary = {"through_seq": 4, "segments": [{"start_seq": 1, "end_seq": 4, "text": "earlier"}]}
+    store.refs("u", cid).conv.update({"summary": summary})
+    store.refs("u", cid).window.update({"summary": {"through_seq": 4, "spilled": True}})
+
+    history = rehydrate(fs, store, cid)
+    assert history[-2:] == messages(5, 6)
+    assert "earlier" in history[0]
+    assert fs.reads == 1 + 1 + 6  # the guessed query returns all six
+
+
+def test_guess_caps_the_first_query():
+    recent = [{"seq": s, "role": "user", "content": f"message {s}"} for s in range(10, 0, -1)]
+    plan = QueryRehydration({"rehydration": {"last_n": GUESS}, "pinned_message_seqs": [1, 3, 40]}, recent)
+    assert not plan.requery
+    assert plan.missing_pins() == [40]
+
+    assert QueryRehydration({"rehydration": {"last_n": GUESS + 1}}, recent).requery
+    # no conversation doc: the defaults, which the guess matches
+    assert not QueryRehydration(None, recent).requery
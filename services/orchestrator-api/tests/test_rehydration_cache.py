@@ -0,0 +1,159 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("google.cloud.firestore")
+
+from app.memory import chat_memory  # noqa: E402
+from app.memory.async_chat_memory import AsyncChatMemoryStore  # noqa: E402
+from app.memory.chat_memory import ChatMemoryStore  # noqa: E402
+from app.memory.context_window import WINDOW_CHECK_FIELDS  # noqa: E402
+from app.memory.rehydration_cache import RehydrationCache  # noqa: E402
+
+
+def window_reads(fs):
+    """(masked, full) window reads since the last call."""
+    reads = [fp for path, fp in fs.log if path.endswith("/window/current")]
+    fs.log.clear()
+    return sum(fp == WINDOW_CHECK_FIELDS for fp in reads), sum(fp is None for fp in reads)
+
+
+def seed(store, n=3):
+    cid, _ = store.open_conversation("u", None)
+    for i in range(1, n + 1):
+        store.append_message("u", cid, "user", f"m{i}", f"r{i}")
+    return cid
+
+
+def contents(history):
+    return [m["content"] for m in history]
+
+
+def test_second_rehydrate_is_served_from_the_cache(fs):
+    store = ChatMemoryStore(cache=RehydrationCache())
+    cid = seed(store)
+
+    first = store.rehydrate("u", cid)
+    assert window_reads(fs) == (0, 1)
+    fs.reads = 0
+    assert store.rehydrate("u", cid) == first
+    assert window_reads(fs) == (1, 0)  # only the masked check
+    assert fs.reads == 1
+
+
+def test_append_updates_the_entry_in_place(fs):
+    store = ChatMemoryStore(cache=RehydrationCache())
+    cid = seed(store)
+    store.rehydrate("u", cid)
+
+    store.append_message("u", cid, "user", "m4", "r4")
+    store.commit_turn("u", cid, "a4", "r4-a", artifacts=[{"artifact_id": "x"}])  # transactional append
+    window_reads(fs)
+
+    assert contents(store.rehydrate("u", cid)) == ["m1", "m2", "m3", "m4", "a4"]
+    assert window_reads(fs) == (1, 0)
+
+
+def test_append_from_another_process_invalidates(fs):
+    store, other = ChatMemoryStore(cache=RehydrationCache()), ChatMemoryStore(cache=RehydrationCache())
+    cid = seed(store)
+    store.rehydrate("u", cid)
+
+    other.append_message("u", cid, "user", "m4", "r4")
+    window_reads(fs)
+    assert contents(store.rehydrate("u", cid)) == ["m1", "m2", "m3", "m4"]
+    assert window_reads(fs) == (1, 1)
+
+    # our next append is not the entry's next seq: dropped, not patched
+    store.rehydrate("u", cid)
+    other.append_message("u", cid, "user", "m5", "r5")
+    store.append_message("u", cid, "user", "m6", "r6")
+    window_reads(fs)
+    assert contents(store.rehydrate("u", cid))[-2:] == ["m5", "m6"]
+    assert window_reads(fs) == (0, 1)
+
+
+def test_attach_updates_the_cached_message(fs):
+    cache = RehydrationCache()
+    store = ChatMemoryStore(cache=cache)
+    cid = seed(store)
+    store.rehydrate("u", cid)
+
+    store.attach_artifacts("u", cid, 2, [{"artifact_id": "a1"}])
+    entry = cache.get(("default", "u", cid))
+    assert entry.messages[2]["artifacts"] == [{"artifact_id": "a1"}]
+
+    # the window doc does not carry artifacts: still a hit
+    window_reads(fs)
+    assert contents(store.rehydrate("u", cid)) == ["m1", "m2", "m3"]
+    assert window_reads(fs) == (1, 0)
+
+
+def test_pins_invalidate(fs):
+    store, other = ChatMemoryStore(cache=RehydrationCache()), ChatMemoryStore(cache=RehydrationCache())
+    cid, _ = store.open_conversation("u", None, chat_memory.RehydrationConfig(last_n=2))
+    for i in range(1, 5):
+        store.append_message("u", cid, "user", f"m{i}", f"r{i}")
+    assert contents(store.rehydrate("u", cid)) == ["m3", "m4"]
+
+    # this process: dropped on write
+    store.set_pinned_messages("u", cid, [1])
+    window_reads(fs)
+    assert contents(store.rehydrate("u", cid)) == ["m1", "m3", "m4"]
+    assert window_reads(fs) == (0, 1)
+
+    # another process: caught by the masked check
+    other.set_pinned_messages("u", cid, [2])
+    window_reads(fs)
+    assert contents(store.rehydrate("u", cid)) == ["m2", "m3", "m4"]
+    assert window_reads(fs) == (1, 1)
+
+
+def test_window_with_a_hole_is_not_cached(fs):
+    cache = RehydrationCache()
+    store = ChatMemoryStore(cache=cache)
+    cid = seed(store, n=2)
+    refs = store.refs("u", cid)
+    # seq 3 allocated, its message still in flight; seq 4 landed
+    refs.conv.update({"next_seq": 4, "last_message_seq": 3})
+    store.append_message("u", cid, "user", "m4", "r4")
+
+    assert contents(store.rehydrate("u", cid)) == ["m1", "m2", "m4"]
+    assert len(cache) == 0
+
+
+def test_evicted_by_size_lru_first(fs):
+    cache = RehydrationCache(max_bytes=3 * 1024)
+    store = ChatMemoryStore(cache=cache)
+    a, b = seed(store), seed(store)
+    store.rehydrate("u", a)
+    store.rehydrate("u", b)
+    assert len(cache) == 2
+
+    store.append_message("u", b, "user", "x" * 2200, "big")
+    assert cache.get(("default", "u", a)) is None
+    assert cache.get(("default", "u", b)) is not None
+    assert cache.size_bytes <= cache.max_bytes
+
+
+def test_zero_bytes_disables(fs, monkeypatch):
+    monkeypatch.setenv("CHAT_MEMORY_CACHE_BYTES", "0")
+    store = ChatMemoryStore()
+    cid = seed(store)
+    store.rehydrate("u", cid)
+    assert len(store.cache) == 0
+
+
+def test_async_store_uses_the_cache(fs):
+    async def run():
+        store = AsyncChatMemoryStore(cache=RehydrationCache())
+        cid, _ = await store.open_conversation("u", None)
+        await store.append_message("u", cid, "user", "m1", "r1")
+        assert contents(await store.rehydrate("u", cid)) == ["m1"]
+        await store.commit_turn("u", cid, "a1", "r1-a", artifacts=[{"artifact_id": "x"}])
+        window_reads(fs)
+        _, history = await store.open_conversation("u", cid)
+        assert contents(history) == ["m1", "a1"]
+        assert window_reads(fs) == (1, 0)
+
+    asyncio.run(run())
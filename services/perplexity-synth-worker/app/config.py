@@ -33,6 +33,7 @@ class Settings(BaseSettings):
     EVIDENCE_BUCKET: str = Field(..., description="GCS bucket for evidence outputs")
 
     # Optional runtime knobs
+    EVIDENCE_READ_CONCURRENCY: int = Field(8, description="Parallel GCS reads for v2 (pointer) requests")
     LOG_LEVEL: str = Field("INFO", description="Logging level")
 
 
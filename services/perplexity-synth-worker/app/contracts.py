@@ -18,6 +18,33 @@ class PerplexitySynthesisRequestV1(BaseModel):
     prompt_version: str
     evidence: List[EvidenceItem]
 
+class EvidenceTextRef(BaseModel):
+    gcs_uri: str                      # gs://bucket/.../clean.txt
+    generation: Optional[int] = None  # pinned object generation
+    size: Optional[int] = None
+    md5_hash: Optional[str] = None    # GCS base64 md5, verified on read
+    # evidence bundles: the text is one compressed section of the object
+    byte_range: Optional[List[int]] = None  # inclusive [first, last]
+    codec: Optional[Literal["zlib"]] = None
+    sha256: Optional[str] = None      # of the decompressed text
+
+class EvidenceItemV2(BaseModel):
+    source_url: HttpUrl
+    snapshot_gcs_path: str
+    fetched_at: str
+    checksum: str
+    text: EvidenceTextRef
+
+class PerplexitySynthesisRequestV2(BaseModel):
+    """Claim-check form of v1: cleaned text stays in GCS, the message carries pointers."""
+    schema_version: Literal["perplexity_synth_request.v2"]
+    tenant_id: str
+    job_id: str
+    conversation_id: str
+    pipeline_version: str
+    prompt_version: str
+    evidence: List[EvidenceItemV2]
+
 class SynthFinding(BaseModel):
     finding_id: str
     finding: str
@@ -1,9 +1,25 @@
+import base64
+import hashlib
 import json
+import zlib
+from functools import lru_cache
+from google.api_core.exceptions import NotFound
 from google.cloud import storage
-from typing import Tuple
+from typing import List, Optional, Tuple
+
+
+class EvidenceIntegrityError(Exception):
+    """A referenced evidence object is missing, oversized or fails its checksum."""
+
+
+@lru_cache(maxsize=1)
+def _client() -> storage.Client:
+    # one client per process (HTTP session + auth); thread-safe
+    return storage.Client()
+
 
 def write_json_if_absent(bucket_name: str, object_name: str, payload: dict) -> Tuple[str, bool]:
-    client = storage.Client()
+    client = _client()
     bucket = client.bucket(bucket_name)
     blob = bucket.blob(object_name)
 
@@ -13,3 +29,72 @@ def write_json_if_absent(bucket_name: str, object_name: str, payload: dict) -> T
     data = json.dumps(payload, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
     blob.upload_from_string(data, content_type="application/json")
     return f"gs://{bucket_name}/{object_name}", True
+
+
+def read_text_ref(
+    gcs_uri: str,
+    generation: Optional[int],
+    md5_hash: Optional[str],
+    max_bytes: int,
+    chunk_size: int = 256 * 1024,
+    byte_range: Optional[List[int]] = None,
+    codec: Optional[str] = None,
+    sha256: Optional[str] = None,
+) -> str:
+    """
+    Stream one evidence text from GCS in chunks: stops at max_bytes and
+    verifies the md5 while reading. generation pins the exact object the
+    runner referenced. With byte_range/codec the text is one compressed
+    section of an evidence bundle, fetched with a single ranged read.
+    """
+    if not gcs_uri.startswith("gs://"):
+        raise EvidenceIntegrityError(f"not a gs:// uri: {gcs_uri}")
+    bucket_name, _, object_name = gcs_uri[5:].partition("/")
+    blob = _client().bucket(bucket_name).blob(object_name, generation=generation)
+
+    if byte_range is not None:
+        data = _read_section(blob, gcs_uri, byte_range, codec, max_bytes)
+        if sha256 and hashlib.sha256(data).hexdigest() != sha256:
+            raise EvidenceIntegrityError(f"{gcs_uri} section sha256 mismatch")
+        return data.decode("utf-8")
+
+    md5 = hashlib.md5()
+    buf = bytearray()
+    try:
+        with blob.open("rb", chunk_size=chunk_size) as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                buf += chunk
+                if len(buf) > max_bytes:
+                    raise EvidenceIntegrityError(f"{gcs_uri} exceeds {max_bytes} bytes")
+                md5.update(chunk)
+    except NotFound:
+        raise EvidenceIntegrityError(f"{gcs_uri} (generation {generation}) not found")
+
+    if md5_hash and base64.b64encode(md5.digest()).decode("ascii") != md5_hash:
+        raise EvidenceIntegrityError(f"{gcs_uri} md5 mismatch")
+    return buf.decode("utf-8")
+
+
+def _read_section(blob: storage.Blob, gcs_uri: str, byte_range: List[int], codec: Optional[str], max_bytes: int) -> bytes:
+    first, last = int(byte_range[0]), int(byte_range[1])
+    try:
+        raw = blob.download_as_bytes(start=first, end=last)
+    except NotFound:
+        raise EvidenceIntegrityError(f"{gcs_uri} not found")
+    if codec is None:
+        data = raw
+    elif codec == "zlib":
+        d = zlib.decompressobj()
+        try:
+            # bounded inflate: never expand past the cap
+            data = d.decompress(raw, max_bytes + 1)
+        except zlib.error as ex:
+            raise EvidenceIntegrityError(f"{gcs_uri} corrupt section: {ex}")
+    else:
+        raise EvidenceIntegrityError(f"{gcs_uri} unknown codec {codec}")
+    if len(data) > max_bytes:
+        raise EvidenceIntegrityError(f"{gcs_uri} exceeds {max_bytes} bytes")
+    return data
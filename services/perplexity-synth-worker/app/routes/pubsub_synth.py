@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import base64
 import json
 import logging
@@ -10,7 +11,9 @@ from google.cloud import firestore
 
 from app.config import get_settings
 from app.contracts import (
+    EvidenceItem,
     PerplexitySynthesisRequestV1,
+    PerplexitySynthesisRequestV2,
     NormalizedEvidencePackV1,
     SynthFinding,
     Citation,
@@ -24,7 +27,7 @@ from app.firestore_jobs import (
     synth_mark_failed,
     STATE_SYNTH_COMPLETE,
 )
-from app.gcs_store import write_json_if_absent
+from app.gcs_store import EvidenceIntegrityError, read_text_ref, write_json_if_absent
 from app.perplexity import build_messages, call_perplexity, is_retryable_http
 from app.util import compute_request_hash
 
@@ -50,6 +53,42 @@ def _decode_pubsub_envelope(body: dict) -> tuple[str, dict]:
     return message_id, json.loads(raw)
 
 
+def _parse_request(payload: dict):
+    # both schemas are accepted while the runner rolls over to v2
+    if payload.get("schema_version") == "perplexity_synth_request.v2":
+        return PerplexitySynthesisRequestV2(**payload)
+    return PerplexitySynthesisRequestV1(**payload)
+
+
+async def _resolve_evidence(req: PerplexitySynthesisRequestV2, max_chars: int, concurrency: int) -> list[EvidenceItem]:
+    """Read every referenced text from GCS, `concurrency` at a time, in request order."""
+    sem = asyncio.Semaphore(max(1, concurrency))
+    # utf-8: at most 4 bytes per char
+    max_bytes = max_chars * 4
+
+    async def one(e) -> EvidenceItem:
+        async with sem:
+            text = await asyncio.to_thread(
+                read_text_ref,
+                e.text.gcs_uri,
+                e.text.generation,
+                e.text.md5_hash,
+                max_bytes,
+                byte_range=e.text.byte_range,
+                codec=e.text.codec,
+                sha256=e.text.sha256,
+            )
+        return EvidenceItem(
+            source_url=e.source_url,
+            snapshot_gcs_path=e.snapshot_gcs_path,
+            fetched_at=e.fetched_at,
+            checksum=e.checksum,
+            cleaned_text=text,
+        )
+
+    return list(await asyncio.gather(*(one(e) for e in req.evidence)))
+
+
 @router.post("/pubsub/push/synth")
 async def pubsub_push_synth(request: Request):
     # 🔑 LAZY SETTINGS LOAD (Cloud Run safe)
@@ -58,16 +97,18 @@ async def pubsub_push_synth(request: Request):
     body = await request.json()
     message_id, payload = _decode_pubsub_envelope(body)
 
-    req = PerplexitySynthesisRequestV1(**payload)
+    req = _parse_request(payload)
+    is_v2 = isinstance(req, PerplexitySynthesisRequestV2)
 
     if not req.evidence:
         raise HTTPException(status_code=400, detail="Evidence list is empty")
     if len(req.evidence) > cfg.max_evidence_items:
         raise HTTPException(status_code=400, detail="Evidence list too large")
 
-    for e in req.evidence:
-        if len(e.cleaned_text) > cfg.max_cleaned_text_chars:
-            raise HTTPException(status_code=400, detail="cleaned_text too large")
+    if not is_v2:
+        for e in req.evidence:
+            if len(e.cleaned_text) > cfg.max_cleaned_text_chars:
+                raise HTTPException(status_code=400, detail="cleaned_text too large")
 
     evidence_checksums = [e.checksum for e in req.evidence]
     request_hash = compute_request_hash(
@@ -98,12 +139,52 @@ async def pubsub_push_synth(request: Request):
         )
         return {"ok": True, "idempotent": True, "status": STATE_SYNTH_COMPLETE}
 
+    # v2: texts are read only once we know the synthesis will actually run
+    evidence = req.evidence
+    if is_v2:
+        try:
+            evidence = await _resolve_evidence(
+                req, cfg.max_cleaned_text_chars, cfg.EVIDENCE_READ_CONCURRENCY
+            )
+        except EvidenceIntegrityError as ex:
+            err = {
+                "class": "EVIDENCE_UNREADABLE",
+                "code": "INTEGRITY",
+                "retryable": False,
+                "message": str(ex)[:2000],
+            }
+            txn_fail = db.transaction()
+            synth_mark_failed(txn_fail, ref, request_hash, err)
+            return {"ok": True, "failed": True, "reason": "evidence_integrity"}
+        except Exception as ex:
+            err = {
+                "class": "EVIDENCE_READ_FAILED",
+                "code": "EXCEPTION",
+                "retryable": True,
+                "message": f"{type(ex).__name__}: {str(ex)}",
+            }
+            txn_fail = db.transaction()
+            synth_mark_failed(txn_fail, ref, request_hash, err)
+            raise HTTPException(status_code=500, detail="retryable_evidence_read_error")
+
+        for e in evidence:
+            if len(e.cleaned_text) > cfg.max_cleaned_text_chars:
+                err = {
+                    "class": "EVIDENCE_UNREADABLE",
+                    "code": "TOO_LARGE",
+                    "retryable": False,
+                    "message": f"cleaned_text too large: {e.source_url}",
+                }
+                txn_fail = db.transaction()
+                synth_mark_failed(txn_fail, ref, request_hash, err)
+                return {"ok": True, "failed": True, "reason": "cleaned_text_too_large"}
+
     # Build evidence blocks with stable E1..En IDs
     evidence_blocks = []
     evidence_sources = []
     citations = []
 
-    for idx, e in enumerate(req.evidence, start=1):
+    for idx, e in enumerate(evidence, start=1):
         eid = f"E{idx}"
         evidence_blocks.append(
             {
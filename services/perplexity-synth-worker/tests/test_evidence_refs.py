@@ -0,0 +1,187 @@
+import asyncio
+import base64
+import hashlib
+import io
+import zlib
+
+import pytest
+
+pytest.importorskip("google.cloud.storage")
+pytest.importorskip("fastapi")
+
+from google.api_core.exceptions import NotFound  # noqa: E402
+
+from app import gcs_store  # noqa: E402
+from app.contracts import PerplexitySynthesisRequestV1, PerplexitySynthesisRequestV2  # noqa: E402
+from app.gcs_store import EvidenceIntegrityError, read_text_ref  # noqa: E402
+from app.routes.pubsub_synth import _parse_request, _resolve_evidence  # noqa: E402
+
+TEXT = "Évidence text — " * 100
+DATA = TEXT.encode("utf-8")
+
+
+class _Blob:
+    def __init__(self, objects, name, generation):
+        self.objects, self.name, self.generation = objects, name, generation
+
+    def _data(self):
+        if (self.name, self.generation) not in self.objects:
+            raise NotFound(self.name)
+        return self.objects[self.name, self.generation]
+
+    def open(self, mode, chunk_size=None):
+        return io.BytesIO(self._data())
+
+    def download_as_bytes(self, start=None, end=None):
+        return self._data()[start:end + 1]  # end is inclusive, as in GCS
+
+
+class _Client:
+    def __init__(self, objects):
+        self.objects = objects
+
+    def bucket(self, name):
+        objects = self.objects
+        return type("_Bucket", (), {"blob": lambda _, n, generation=None: _Blob(objects, n, generation)})()
+
+
+@pytest.fixture
+def objects(monkeypatch):
+    objects = {}
+    monkeypatch.setattr(gcs_store, "_client", lambda: _Client(objects))
+    return objects
+
+
+def md5_b64(data):
+    return base64.b64encode(hashlib.md5(data).digest()).decode("ascii")
+
+
+def bundle(sections):
+    """An evidence bundle: header bytes, then zlib sections; returns (object, [byte_range, sha256] per section)."""
+    out, refs = bytearray(b"HDR0"), []
+    for text in sections:
+        z = zlib.compress(text)
+        refs.append(([len(out), len(out) + len(z) - 1], hashlib.sha256(text).hexdigest()))
+        out += z
+    return bytes(out), refs
+
+
+# -- read_text_ref: whole objects ----------------------------------------------
+
+
+def test_whole_object_read_verifies_md5(objects):
+    objects["e/clean.txt", 7] = DATA
+    assert read_text_ref("gs://b/e/clean.txt", 7, md5_b64(DATA), len(DATA), chunk_size=64) == TEXT
+
+    with pytest.raises(EvidenceIntegrityError, match="md5 mismatch"):
+        read_text_ref("gs://b/e/clean.txt", 7, md5_b64(b"other"), len(DATA))
+
+
+def test_whole_object_size_cap(objects):
+    objects["e/clean.txt", None] = DATA
+    with pytest.raises(EvidenceIntegrityError, match=f"exceeds {len(DATA) - 1} bytes"):
+        read_text_ref("gs://b/e/clean.txt", None, None, len(DATA) - 1, chunk_size=64)
+
+
+def test_missing_generation_and_bad_uri(objects):
+    objects["e/clean.txt", 7] = DATA
+    with pytest.raises(EvidenceIntegrityError, match="generation 8"):
+        read_text_ref("gs://b/e/clean.txt", 8, None, len(DATA))
+    with pytest.raises(EvidenceIntegrityError, match="not a gs://"):
+        read_text_ref("https://b/e/clean.txt", 7, None, len(DATA))
+
+
+# -- read_text_ref: bundle sections ----------------------------------------------
+
+
+def test_section_read_inflates_and_verifies_sha256(objects):
+    obj, refs = bundle([b"first section", DATA])
+    objects["e/evidence.bundle", 3] = obj
+    (rng, sha) = refs[1]
+    assert read_text_ref("gs://b/e/evidence.bundle", 3, None, len(DATA), byte_range=rng, codec="zlib", sha256=sha) == TEXT
+
+    with pytest.raises(EvidenceIntegrityError, match="sha256 mismatch"):
+        read_text_ref("gs://b/e/evidence.bundle", 3, None, len(DATA), byte_range=rng, codec="zlib", sha256=refs[0][1])
+
+
+def test_section_inflate_is_bounded(objects, monkeypatch):
+    bomb = b"\0" * (8 * 1024 * 1024)
+    obj, refs = bundle([bomb])
+    objects["e/evidence.bundle", None] = obj
+    inflated = []
+    real = zlib.decompressobj
+
+    class Spy:
+        def __init__(self):
+            self.d = real()
+
+        def decompress(self, data, max_length=0):
+            out = self.d.decompress(data, max_length)
+            inflated.append(len(out))
+            return out
+
+    monkeypatch.setattr(gcs_store.zlib, "decompressobj", Spy)
+    with pytest.raises(EvidenceIntegrityError, match="exceeds 1000 bytes"):
+        read_text_ref("gs://b/e/evidence.bundle", None, None, 1000, byte_range=refs[0][0], codec="zlib")
+    assert inflated == [1001]  # never inflated past the cap + 1
+
+
+def test_section_corrupt_or_unknown_codec(objects):
+    obj, refs = bundle([DATA])
+    objects["e/evidence.bundle", None] = obj
+    first, last = refs[0][0]
+    with pytest.raises(EvidenceIntegrityError, match="corrupt section"):
+        read_text_ref("gs://b/e/evidence.bundle", None, None, len(DATA), byte_range=[first - 4, last], codec="zlib")
+    with pytest.raises(EvidenceIntegrityError, match="unknown codec"):
+        read_text_ref("gs://b/e/evidence.bundle", None, None, len(DATA), byte_range=[first, last], codec="br")
+    # uncompressed section: the range is the text
+    objects["e/plain", None] = b"xx" + DATA
+    assert read_text_ref("gs://b/e/plain", None, None, len(DATA), byte_range=[2, len(DATA) + 1]) == TEXT
+
+
+# -- request parsing and resolution ----------------------------------------------
+
+BASE = {
+    "tenant_id": "t",
+    "job_id": "j",
+    "conversation_id": "c",
+    "pipeline_version": "p",
+    "prompt_version": "v",
+}
+ITEM = {"source_url": "https://example.com/a", "snapshot_gcs_path": "gs://b/e/raw.html", "fetched_at": "now", "checksum": "c1"}
+
+
+def test_parse_v1_and_v2():
+    v1 = _parse_request({**BASE, "schema_version": "perplexity_synth_request.v1", "evidence": [{**ITEM, "cleaned_text": "t"}]})
+    assert isinstance(v1, PerplexitySynthesisRequestV1) and v1.evidence[0].cleaned_text == "t"
+
+    text_ref = {"gcs_uri": "gs://b/e/evidence.bundle", "generation": 3, "byte_range": [4, 20], "codec": "zlib", "sha256": "s"}
+    v2 = _parse_request({**BASE, "schema_version": "perplexity_synth_request.v2", "evidence": [{**ITEM, "text": text_ref}]})
+    assert isinstance(v2, PerplexitySynthesisRequestV2)
+    assert v2.evidence[0].text.byte_range == [4, 20] and v2.evidence[0].text.codec == "zlib"
+
+
+def test_parse_rejects_mixed_shapes():
+    with pytest.raises(ValueError):  # v2 label with v1 items
+        _parse_request({**BASE, "schema_version": "perplexity_synth_request.v2", "evidence": [{**ITEM, "cleaned_text": "t"}]})
+    with pytest.raises(ValueError):  # no schema_version falls back to v1, which requires it
+        _parse_request({**BASE, "evidence": []})
+
+
+def test_resolve_evidence_keeps_request_order(objects):
+    texts = [f"text {i} ".encode() * (50 - i) for i in range(5)]
+    obj, refs = bundle(texts)
+    objects["e/evidence.bundle", 3] = obj
+    uri = "gs://b/e/evidence.bundle"
+    items = [
+        {**ITEM, "checksum": f"c{i}", "text": {"gcs_uri": uri, "generation": 3, "byte_range": rng, "codec": "zlib", "sha256": sha}}
+        for i, (rng, sha) in enumerate(refs)
+    ]
+    req = _parse_request({**BASE, "schema_version": "perplexity_synth_request.v2", "evidence": items})
+    out = asyncio.run(_resolve_evidence(req, max_chars=1000, concurrency=2))
+    assert [e.cleaned_text.encode() for e in out] == texts
+    assert [e.checksum for e in out] == [f"c{i}" for i in range(5)]
+
+    # the cap is max_chars * 4 bytes (utf-8 worst case)
+    with pytest.raises(EvidenceIntegrityError, match="exceeds 40 bytes"):
+        asyncio.run(_resolve_evidence(req, max_chars=10, concurrency=2))
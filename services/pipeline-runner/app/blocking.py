@@ -0,0 +1,40 @@
+# app/blocking.py
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from app.config import get_settings
+
+T = TypeVar("T")
+
+_executor: ThreadPoolExecutor | None = None
+_lock = threading.Lock()
+
+
+def get_blocking_executor() -> ThreadPoolExecutor:
+    """
+    Bounded pool for the sync SDKs (Firestore, GCS, Pub/Sub, requests).
+    Keeps the event loop free for Pub/Sub push acks; at most
+    blocking_io_threads blocking calls run at once per process.
+    """
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=get_settings().blocking_io_threads,
+                    thread_name_prefix="blocking-io",
+                )
+    return _executor
+
+
+async def run_blocking(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_blocking_executor(),
+        functools.partial(fn, *args, **kwargs),
+    )
@@ -49,6 +49,47 @@ class Settings(BaseSettings):
         ),
     )
 
+    # Publisher batching / flow control (one client per process)
+    pubsub_batch_max_messages: int = Field(
+        default=100,
+        validation_alias=AliasChoices(
+            "PUBSUB_BATCH_MAX_MESSAGES",
+            "ARS_PUBSUB_BATCH_MAX_MESSAGES",
+        ),
+    )
+
+    pubsub_batch_max_bytes: int = Field(
+        default=1_000_000,
+        validation_alias=AliasChoices(
+            "PUBSUB_BATCH_MAX_BYTES",
+            "ARS_PUBSUB_BATCH_MAX_BYTES",
+        ),
+    )
+
+    pubsub_batch_max_latency_s: float = Field(
+        default=0.01,
+        validation_alias=AliasChoices(
+            "PUBSUB_BATCH_MAX_LATENCY_S",
+            "ARS_PUBSUB_BATCH_MAX_LATENCY_S",
+        ),
+    )
+
+    pubsub_flow_max_messages: int = Field(
+        default=1000,
+        validation_alias=AliasChoices(
+            "PUBSUB_FLOW_MAX_MESSAGES",
+            "ARS_PUBSUB_FLOW_MAX_MESSAGES",
+        ),
+    )
+
+    pubsub_flow_max_bytes: int = Field(
+        default=50_000_000,
+        validation_alias=AliasChoices(
+            "PUBSUB_FLOW_MAX_BYTES",
+            "ARS_PUBSUB_FLOW_MAX_BYTES",
+        ),
+    )
+
     # >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
     # Phase VI — Perplexity Synthesis (NEW)
     # >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
@@ -61,6 +102,15 @@ class Settings(BaseSettings):
         description="Pub/Sub topic for Phase VI Perplexity synthesis",
     )
 
+    perplexity_synth_schema: str = Field(
+        default="v2",
+        validation_alias=AliasChoices(
+            "PERPLEXITY_SYNTH_SCHEMA",
+            "ARS_PERPLEXITY_SYNTH_SCHEMA",
+        ),
+        description="v2 = GCS pointers (claim check), v1 = cleaned text inlined in the message",
+    )
+
     perplexity_prompt_version: str = Field(
         default="perplexity_synth_prompt.v1",
         validation_alias=AliasChoices(
@@ -81,6 +131,55 @@ class Settings(BaseSettings):
         ),
     )
 
+    evidence_load_concurrency: int = Field(
+        default=8,
+        validation_alias=AliasChoices(
+            "EVIDENCE_LOAD_CONCURRENCY",
+            "ARS_EVIDENCE_LOAD_CONCURRENCY",
+        ),
+        description="Parallel GCS downloads when assembling a synthesis request",
+    )
+
+    # Completion policy (app.state.completion)
+    evidence_quorum: float = Field(
+        default=1.0,
+        validation_alias=AliasChoices(
+            "EVIDENCE_QUORUM",
+            "ARS_EVIDENCE_QUORUM",
+        ),
+        description="Fraction of URLs that must be written before synthesis (k-of-n)",
+    )
+
+    evidence_grace_s: float = Field(
+        default=0.0,
+        validation_alias=AliasChoices(
+            "EVIDENCE_GRACE_S",
+            "ARS_EVIDENCE_GRACE_S",
+        ),
+        description="Extra wait for stragglers once quorum is reached",
+    )
+
+    evidence_deadline_s: float = Field(
+        default=600.0,
+        validation_alias=AliasChoices(
+            "EVIDENCE_DEADLINE_S",
+            "ARS_EVIDENCE_DEADLINE_S",
+        ),
+        description="Synthesize with what has arrived this long after fan-out (0 = never)",
+    )
+
+    evidence_sweep_interval_s: float = Field(
+        default=30.0,
+        validation_alias=AliasChoices(
+            "EVIDENCE_SWEEP_INTERVAL_S",
+            "ARS_EVIDENCE_SWEEP_INTERVAL_S",
+        ),
+        description=(
+            "In-process sweep for overdue WAITING_EVIDENCE jobs (0 = off). The deployed service "
+            "sets 0: Cloud Scheduler calls POST /tasks/sweep/evidence (infra/modules/pipeline_runner)"
+        ),
+    )
+
     evidence_object_prefix: str = Field(
         default="tenants/",
         validation_alias=AliasChoices(
@@ -105,12 +204,56 @@ class Settings(BaseSettings):
     serpapi_hl: str = Field(default="en")
     serpapi_top_n: int = Field(default=10)
 
+    # SERP result cache (in-process LRU + shared Firestore tier)
+    serp_cache_ttl_s: float = Field(
+        default=6 * 3600,
+        validation_alias=AliasChoices(
+            "SERP_CACHE_TTL_S",
+            "ARS_SERP_CACHE_TTL_S",
+        ),
+    )
+
+    # empty results (transient upstream hiccups, too-narrow queries) are cached
+    # briefly and only in-process
+    serp_cache_empty_ttl_s: float = Field(
+        default=60,
+        validation_alias=AliasChoices(
+            "SERP_CACHE_EMPTY_TTL_S",
+            "ARS_SERP_CACHE_EMPTY_TTL_S",
+        ),
+    )
+
+    serp_cache_max_entries: int = Field(
+        default=1024,
+        validation_alias=AliasChoices(
+            "SERP_CACHE_MAX_ENTRIES",
+            "ARS_SERP_CACHE_MAX_ENTRIES",
+        ),
+    )
+
+    serp_cache_shared: bool = Field(
+        default=True,
+        validation_alias=AliasChoices(
+            "SERP_CACHE_SHARED",
+            "ARS_SERP_CACHE_SHARED",
+        ),
+    )
+
     # ======================
     # Runtime behavior
     # ======================
     runner_pipeline_version: str = Field(default="v1")
     max_urls_hard_cap: int = Field(default=25)
 
+    # threads for blocking SDK calls made from async handlers / background jobs
+    blocking_io_threads: int = Field(
+        default=16,
+        validation_alias=AliasChoices(
+            "BLOCKING_IO_THREADS",
+            "ARS_BLOCKING_IO_THREADS",
+        ),
+    )
+
     model_config = SettingsConfigDict(
         case_sensitive=False,
         extra="ignore",
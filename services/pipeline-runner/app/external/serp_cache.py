@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+from google.cloud import firestore
+
+from app.config import Settings
+from app.external.serpapi import SerpApiClient
+from app.logging import get_logger
+from app.state.firestore import get_db
+
+log = get_logger("pipeline-runner.serp_cache")
+
+
+def normalize_query(query: str) -> str:
+    # whitespace and case differences should hit the same entry
+    return " ".join((query or "").split()).casefold()
+
+
+def cache_key(query: str, engine: str, gl: str, hl: str, top_n: int) -> str:
+    spec = {
+        "q": normalize_query(query),
+        "engine": engine.lower(),
+        "gl": gl.lower(),
+        "hl": hl.lower(),
+        "top_n": int(top_n),
+    }
+    raw = json.dumps(spec, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+class _LocalLru:
+    """Size-bounded LRU of (expires_at_monotonic, urls)."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: OrderedDict[str, tuple[float, list[str]]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> list[str] | None:
+        hit = self._data.get(key)
+        if hit is None:
+            return None
+        expires, urls = hit
+        if expires <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return list(urls)
+
+    def put(self, key: str, urls: list[str], ttl_s: float) -> None:
+        self._data[key] = (time.monotonic() + ttl_s, list(urls))
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+
+class CachedSerpClient:
+    """
+    SerpApiClient with a result cache, same search_top_urls interface.
+
+    Lookup order: in-process LRU -> shared Firestore tier (serp_cache/{key},
+    shared by every instance and tenant) -> SerpAPI. Concurrent identical
+    searches in this process wait on one upstream call. Errors are never
+    cached; empty results only in-process, for empty_ttl_s. Shared-tier docs
+    carry expires_at for a Firestore TTL policy.
+    """
+
+    def __init__(
+        self,
+        upstream: SerpApiClient,
+        *,
+        ttl_s: float,
+        max_entries: int,
+        empty_ttl_s: float = 60,
+        db: firestore.Client | None = None,
+        collection: str = "serp_cache",
+    ):
+        self.upstream = upstream
+        self.ttl_s = ttl_s
+        self.empty_ttl_s = empty_ttl_s
+        self.db = db
+        self.collection = collection
+        self._lru = _LocalLru(max_entries)
+        self._inflight: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {"local_hits": 0, "shared_hits": 0, "misses": 0, "coalesced": 0, "errors": 0}
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._stats)
+            s["local_entries"] = len(self._lru)
+        lookups = s["local_hits"] + s["shared_hits"] + s["misses"] + s["coalesced"]
+        s["hit_ratio"] = round((lookups - s["misses"]) / lookups, 4) if lookups else 0.0
+        return s
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def search_top_urls(self, query: str, top_n: int) -> list[str]:
+        u = self.upstream
+        key = cache_key(query, u.engine, u.gl, u.hl, top_n)
+
+        with self._lock:
+            urls = self._lru.get(key)
+            if urls is not None:
+                self._stats["local_hits"] += 1
+                return urls
+            fut = self._inflight.get(key)
+            leader = fut is None
+            if leader:
+                fut = Future()
+                self._inflight[key] = fut
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            return list(fut.result())
+
+        try:
+            urls = self._load_shared(key)
+            if urls is not None:
+                self._count("shared_hits")
+            else:
+                self._count("misses")
+                urls = u.search_top_urls(query=query, top_n=top_n)
+                if urls:
+                    self._store_shared(key, query, top_n, urls)
+            with self._lock:
+                self._lru.put(key, urls, self.ttl_s if urls else self.empty_ttl_s)
+            fut.set_result(urls)
+            return list(urls)
+        except BaseException as e:
+            self._count("errors")
+            fut.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    # -------- shared tier (best effort: failures fall through to SerpAPI) --------
+
+    def _ref(self, key: str):
+        return self.db.collection(self.collection).document(key)
+
+    def _load_shared(self, key: str) -> list[str] | None:
+        if self.db is None:
+            return None
+        try:
+            snap = self._ref(key).get()
+        except Exception as e:
+            log.warning("SERP cache shared read failed", extra={"error": str(e)})
+            return None
+        if not snap.exists:
+            return None
+        doc = snap.to_dict() or {}
+        expires_at = doc.get("expires_at")
+        if expires_at is None or expires_at <= datetime.now(timezone.utc):
+            return None
+        # entries written before empty results stopped being shared are misses
+        return list(doc.get("urls") or []) or None
+
+    def _store_shared(self, key: str, query: str, top_n: int, urls: list[str]) -> None:
+        if self.db is None:
+            return
+        u = self.upstream
+        try:
+            self._ref(key).set({
+                "urls": urls,
+                "query_norm": normalize_query(query),
+                "engine": u.engine,
+                "gl": u.gl,
+                "hl": u.hl,
+                "top_n": int(top_n),
+                "created_at": firestore.SERVER_TIMESTAMP,
+                "expires_at": datetime.now(timezone.utc) + timedelta(seconds=self.ttl_s),
+            })
+        except Exception as e:
+            log.warning("SERP cache shared write failed", extra={"error": str(e)})
+
+
+@lru_cache(maxsize=1)
+def _cached_client(
+    api_key: str,
+    engine: str,
+    gl: str,
+    hl: str,
+    ttl_s: float,
+    empty_ttl_s: float,
+    max_entries: int,
+    shared: bool,
+    project_id: str,
+    database: str | None,
+) -> CachedSerpClient:
+    return CachedSerpClient(
+        SerpApiClient(api_key=api_key, engine=engine, gl=gl, hl=hl),
+        ttl_s=ttl_s,
+        max_entries=max_entries,
+        empty_ttl_s=empty_ttl_s,
+        db=get_db(project_id, database) if shared else None,
+    )
+
+
+def get_serp_client(settings: Settings) -> CachedSerpClient:
+    """Process-wide cached SERP client (the LRU and in-flight map must be shared)."""
+    return _cached_client(
+        settings.serpapi_api_key,
+        settings.serpapi_engine,
+        settings.serpapi_gl,
+        settings.serpapi_hl,
+        settings.serp_cache_ttl_s,
+        settings.serp_cache_empty_ttl_s,
+        settings.serp_cache_max_entries,
+        settings.serp_cache_shared,
+        settings.project_id,
+        settings.firestore_database,
+    )
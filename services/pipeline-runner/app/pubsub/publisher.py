@@ -1,24 +1,84 @@
 from __future__ import annotations
 
 import json
+from concurrent import futures as cf
+from functools import lru_cache
+from typing import Iterable
+
 from google.cloud import pubsub_v1
 
+from app.config import Settings
+
+
+@lru_cache(maxsize=4)
+def _shared_client(
+    max_messages: int,
+    max_bytes: int,
+    max_latency_s: float,
+    flow_max_messages: int,
+    flow_max_bytes: int,
+) -> pubsub_v1.PublisherClient:
+    """
+    One PublisherClient (gRPC channel + auth) per process and config.
+    Batching lets a job's fan-out leave in a single flush; flow control
+    blocks publishers instead of buffering without bound.
+    """
+    return pubsub_v1.PublisherClient(
+        batch_settings=pubsub_v1.types.BatchSettings(
+            max_messages=max_messages,
+            max_bytes=max_bytes,
+            max_latency=max_latency_s,
+        ),
+        publisher_options=pubsub_v1.types.PublisherOptions(
+            flow_control=pubsub_v1.types.PublishFlowControl(
+                message_limit=flow_max_messages,
+                byte_limit=flow_max_bytes,
+                limit_exceeded_behavior=pubsub_v1.types.LimitExceededBehavior.BLOCK,
+            ),
+        ),
+    )
+
+
+def get_publisher(settings: Settings) -> "PubSubPublisher":
+    """Process-wide publisher configured from settings."""
+    client = _shared_client(
+        settings.pubsub_batch_max_messages,
+        settings.pubsub_batch_max_bytes,
+        settings.pubsub_batch_max_latency_s,
+        settings.pubsub_flow_max_messages,
+        settings.pubsub_flow_max_bytes,
+    )
+    return PubSubPublisher(settings.project_id, client=client)
+
+
+def _encode(payload: dict) -> bytes:
+    return json.dumps(
+        payload,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    ).encode("utf-8")
+
 
 class PubSubPublisher:
-    def __init__(self, project_id: str):
+    def __init__(self, project_id: str, client: pubsub_v1.PublisherClient | None = None):
         self.project_id = project_id
-        self._publisher = None
+        self._publisher = client
 
     @property
-    def publisher(self):
+    def publisher(self) -> pubsub_v1.PublisherClient:
+        # Client is created lazily, only when needed, and then reused
         if self._publisher is None:
             self._publisher = pubsub_v1.PublisherClient()
         return self._publisher
 
-
-    def _client(self) -> pubsub_v1.PublisherClient:
-        # Client is created lazily, only when needed
-        return pubsub_v1.PublisherClient()
+    def _submit(self, topic_name: str, payload: dict, attributes: dict | None) -> cf.Future:
+        publisher = self.publisher
+        topic_path = publisher.topic_path(self.project_id, topic_name)
+        return publisher.publish(
+            topic_path,
+            data=_encode(payload),
+            **(attributes or {}),
+        )
 
     def publish_json(
         self,
@@ -26,18 +86,27 @@ class PubSubPublisher:
         payload: dict,
         attributes: dict | None = None,
     ) -> str:
-        publisher = self._client()
-        topic_path = publisher.topic_path(self.project_id, topic_name)
+        return self._submit(topic_name, payload, attributes).result()
 
-        data = json.dumps(
-            payload,
-            separators=(",", ":"),
-            ensure_ascii=False,
-        ).encode("utf-8")
+    def publish_json_many(
+        self,
+        topic_name: str,
+        messages: Iterable[tuple[dict, dict | None]],
+        timeout: float | None = 60,
+    ) -> list[str]:
+        """
+        Publish (payload, attributes) pairs as one batch and return once every
+        future has resolved, in input order. Raises after all have settled if
+        any message failed, so partial fan-out is never silent.
+        """
+        pending = [self._submit(topic_name, payload, attrs) for payload, attrs in messages]
+        done, not_done = cf.wait(pending, timeout=timeout)
+        if not_done:
+            raise TimeoutError(f"{len(not_done)}/{len(pending)} publishes to {topic_name} not acked in {timeout}s")
 
-        future = publisher.publish(
-            topic_path,
-            data=data,
-            **(attributes or {}),
-        )
-        return future.result()
+        errors = [f.exception() for f in pending if f.exception() is not None]
+        if errors:
+            raise RuntimeError(
+                f"{len(errors)}/{len(pending)} publishes to {topic_name} failed; first: {errors[0]!r}"
+            ) from errors[0]
+        return [f.result() for f in pending]
@@ -2,21 +2,16 @@ from __future__ import annotations
 
 import base64
 import json
-from typing import Dict, Any
 
 from fastapi import APIRouter, HTTPException, Request, Depends
-from google.cloud import firestore, storage
 
 from app.config import Settings, get_settings
 from app.logging import get_logger
+from app.blocking import run_blocking
 from app.state.firestore import get_db
-from app.state.dedupe import claim_idempotency
-from app.state.jobs import (
-    mark_evidence_written,
-    is_job_evidence_complete,
-    job_ref,
-)
-from app.pubsub.publisher import PubSubPublisher
+from app.state.dedupe import recent_messages
+from app.state.jobs import mark_evidence_failed, mark_evidence_written
+from app.synthesis import advance_job
 
 router = APIRouter()
 log = get_logger("pipeline-runner.evidence")
@@ -51,14 +46,6 @@ def _parse_job_from_object(object_name: str) -> tuple[str | None, str | None, st
         return None, None, None
 
 
-def _load_gcs_text(bucket: storage.Bucket, obj: str) -> str:
-    return bucket.blob(obj).download_as_text(encoding="utf-8")
-
-
-def _load_gcs_json(bucket: storage.Bucket, obj: str) -> Dict[str, Any]:
-    return json.loads(bucket.blob(obj).download_as_text(encoding="utf-8"))
-
-
 @router.post("/pubsub/push/evidence")
 async def pubsub_evidence(
     request: Request,
@@ -68,6 +55,8 @@ async def pubsub_evidence(
     message_id, payload = _decode_pubsub_envelope(body)
 
     event_type = payload.get("event_type")
+    if event_type == "EVIDENCE_FETCH_FAILED":
+        return await _on_fetch_failed(settings, message_id, payload.get("payload") or {})
     if event_type != "EVIDENCE_OBJECT_WRITTEN":
         return {"ok": True, "ignored": True, "event_type": event_type}
 
@@ -81,83 +70,85 @@ async def pubsub_evidence(
     if not tenant_id or not job_id or not url_id:
         return {"ok": True, "ignored": True, "reason": "unparseable_object_name"}
 
-    db = get_db(settings.project_id, settings.firestore_database)
-
-    if not claim_idempotency(db, tenant_id, job_id, f"evidence:{message_id}"):
+    key = f"evidence:{message_id}"
+    if recent_messages.seen(key):
         return {"ok": True, "deduped": True}
 
-    txn = db.transaction()
-    res = mark_evidence_written(
-        txn,
+    db = get_db(settings.project_id, settings.firestore_database)
+
+    # idempotent by construction: the per-URL create is the dedupe claim
+    res = await run_blocking(
+        mark_evidence_written,
         db,
         tenant_id,
         job_id,
         url_id,
         raw_object=obj,
+        message_id=message_id,
     )
-
     if not res.get("job_exists"):
+        recent_messages.add(key)
         return {"ok": True, "ignored": True, "reason": "job_missing"}
 
-    snap = job_ref(db, tenant_id, job_id).get()
-    job_doc = snap.to_dict() or {}
-
-    if not is_job_evidence_complete(job_doc):
-        return {"ok": True, "job_id": job_id, "url_id": url_id}
-
-    # ---------------------------
-    # PHASE VI — SYNTHESIS TRIGGER
-    # ---------------------------
-
-    evidence_items = job_doc.get("evidence", {}).get("items", {})
-    urls_list = job_doc.get("urls", {}).get("list", [])
-
-    storage_client = storage.Client()
-    bucket = storage_client.bucket(bucket_name)
-
-    ordered_evidence = []
-
-    for u in urls_list:
-        url_id = u["url_id"]
-        ev = evidence_items.get(url_id)
-        if not ev:
-            continue
-
-        raw_object = ev["raw_object"]
-        prefix = raw_object.rsplit("/", 1)[0] + "/"
-
-        meta = _load_gcs_json(bucket, prefix + "meta.json")
-        clean_text = _load_gcs_text(bucket, prefix + "clean.txt")
-
-        ordered_evidence.append({
-            "source_url": ev["url"],
-            "snapshot_gcs_path": f"gs://{bucket_name}/{prefix}",
-            "fetched_at": meta["fetched_at"],
-            "checksum": meta["hash_raw"],
-            "cleaned_text": clean_text,
-        })
-
-    publisher = PubSubPublisher(settings.project_id)
-    publisher.publish_json(
-        topic_name=settings.perplexity_synth_topic,
-        payload={
-            "schema_version": "perplexity_synth_request.v1",
-            "tenant_id": tenant_id,
-            "job_id": job_id,
-            "conversation_id": job_doc.get("conversation_id"),
-            "pipeline_version": job_doc.get("pipeline_version"),
-            "prompt_version": settings.perplexity_prompt_version,
-            "evidence": ordered_evidence,
-        },
+    # A duplicate still advances the job: the delivery that recorded the
+    # evidence may have failed after that (e.g. a released synthesis trigger).
+    # An advance_job error is a 500, so Pub/Sub redelivers.
+    state = await advance_job(
+        settings,
+        db,
+        tenant_id,
+        job_id,
+        res["job"],
+        trigger_id=f"evidence:{message_id}",
+        bucket_name=bucket_name,
     )
+    recent_messages.add(key)
+    if state == "triggered":
+        return {"ok": True, "job_id": job_id, "phase": "PHASE_VI"}
+    if not res.get("updated"):
+        return {"ok": True, "job_id": job_id, "url_id": url_id, "duplicate": True, "state": state}
+    return {"ok": True, "job_id": job_id, "url_id": url_id, "state": state}
+
+
+async def _on_fetch_failed(settings: Settings, message_id: str, p: dict):
+    """
+    A URL that will never produce evidence (fetch error, blocked, too large).
+    It counts as settled, so one dead origin can't hold the job open.
+    """
+    tenant_id, job_id, url_id = p.get("tenant_id"), p.get("job_id"), p.get("url_id")
+    if not tenant_id or not job_id or not url_id:
+        raise HTTPException(status_code=400, detail="tenant_id/job_id/url_id required")
 
-    job_ref(db, tenant_id, job_id).update(
-        {
-            "updated_at": firestore.SERVER_TIMESTAMP,
-            "status": "EVIDENCE_READY",
-        }
-    )
+    key = f"evidence:{message_id}"
+    if recent_messages.seen(key):
+        return {"ok": True, "deduped": True}
+
+    db = get_db(settings.project_id, settings.firestore_database)
 
-    log.info("Phase VI triggered", extra={"tenant_id": tenant_id, "job_id": job_id})
+    res = await run_blocking(
+        mark_evidence_failed,
+        db,
+        tenant_id,
+        job_id,
+        url_id,
+        str(p.get("error") or "fetch failed"),
+        message_id=message_id,
+    )
+    if not res.get("job_exists"):
+        recent_messages.add(key)
+        return {"ok": True, "ignored": True, "reason": "job_missing"}
 
-    return {"ok": True, "job_id": job_id, "phase": "PHASE_VI"}
+    # as for written evidence: duplicates re-run advance_job, errors are redelivered
+    state = await advance_job(
+        settings,
+        db,
+        tenant_id,
+        job_id,
+        res["job"],
+        trigger_id=f"evidence:{message_id}",
+        bucket_name=settings.evidence_bucket,
+    )
+    recent_messages.add(key)
+    if not res.get("updated"):
+        return {"ok": True, "job_id": job_id, "url_id": url_id, "duplicate": True, "state": state}
+    return {"ok": True, "job_id": job_id, "url_id": url_id, "state": state}
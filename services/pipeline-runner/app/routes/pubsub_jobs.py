@@ -4,24 +4,30 @@ import base64
 import json
 import asyncio
 import logging
+from datetime import datetime, timezone
 
 from fastapi import APIRouter, HTTPException, Request, Depends
 
 from app.config import Settings, get_settings
 from app.logging import get_logger
+from app.blocking import run_blocking
 from app.state.firestore import get_db
-from app.state.dedupe import claim_idempotency
+from app.state.dedupe import recent_messages
+from app.state.completion import CompletionPolicy
 from app.state.jobs import (
     ensure_job_initialized,
     set_urls_and_mark_fetch_requested,
 )
-from app.external.serpapi import SerpApiClient
-from app.pubsub.publisher import PubSubPublisher
+from app.external.serp_cache import get_serp_client
+from app.pubsub.publisher import get_publisher
 from app.contracts.fetcher_contract import build_fetch_request_message
 
 router = APIRouter()
 log = get_logger("pipeline-runner.jobs")
 
+# strong refs to in-flight background jobs (the loop only keeps weak ones)
+_background_jobs: set[asyncio.Task] = set()
+
 # -------------------------------------------------------------------
 # Helpers
 # -------------------------------------------------------------------
@@ -42,6 +48,8 @@ def _decode_pubsub_envelope(request_json: dict) -> tuple[str, dict]:
 # -------------------------------------------------------------------
 # Background worker (NON-BLOCKING, SAFE)
 # -------------------------------------------------------------------
+# Every SDK call below is synchronous; each runs on the bounded blocking-IO
+# pool so a slow SERP call or Firestore retry never stalls push acks.
 
 async def _process_job_async(
     *,
@@ -51,6 +59,7 @@ async def _process_job_async(
     conversation_id: str,
     user_prompt: str,
     serp: dict,
+    idempotency_key: str,
 ):
     try:
         log.info(
@@ -72,9 +81,10 @@ async def _process_job_async(
             "hl": settings.serpapi_hl,
         }
 
-        # Initialize job (transaction)
+        # Initialize job + claim the message (one transaction)
         txn = db.transaction()
-        ensure_job_initialized(
+        job = await run_blocking(
+            ensure_job_initialized,
             transaction=txn,
             db=db,
             tenant_id=tenant_id,
@@ -83,16 +93,17 @@ async def _process_job_async(
             user_prompt=user_prompt,
             pipeline_version=settings.runner_pipeline_version,
             serpapi_spec=serpapi_spec,
+            idempotency_key=idempotency_key,
         )
+        if job is None:
+            log.info(
+                "Duplicate Pub/Sub message ignored",
+                extra={"tenant_id": tenant_id, "job_id": job_id},
+            )
+            return
 
-        # Discover URLs (BLOCKING IO → off request thread)
-        serp_client = SerpApiClient(
-            api_key=settings.serpapi_api_key,
-            engine=settings.serpapi_engine,
-            gl=settings.serpapi_gl,
-            hl=settings.serpapi_hl,
-        )
-        urls = serp_client.search_top_urls(query=query, top_n=top_n)
+        # Discover URLs (cached + coalesced; BLOCKING IO → off the event loop)
+        urls = await run_blocking(get_serp_client(settings).search_top_urls, query=query, top_n=top_n)
 
         log.info(
             "SERP URLs discovered",
@@ -101,26 +112,34 @@ async def _process_job_async(
 
         # Persist URLs
         txn2 = db.transaction()
-        set_urls_and_mark_fetch_requested(txn2, db, tenant_id, job_id, urls)
-
-        # Fan-out fetch requests
-        publisher = PubSubPublisher(settings.project_id)
+        deadline_at = CompletionPolicy.from_settings(settings).deadline_from(datetime.now(timezone.utc))
+        await run_blocking(set_urls_and_mark_fetch_requested, txn2, db, tenant_id, job_id, urls, deadline_at)
+        if not urls:
+            log.info("JOB_START: no URLs, job failed", extra={"tenant_id": tenant_id, "job_id": job_id})
+            return
+
+        # Fan-out fetch requests (one batched flush on the shared publisher)
+        messages = []
         for i, u in enumerate(urls, start=1):
             url_id = f"URL_{i:03d}"
-            publisher.publish_json(
-                topic_name=settings.fetch_requests_topic,
-                payload=build_fetch_request_message(
+            messages.append((
+                build_fetch_request_message(
                     tenant_id=tenant_id,
                     job_id=job_id,
                     url_id=url_id,
                     url=u,
                 ),
-                attributes={
+                {
                     "tenant_id": tenant_id,
                     "job_id": job_id,
                     "url_id": url_id,
                 },
-            )
+            ))
+        await run_blocking(
+            get_publisher(settings).publish_json_many,
+            settings.fetch_requests_topic,
+            messages,
+        )
 
         log.info(
             "JOB_START async complete",
@@ -167,9 +186,10 @@ async def pubsub_jobs(
     if not tenant_id or not job_id:
         raise HTTPException(status_code=400, detail="tenant_id and job_id required")
 
-    # Idempotency check — FAST
-    db = get_db(settings.project_id, settings.firestore_database)
-    if not claim_idempotency(db, tenant_id, job_id, f"jobs:{message_id}"):
+    # Idempotency check — FAST: in-process only; the durable claim is made
+    # inside ensure_job_initialized by the background worker
+    key = f"jobs:{message_id}"
+    if recent_messages.seen(key):
         log.info(
             "Duplicate Pub/Sub message ignored",
             extra={"tenant_id": tenant_id, "job_id": job_id},
@@ -179,7 +199,7 @@ async def pubsub_jobs(
     p = payload.get("payload") or {}
 
     # 🚀 EARLY ACK — Cloud Run returns immediately
-    asyncio.create_task(
+    task = asyncio.create_task(
         _process_job_async(
             settings=settings,
             tenant_id=tenant_id,
@@ -187,8 +207,12 @@ async def pubsub_jobs(
             conversation_id=p.get("conversation_id") or "",
             user_prompt=p.get("user_prompt") or "",
             serp=p.get("serpapi") or {},
+            idempotency_key=key,
         )
     )
+    recent_messages.add(key)
+    _background_jobs.add(task)
+    task.add_done_callback(_background_jobs.discard)
 
     log.info(
         "JOB_START accepted (early ack)",
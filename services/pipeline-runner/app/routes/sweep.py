@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends
+from google.cloud import firestore
+
+from app.config import Settings, get_settings
+from app.logging import get_logger
+from app.blocking import run_blocking
+from app.state.firestore import get_db
+from app.synthesis import advance_job
+
+router = APIRouter()
+log = get_logger("pipeline-runner.sweep")
+
+
+def _overdue_jobs(db: firestore.Client, now: datetime, limit: int) -> list[dict]:
+    """
+    WAITING_EVIDENCE jobs whose evidence.due_at has passed, oldest first.
+    Needs a collection-group composite index on jobs(status ASC, evidence.due_at ASC)
+    (infra/modules/firestore: google_firestore_index.jobs_sweep). Jobs from
+    before the completion policy have no due_at and never match: backfill
+    them once with `python -m app.state.backfill_due_at`.
+    """
+    q = (
+        db.collection_group("jobs")
+        .where("status", "==", "WAITING_EVIDENCE")
+        .where("evidence.due_at", "<=", now)
+        .order_by("evidence.due_at")
+        .limit(limit)
+    )
+    return [d.to_dict() or {} for d in q.stream()]
+
+
+async def sweep_overdue_jobs(settings: Settings, limit: int = 100) -> dict:
+    """
+    Re-evaluate overdue jobs against the completion policy (deadline /
+    quorum+grace). Safe to run on every instance at once: triggers go
+    through claim_synthesis_trigger.
+    """
+    db = get_db(settings.project_id, settings.firestore_database)
+    jobs = await run_blocking(_overdue_jobs, db, datetime.now(timezone.utc), limit)
+
+    counts: dict[str, int] = {}
+    for job in jobs:
+        tenant_id, job_id = job.get("tenant_id"), job.get("job_id")
+        if not tenant_id or not job_id:
+            continue
+        try:
+            state = await advance_job(
+                settings,
+                db,
+                tenant_id,
+                job_id,
+                job,
+                trigger_id=f"sweep:{job_id}",
+                bucket_name=settings.evidence_bucket,
+                reschedule=True,
+            )
+        except Exception as e:
+            state = "error"
+            log.exception("Sweep failed for job", extra={"tenant_id": tenant_id, "job_id": job_id, "error": str(e)})
+        counts[state] = counts.get(state, 0) + 1
+
+    if jobs:
+        log.info("Evidence sweep", extra={"overdue": len(jobs), **counts})
+    return {"overdue": len(jobs), **counts}
+
+
+async def sweep_forever(settings: Settings) -> None:
+    while True:
+        await asyncio.sleep(settings.evidence_sweep_interval_s)
+        try:
+            await sweep_overdue_jobs(settings)
+        except Exception as e:
+            log.exception("Evidence sweep crashed", extra={"error": str(e)})
+
+
+# Cloud Scheduler target (google_cloud_scheduler_job.evidence_sweep); the deployed
+# service runs with the in-process loop disabled
+@router.post("/tasks/sweep/evidence")
+async def sweep_evidence(settings: Settings = Depends(get_settings)):
+    return {"ok": True, **(await sweep_overdue_jobs(settings))}
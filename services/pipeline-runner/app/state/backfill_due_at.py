@@ -0,0 +1,69 @@
+"""
+Backfill evidence.deadline_at / evidence.due_at on WAITING_EVIDENCE jobs
+created before the completion policy existed.
+
+    python -m app.state.backfill_due_at [--dry-run]
+
+The sweeper only queries jobs by evidence.due_at, so a job without the field
+is never swept: it waits for an evidence event that may never come. Run this
+once per project after deploying the completion policy. Backfilled jobs get
+due_at = now, so the next sweep evaluates each of them and reschedules it
+from the policy; deadline_at is derived from the job's last update (the
+fan-out) when missing.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+from datetime import datetime, timezone
+
+from google.cloud import firestore
+
+from app.config import get_settings
+from app.state.completion import CompletionPolicy
+from app.state.firestore import get_db
+
+
+def backfill_update(job_doc: dict, policy: CompletionPolicy, now: datetime) -> dict | None:
+    """Field updates for one job, or None if it needs none."""
+    if job_doc.get("status") != "WAITING_EVIDENCE":
+        return None
+    evidence = job_doc.get("evidence") or {}
+    if "due_at" in evidence:
+        return None
+
+    update: dict = {"evidence.due_at": now}
+    if "deadline_at" not in evidence:
+        fanout_at = job_doc.get("updated_at") or job_doc.get("created_at") or now
+        update["evidence.deadline_at"] = policy.deadline_from(fanout_at)
+    return update
+
+
+def backfill(db: firestore.Client, policy: CompletionPolicy, dry_run: bool = False) -> int:
+    now = datetime.now(timezone.utc)
+    q = db.collection_group("jobs").where("status", "==", "WAITING_EVIDENCE")
+    updated = 0
+    for snap in q.stream():
+        update = backfill_update(snap.to_dict() or {}, policy, now)
+        if update is None:
+            continue
+        if not dry_run:
+            snap.reference.update(update)
+        updated += 1
+    return updated
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    settings = get_settings()
+    db = get_db(settings.project_id, settings.firestore_database)
+    n = backfill(db, CompletionPolicy.from_settings(settings), dry_run=args.dry_run)
+    logging.info("%s due_at on %d waiting jobs", "would backfill" if args.dry_run else "backfilled", n)
+
+
+if __name__ == "__main__":
+    main()
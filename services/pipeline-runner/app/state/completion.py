@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from app.config import Settings
+
+
+@dataclass(frozen=True)
+class CompletionPolicy:
+    """
+    When a WAITING_EVIDENCE job may go to synthesis.
+
+    - quorum:     fraction of expected URLs that must be WRITTEN (k-of-n)
+    - grace_s:    once quorum is reached, wait this long for stragglers
+    - deadline_s: after fan-out, synthesize with whatever arrived (0 = never)
+
+    quorum=1.0, grace_s=0 is the original "every URL" rule.
+    """
+
+    quorum: float = 1.0
+    grace_s: float = 0.0
+    deadline_s: float = 600.0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "CompletionPolicy":
+        return cls(
+            quorum=settings.evidence_quorum,
+            grace_s=settings.evidence_grace_s,
+            deadline_s=settings.evidence_deadline_s,
+        )
+
+    def quorum_count(self, expected: int) -> int:
+        if expected <= 0:
+            return 0
+        return min(expected, max(1, math.ceil(self.quorum * expected)))
+
+    def deadline_from(self, start: datetime) -> datetime | None:
+        return start + timedelta(seconds=self.deadline_s) if self.deadline_s > 0 else None
+
+
+@dataclass(frozen=True)
+class Decision:
+    trigger: bool = False
+    fail: bool = False
+    reason: str | None = None           # complete | quorum | quorum_grace | deadline | no_evidence
+    quorum_at: datetime | None = None   # set when quorum is first reached during a grace wait
+    due_at: datetime | None = None      # next time the sweeper should look at the job
+
+
+def decide(
+    policy: CompletionPolicy,
+    *,
+    expected: int,
+    written: int,
+    failed: int,
+    now: datetime,
+    deadline_at: datetime | None,
+    quorum_at: datetime | None,
+) -> Decision:
+    """Pure completion rule; the caller makes it stick via claim_synthesis_trigger."""
+    if expected > 0 and written + failed >= expected:
+        # every URL settled: nothing more can arrive
+        return Decision(trigger=True, reason="complete") if written else Decision(fail=True, reason="no_evidence")
+
+    past_deadline = deadline_at is not None and now >= deadline_at
+
+    if written and written >= policy.quorum_count(expected):
+        if policy.grace_s <= 0:
+            return Decision(trigger=True, reason="quorum")
+        quorum_at = quorum_at or now
+        grace_end = quorum_at + timedelta(seconds=policy.grace_s)
+        if now >= grace_end:
+            return Decision(trigger=True, reason="quorum_grace")
+        if past_deadline:
+            return Decision(trigger=True, reason="deadline")
+        due = min(grace_end, deadline_at) if deadline_at else grace_end
+        return Decision(quorum_at=quorum_at, due_at=due)
+
+    if past_deadline:
+        return Decision(trigger=True, reason="deadline") if written else Decision(fail=True, reason="no_evidence")
+
+    return Decision(due_at=deadline_at)
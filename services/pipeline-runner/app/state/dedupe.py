@@ -1,7 +1,15 @@
 from __future__ import annotations
 
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
 from google.cloud import firestore
 
+# Dedupe markers carry expires_at; a Firestore TTL policy on the "dedupe"
+# collection group (field expires_at) deletes them after DEDUPE_TTL.
+DEDUPE_TTL = timedelta(days=7)
+
 
 def dedupe_ref(db: firestore.Client, tenant_id: str, job_id: str, idempotency_key: str):
     return (
@@ -11,10 +19,20 @@ def dedupe_ref(db: firestore.Client, tenant_id: str, job_id: str, idempotency_ke
     )
 
 
+def dedupe_marker() -> dict:
+    return {
+        "created_at": firestore.SERVER_TIMESTAMP,
+        "expires_at": datetime.now(timezone.utc) + DEDUPE_TTL,
+    }
+
+
 def claim_idempotency(db: firestore.Client, tenant_id: str, job_id: str, idempotency_key: str) -> bool:
     """
     Transactionally create a dedupe marker.
     Returns True if claimed (first time), False if already processed.
+
+    Prefer claiming inside the state transition the key protects
+    (see ensure_job_initialized); this costs a transaction of its own.
     """
     ref = dedupe_ref(db, tenant_id, job_id, idempotency_key)
 
@@ -23,8 +41,38 @@ def claim_idempotency(db: firestore.Client, tenant_id: str, job_id: str, idempot
         snap = ref.get(transaction=transaction)
         if snap.exists:
             return False
-        transaction.set(ref, {"created_at": firestore.SERVER_TIMESTAMP})
+        transaction.set(ref, dedupe_marker())
         return True
 
     txn = db.transaction()
     return _tx(txn)
+
+
+class RecentMessageIds:
+    """
+    Bounded in-process set of recently handled Pub/Sub message ids.
+    Short-circuits obvious redeliveries to the same instance without a
+    Firestore round trip; Firestore stays the source of truth.
+    """
+
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._ids: OrderedDict[str, None] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def seen(self, key: str) -> bool:
+        with self._lock:
+            if key in self._ids:
+                self._ids.move_to_end(key)
+                return True
+            return False
+
+    def add(self, key: str) -> None:
+        with self._lock:
+            self._ids[key] = None
+            self._ids.move_to_end(key)
+            while len(self._ids) > self.max_entries:
+                self._ids.popitem(last=False)
+
+
+recent_messages = RecentMessageIds()
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+from functools import lru_cache
+
 from google.cloud import firestore
 
 
+@lru_cache(maxsize=4)
 def get_db(project_id: str, database: str | None = None) -> firestore.Client:
+    # one client (channel + auth) per process; the client is thread-safe
     if database:
         return firestore.Client(project=project_id, database=database)
     return firestore.Client(project=project_id)
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
 import hashlib
+from datetime import datetime
+from google.api_core.exceptions import AlreadyExists
 from google.cloud import firestore
 
+from app.state.dedupe import dedupe_marker, dedupe_ref
+
 
 def job_ref(db: firestore.Client, tenant_id: str, job_id: str):
     return db.collection("tenants").document(tenant_id).collection("jobs").document(job_id)
@@ -24,8 +28,16 @@ def ensure_job_initialized(
     user_prompt: str,
     pipeline_version: str,
     serpapi_spec: dict,
-) -> dict:
+    idempotency_key: str | None = None,
+) -> dict | None:
+    """
+    Create the job doc if missing. With idempotency_key, the dedupe marker is
+    claimed in the same transaction; returns None if it was already claimed.
+    """
     ref = job_ref(db, tenant_id, job_id)
+    marker = dedupe_ref(db, tenant_id, job_id, idempotency_key) if idempotency_key else None
+    if marker is not None and marker.get(transaction=transaction).exists:
+        return None
     snap = ref.get(transaction=transaction)
 
     spec_hash = stable_hash({
@@ -33,6 +45,9 @@ def ensure_job_initialized(
         "serpapi": serpapi_spec,
     })
 
+    if marker is not None:
+        transaction.set(marker, dedupe_marker())
+
     if snap.exists:
         data = snap.to_dict() or {}
         # If already initialized with same spec, keep it.
@@ -68,6 +83,7 @@ def set_urls_and_mark_fetch_requested(
     tenant_id: str,
     job_id: str,
     urls: list[str],
+    deadline_at: datetime | None = None,
 ):
     ref = job_ref(db, tenant_id, job_id)
     snap = ref.get(transaction=transaction)
@@ -76,10 +92,25 @@ def set_urls_and_mark_fetch_requested(
 
     data = snap.to_dict() or {}
     existing = (data.get("urls") or {}).get("list") or []
-    if existing:
+    if existing or data.get("status") == "FAILED":
         # already set; do not overwrite (idempotent)
         return data
 
+    if not urls:
+        # nothing to fan out: no evidence can ever arrive, so don't wait for the deadline
+        transaction.update(ref, {
+            "updated_at": firestore.SERVER_TIMESTAMP,
+            "status": "FAILED",
+            "urls": {"expected": 0, "discovered": 0, "list": []},
+            "error": {
+                "code": "NO_URLS",
+                "message": "search returned no URLs",
+                "step": "serpapi",
+                "last_failure_at": firestore.SERVER_TIMESTAMP,
+            },
+        })
+        return data
+
     url_items = []
     evidence_items = {}
     for idx, u in enumerate(urls, start=1):
@@ -98,48 +129,268 @@ def set_urls_and_mark_fetch_requested(
         "updated_at": firestore.SERVER_TIMESTAMP,
         "status": "WAITING_EVIDENCE",
         "urls": {"expected": len(urls), "discovered": len(urls), "list": url_items},
-        "evidence": {"expected": len(urls), "received": 0, "items": evidence_items},
+        "evidence": {
+            "expected": len(urls),
+            "received": 0,
+            "items": evidence_items,
+            # completion policy bookkeeping; due_at drives the sweeper
+            "deadline_at": deadline_at,
+            "due_at": deadline_at,
+            "quorum_at": None,
+        },
     })
     return data
 
 
-@firestore.transactional
+# Evidence state lives in one subdocument per URL:
+#
+#   jobs/{job}/evidence/{url_id}   {url_id, url, raw_object, status: WRITTEN | FAILED}
+#
+# Fetcher completions for the same job never write the same document, so
+# they don't serialize on the job doc. The job doc keeps the static part
+# (expected, items with url/evidence_id); load_job_view merges the two.
+# Jobs that recorded evidence inline on the job doc (items.<id>.status ==
+# WRITTEN) are still counted.
+
+
+def evidence_ref(db: firestore.Client, tenant_id: str, job_id: str, url_id: str):
+    return job_ref(db, tenant_id, job_id).collection("evidence").document(url_id)
+
+
+def _inline_written(job_doc: dict) -> int:
+    items = (job_doc.get("evidence") or {}).get("items") or {}
+    return sum(1 for it in items.values() if (it or {}).get("status") == "WRITTEN")
+
+
 def mark_evidence_written(
-    transaction: firestore.Transaction,
     db: firestore.Client,
     tenant_id: str,
     job_id: str,
     url_id: str,
     raw_object: str,
-):
-    ref = job_ref(db, tenant_id, job_id)
-    snap = ref.get(transaction=transaction)
+    message_id: str | None = None,
+) -> dict:
+    """
+    Create-only write of the URL's evidence subdocument. The job doc is only
+    read. Returns job_exists / updated, plus the job doc when it exists.
+
+    The create doubles as the idempotency claim: a redelivered (or
+    duplicate) event for the URL fails it, so no dedupe marker is needed.
+    """
+    snap = job_ref(db, tenant_id, job_id).get()
     if not snap.exists:
         return {"job_exists": False}
 
     data = snap.to_dict() or {}
-    evidence = data.get("evidence") or {}
-    items = evidence.get("items") or {}
+    items = (data.get("evidence") or {}).get("items") or {}
     item = items.get(url_id)
 
     if not item:
         # Unknown URL id; ignore safely
-        return {"job_exists": True, "updated": False, "ready": False}
+        return {"job_exists": True, "updated": False, "job": data}
 
     if item.get("status") == "WRITTEN":
-        return {"job_exists": True, "updated": False, "ready": False}
+        # recorded inline by an older runner
+        return {"job_exists": True, "updated": False, "job": data}
+
+    try:
+        evidence_ref(db, tenant_id, job_id, url_id).create({
+            "url_id": url_id,
+            "url": item.get("url"),
+            "raw_object": raw_object,
+            "status": "WRITTEN",
+            "message_id": message_id,
+            "written_at": firestore.SERVER_TIMESTAMP,
+        })
+    except AlreadyExists:
+        return {"job_exists": True, "updated": False, "job": data}
+
+    return {"job_exists": True, "updated": True, "job": data}
+
+
+def mark_evidence_failed(
+    db: firestore.Client,
+    tenant_id: str,
+    job_id: str,
+    url_id: str,
+    error: str,
+    message_id: str | None = None,
+) -> dict:
+    """A URL that will never produce evidence; it counts as settled, not received."""
+    snap = job_ref(db, tenant_id, job_id).get()
+    if not snap.exists:
+        return {"job_exists": False}
+
+    data = snap.to_dict() or {}
+    item = ((data.get("evidence") or {}).get("items") or {}).get(url_id)
+    if not item or item.get("status") == "WRITTEN":
+        return {"job_exists": True, "updated": False, "job": data}
+
+    try:
+        evidence_ref(db, tenant_id, job_id, url_id).create({
+            "url_id": url_id,
+            "url": item.get("url"),
+            "raw_object": None,
+            "status": "FAILED",
+            "error": error[:1000],
+            "message_id": message_id,
+            "written_at": firestore.SERVER_TIMESTAMP,
+        })
+    except AlreadyExists:
+        return {"job_exists": True, "updated": False, "job": data}
+
+    return {"job_exists": True, "updated": True, "job": data}
+
+
+def _count(query) -> int:
+    result = query.count(alias="n").get()
+    return int(result[0][0].value) if result and result[0] else 0
+
+
+def count_evidence(db: firestore.Client, tenant_id: str, job_id: str, job_doc: dict) -> tuple[int, int]:
+    """(written, failed) so far: aggregation queries only, no document reads."""
+    col = job_ref(db, tenant_id, job_id).collection("evidence")
+    written = _count(col.where("status", "==", "WRITTEN")) + _inline_written(job_doc)
+    failed = _count(col.where("status", "==", "FAILED"))
+    return written, failed
+
+
+def set_evidence_due(
+    db: firestore.Client,
+    tenant_id: str,
+    job_id: str,
+    due_at: datetime | None,
+    quorum_at: datetime | None = None,
+) -> None:
+    """Reschedule the sweeper's next look at a waiting job (plain field update)."""
+    update: dict = {"evidence.due_at": due_at}
+    if quorum_at is not None:
+        update["evidence.quorum_at"] = quorum_at
+    job_ref(db, tenant_id, job_id).update(update)
+
+
+def load_job_view(db: firestore.Client, tenant_id: str, job_id: str, job_doc: dict | None = None) -> dict | None:
+    """
+    The job doc with evidence.items / evidence.received filled in from the
+    per-URL subdocuments: the same shape the job doc had when evidence was
+    tracked inline.
+    """
+    ref = job_ref(db, tenant_id, job_id)
+    if job_doc is None:
+        snap = ref.get()
+        if not snap.exists:
+            return None
+        job_doc = snap.to_dict() or {}
+
+    view = dict(job_doc)
+    evidence = dict(view.get("evidence") or {})
+    items = {k: dict(v or {}) for k, v in (evidence.get("items") or {}).items()}
+
+    for d in ref.collection("evidence").stream():
+        ev = d.to_dict() or {}
+        item = items.setdefault(d.id, {})
+        item.update({
+            "url": item.get("url") or ev.get("url"),
+            "raw_object": ev.get("raw_object"),
+            "status": ev.get("status", "WRITTEN"),
+        })
+
+    evidence["items"] = items
+    evidence["received"] = sum(1 for it in items.values() if it.get("status") == "WRITTEN")
+    view["evidence"] = evidence
+    return view
+
+
+@firestore.transactional
+def claim_synthesis_trigger(
+    transaction: firestore.Transaction,
+    db: firestore.Client,
+    tenant_id: str,
+    job_id: str,
+    trigger_id: str,
+    reason: str = "complete",
+) -> bool:
+    """
+    Exactly-once gate for Phase VI. Flips WAITING_EVIDENCE -> EVIDENCE_READY
+    and writes the trigger marker in one transaction; only the handler
+    that gets True may publish the synthesis request.
+
+    The marker has its own field: "synthesis" belongs to the synth worker,
+    which rewrites it as it runs.
+    """
+    ref = job_ref(db, tenant_id, job_id)
+    snap = ref.get(transaction=transaction)
+    if not snap.exists:
+        return False
+
+    data = snap.to_dict() or {}
+    if (data.get("synthesis_trigger") or {}).get("triggered"):
+        return False
+    if data.get("status") != "WAITING_EVIDENCE":
+        return False
 
-    # update nested field paths
     transaction.update(ref, {
         "updated_at": firestore.SERVER_TIMESTAMP,
-        f"evidence.items.{url_id}.raw_object": raw_object,
-        f"evidence.items.{url_id}.status": "WRITTEN",
-        "evidence.received": firestore.Increment(1),
+        "status": "EVIDENCE_READY",
+        "synthesis_trigger": {
+            "triggered": True,
+            "trigger_id": trigger_id,
+            "reason": reason,
+            "triggered_at": firestore.SERVER_TIMESTAMP,
+        },
     })
+    return True
 
-    # We can’t reliably read the incremented value inside the same transaction without re-read.
-    # Runner will re-read after commit if it needs to decide completion.
-    return {"job_exists": True, "updated": True}
+
+@firestore.transactional
+def release_synthesis_trigger(
+    transaction: firestore.Transaction,
+    db: firestore.Client,
+    tenant_id: str,
+    job_id: str,
+    trigger_id: str,
+) -> bool:
+    """Undo claim_synthesis_trigger after a failed publish, if we still own it."""
+    ref = job_ref(db, tenant_id, job_id)
+    snap = ref.get(transaction=transaction)
+    data = (snap.to_dict() or {}) if snap.exists else {}
+    if (data.get("synthesis_trigger") or {}).get("trigger_id") != trigger_id:
+        return False
+
+    transaction.update(ref, {
+        "updated_at": firestore.SERVER_TIMESTAMP,
+        "status": "WAITING_EVIDENCE",
+        "synthesis_trigger": firestore.DELETE_FIELD,
+    })
+    return True
+
+
+@firestore.transactional
+def fail_waiting_job(
+    transaction: firestore.Transaction,
+    db: firestore.Client,
+    tenant_id: str,
+    job_id: str,
+    code: str,
+    message: str,
+) -> bool:
+    """WAITING_EVIDENCE -> FAILED (e.g. deadline passed with no usable evidence)."""
+    ref = job_ref(db, tenant_id, job_id)
+    snap = ref.get(transaction=transaction)
+    if not snap.exists or (snap.to_dict() or {}).get("status") != "WAITING_EVIDENCE":
+        return False
+
+    transaction.update(ref, {
+        "updated_at": firestore.SERVER_TIMESTAMP,
+        "status": "FAILED",
+        "error": {
+            "code": code,
+            "message": message,
+            "step": "evidence",
+            "last_failure_at": firestore.SERVER_TIMESTAMP,
+        },
+    })
+    return True
 
 
 def is_job_evidence_complete(job_doc: dict) -> bool:
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import struct
+import zlib
+from typing import Any, Dict, Tuple
+
+from google.cloud import storage
+
+# Reader for fetcher-worker evidence bundles (fetcher-worker/app/bundle.py):
+#
+#   MAGIC (8 bytes) | header_len (u32 BE) | header JSON | zlib sections...
+#
+# Section offsets in the header are relative to the end of the header.
+
+MAGIC = b"ARSEVB1\n"
+BUNDLE_NAME = "evidence.bundle"
+HEADER_PROBE_BYTES = 16 * 1024
+
+
+def is_bundle(object_name: str) -> bool:
+    return object_name.endswith("/" + BUNDLE_NAME)
+
+
+def read_bundle_header(bucket: storage.Bucket, obj: str) -> Tuple[Dict[str, Any], int, int | None]:
+    """
+    (header, data_start, generation) with one small ranged read (two if the
+    header is unusually large). The generation pins later section reads.
+    """
+    blob = bucket.blob(obj)
+    head = blob.download_as_bytes(start=0, end=HEADER_PROBE_BYTES - 1)
+    if head[: len(MAGIC)] != MAGIC:
+        raise ValueError(f"gs://{bucket.name}/{obj} is not an evidence bundle")
+
+    (n,) = struct.unpack(">I", head[len(MAGIC): len(MAGIC) + 4])
+    start = len(MAGIC) + 4
+    if len(head) < start + n:
+        head = blob.download_as_bytes(start=0, end=start + n - 1, if_generation_match=blob.generation)
+    return json.loads(head[start: start + n]), start + n, blob.generation
+
+
+def section_range(header: Dict[str, Any], data_start: int, name: str) -> Tuple[int, int]:
+    """Inclusive absolute byte range of a section, as used by ranged GETs."""
+    sec = header["sections"][name]
+    first = data_start + int(sec["offset"])
+    return first, first + int(sec["length"]) - 1
+
+
+def read_bundle_section(
+    bucket: storage.Bucket,
+    obj: str,
+    header: Dict[str, Any],
+    data_start: int,
+    name: str,
+    generation: int | None = None,
+) -> bytes:
+    sec = header["sections"][name]
+    first, last = section_range(header, data_start, name)
+    blob = bucket.blob(obj, generation=generation)
+    data = zlib.decompress(blob.download_as_bytes(start=first, end=last))
+    if hashlib.sha256(data).hexdigest() != sec["sha256"]:
+        raise ValueError(f"gs://{bucket.name}/{obj}:{name} checksum mismatch")
+    return data
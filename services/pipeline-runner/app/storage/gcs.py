@@ -1,9 +1,17 @@
 from __future__ import annotations
 
+from functools import lru_cache
+
 from google.cloud import storage
 from google.api_core.exceptions import PreconditionFailed
 
 
+@lru_cache(maxsize=4)
+def get_storage_client(project_id: str | None = None) -> storage.Client:
+    # one client (HTTP session + auth) per process; safe to share across threads
+    return storage.Client(project=project_id)
+
+
 class GCSWriter:
     def __init__(self, project_id: str):
         self.client = storage.Client(project=project_id)
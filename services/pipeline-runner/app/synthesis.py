@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from google.cloud import firestore, storage
+
+from app.blocking import run_blocking
+from app.config import Settings
+from app.logging import get_logger
+from app.pubsub.publisher import get_publisher
+from app.state.completion import CompletionPolicy, decide
+from app.state.jobs import (
+    claim_synthesis_trigger,
+    count_evidence,
+    fail_waiting_job,
+    load_job_view,
+    release_synthesis_trigger,
+    set_evidence_due,
+)
+from app.storage.bundle import is_bundle, read_bundle_header, read_bundle_section, section_range
+from app.storage.gcs import get_storage_client
+
+log = get_logger("pipeline-runner.synthesis")
+
+
+def _load_gcs_text(bucket: storage.Bucket, obj: str) -> str:
+    return bucket.blob(obj).download_as_text(encoding="utf-8")
+
+
+def _load_gcs_json(bucket: storage.Bucket, obj: str) -> Dict[str, Any]:
+    return json.loads(bucket.blob(obj).download_as_text(encoding="utf-8"))
+
+
+def _stat_gcs(bucket: storage.Bucket, obj: str) -> storage.Blob:
+    blob = bucket.get_blob(obj)
+    if blob is None:
+        raise FileNotFoundError(f"gs://{bucket.name}/{obj}")
+    return blob
+
+
+def _load_bundle_item(bucket: storage.Bucket, obj: str, inline_text: bool) -> Dict[str, Any]:
+    """One bundle: header (meta + index) read, plus the clean.txt section if inlining."""
+    header, data_start, generation = read_bundle_header(bucket, obj)
+    meta = header["meta"]
+    item = {
+        "fetched_at": meta["fetched_at"],
+        "checksum": meta["hash_raw"],
+    }
+    if inline_text:
+        text = read_bundle_section(bucket, obj, header, data_start, "clean.txt", generation)
+        item["cleaned_text"] = text.decode("utf-8")
+    else:
+        sec = header["sections"]["clean.txt"]
+        item["text"] = {
+            "gcs_uri": f"gs://{bucket.name}/{obj}",
+            "generation": generation,
+            "size": sec["size"],
+            "byte_range": list(section_range(header, data_start, "clean.txt")),
+            "codec": sec["codec"],
+            "sha256": sec["sha256"],
+        }
+    return item
+
+
+async def _load_evidence(
+    bucket: storage.Bucket,
+    urls_list: List[Dict[str, Any]],
+    evidence_items: Dict[str, Any],
+    concurrency: int,
+    inline_text: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Build the evidence list for every written URL, at most `concurrency`
+    GCS calls in flight, in urls_list rank order.
+
+    v2 (default): meta.json + clean.txt metadata only; the synth worker reads
+    the pinned clean.txt generation itself. v1 (inline_text): clean.txt is
+    downloaded and inlined.
+
+    Bundled evidence (one evidence.bundle object) and the older
+    raw.html/clean.txt/meta.json layout are both understood.
+    """
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def load(fn, obj: str):
+        async with sem:
+            return await run_blocking(fn, bucket, obj)
+
+    async def load_one(ev: Dict[str, Any]) -> Dict[str, Any]:
+        prefix = ev["raw_object"].rsplit("/", 1)[0] + "/"
+        if is_bundle(ev["raw_object"]):
+            async with sem:
+                item = await run_blocking(_load_bundle_item, bucket, ev["raw_object"], inline_text)
+            return {
+                "source_url": ev["url"],
+                "snapshot_gcs_path": f"gs://{bucket.name}/{ev['raw_object']}",
+                **item,
+            }
+
+        text_loader = _load_gcs_text if inline_text else _stat_gcs
+        meta, text = await asyncio.gather(
+            load(_load_gcs_json, prefix + "meta.json"),
+            load(text_loader, prefix + "clean.txt"),
+        )
+        item = {
+            "source_url": ev["url"],
+            "snapshot_gcs_path": f"gs://{bucket.name}/{prefix}",
+            "fetched_at": meta["fetched_at"],
+            "checksum": meta["hash_raw"],
+        }
+        if inline_text:
+            item["cleaned_text"] = text
+        else:
+            item["text"] = {
+                "gcs_uri": f"gs://{bucket.name}/{text.name}",
+                "generation": text.generation,
+                "size": text.size,
+                "md5_hash": text.md5_hash,
+            }
+        return item
+
+    # quorum/deadline triggers run with some URLs still missing or failed
+    written = [
+        evidence_items[u["url_id"]]
+        for u in urls_list
+        if (evidence_items.get(u["url_id"]) or {}).get("status") == "WRITTEN"
+    ]
+    # gather preserves input order, so rank order survives concurrent completion
+    return list(await asyncio.gather(*(load_one(ev) for ev in written)))
+
+
+async def _publish_synthesis_request(
+    settings: Settings,
+    db: firestore.Client,
+    tenant_id: str,
+    job_id: str,
+    job_doc: dict,
+    bucket_name: str,
+) -> None:
+    # ---------------------------
+    # PHASE VI — SYNTHESIS TRIGGER
+    # ---------------------------
+    job_doc = await run_blocking(load_job_view, db, tenant_id, job_id, job_doc)
+
+    evidence_items = job_doc.get("evidence", {}).get("items", {})
+    urls_list = job_doc.get("urls", {}).get("list", [])
+
+    bucket = get_storage_client().bucket(bucket_name)
+    inline_text = settings.perplexity_synth_schema == "v1"
+    ordered_evidence = await _load_evidence(
+        bucket,
+        urls_list,
+        evidence_items,
+        settings.evidence_load_concurrency,
+        inline_text=inline_text,
+    )
+
+    await run_blocking(
+        get_publisher(settings).publish_json,
+        topic_name=settings.perplexity_synth_topic,
+        payload={
+            "schema_version": "perplexity_synth_request.v1" if inline_text else "perplexity_synth_request.v2",
+            "tenant_id": tenant_id,
+            "job_id": job_id,
+            "conversation_id": job_doc.get("conversation_id"),
+            "pipeline_version": job_doc.get("pipeline_version"),
+            "prompt_version": settings.perplexity_prompt_version,
+            "evidence": ordered_evidence,
+        },
+    )
+
+
+async def advance_job(
+    settings: Settings,
+    db: firestore.Client,
+    tenant_id: str,
+    job_id: str,
+    job_doc: dict,
+    *,
+    trigger_id: str,
+    bucket_name: str,
+    reschedule: bool = False,
+) -> str:
+    """
+    Apply the completion policy to a WAITING_EVIDENCE job and act on it.
+    Called after every evidence event and by the sweeper. Returns one of
+    waiting / triggered / already_triggered / failed.
+    """
+    ev = job_doc.get("evidence") or {}
+    written, failed = await run_blocking(count_evidence, db, tenant_id, job_id, job_doc)
+    d = decide(
+        CompletionPolicy.from_settings(settings),
+        expected=int(ev.get("expected") or 0),
+        written=written,
+        failed=failed,
+        now=datetime.now(timezone.utc),
+        deadline_at=ev.get("deadline_at"),
+        quorum_at=ev.get("quorum_at"),
+    )
+
+    if d.fail:
+        msg = f"no usable evidence ({failed} failed of {ev.get('expected')})"
+        await run_blocking(fail_waiting_job, db.transaction(), db, tenant_id, job_id, "NO_EVIDENCE", msg)
+        log.info("Job failed: no evidence", extra={"tenant_id": tenant_id, "job_id": job_id})
+        return "failed"
+
+    if not d.trigger:
+        if reschedule or (d.quorum_at is not None and not ev.get("quorum_at")):
+            await run_blocking(set_evidence_due, db, tenant_id, job_id, d.due_at, d.quorum_at)
+        return "waiting"
+
+    # Completion decision + synthesis marker in one transaction: of several
+    # handlers that see the job complete, exactly one gets True.
+    if not await run_blocking(claim_synthesis_trigger, db.transaction(), db, tenant_id, job_id, trigger_id, d.reason):
+        return "already_triggered"
+
+    try:
+        await _publish_synthesis_request(settings, db, tenant_id, job_id, job_doc, bucket_name)
+    except Exception:
+        # hand the trigger back so a redelivery/sweep can retry it
+        await run_blocking(release_synthesis_trigger, db.transaction(), db, tenant_id, job_id, trigger_id)
+        raise
+
+    log.info("Phase VI triggered", extra={"tenant_id": tenant_id, "job_id": job_id})
+    return "triggered"
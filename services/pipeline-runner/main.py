@@ -1,11 +1,14 @@
 # main.py
+import asyncio
 import logging
 from fastapi import FastAPI
 
 from app.config import get_settings
+from app.external.serp_cache import get_serp_client
 from app.routes.health import router as health_router
 from app.routes.pubsub_jobs import router as jobs_router
 from app.routes.pubsub_evidence import router as evidence_router
+from app.routes.sweep import router as sweep_router, sweep_forever
 
 
 logger = logging.getLogger("pipeline-runner")
@@ -22,6 +25,10 @@ def startup() -> None:
     settings = get_settings()
     app.state.settings = settings
 
+    # overdue WAITING_EVIDENCE jobs (deadline / quorum grace) are swept in-process
+    if settings.evidence_sweep_interval_s > 0:
+        app.state.sweeper = asyncio.get_running_loop().create_task(sweep_forever(settings))
+
     logger.info(
         "pipeline-runner startup complete | project_id=%s | pipeline_version=%s",
         settings.project_id,
@@ -35,6 +42,7 @@ def startup() -> None:
 app.include_router(health_router)
 app.include_router(jobs_router)
 app.include_router(evidence_router)
+app.include_router(sweep_router)
 
 ############ TEMP DEBUG END POINT ######################
 ########################################################
@@ -48,3 +56,9 @@ def debug_routes():
         }
         for r in app.router.routes
     ]
+
+
+@app.get("/__debug/serp_cache")
+def debug_serp_cache():
+    # hit/miss counters for sizing SERP_CACHE_TTL_S / SERP_CACHE_MAX_ENTRIES
+    return get_serp_client(get_settings()).stats()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# services are run from their own root (`uvicorn main:app`); tests import `app` the same way
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
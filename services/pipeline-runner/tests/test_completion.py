@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("google.cloud.firestore")
+
+from app.state.backfill_due_at import backfill_update  # noqa: E402
+from app.state.completion import CompletionPolicy, Decision, decide  # noqa: E402
+from app.state.jobs import set_urls_and_mark_fetch_requested  # noqa: E402
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+DEADLINE = T0 + timedelta(seconds=600)
+POLICY = CompletionPolicy(quorum=0.6, grace_s=30, deadline_s=600)  # 3 of 5
+
+
+def s(seconds):
+    return T0 + timedelta(seconds=seconds)
+
+
+@pytest.mark.parametrize(
+    "case, policy, written, failed, now, quorum_at, expected",
+    [
+        ("all settled", POLICY, 3, 2, s(1), None, Decision(trigger=True, reason="complete")),
+        ("all settled, none usable", POLICY, 0, 5, s(1), None, Decision(fail=True, reason="no_evidence")),
+        ("below quorum: wait for the deadline", POLICY, 2, 1, s(10), None, Decision(due_at=DEADLINE)),
+        ("quorum reached: grace starts", POLICY, 3, 0, s(10), None, Decision(quorum_at=s(10), due_at=s(40))),
+        ("within grace", POLICY, 4, 0, s(20), s(10), Decision(quorum_at=s(10), due_at=s(40))),
+        ("grace expired", POLICY, 3, 0, s(40), s(10), Decision(trigger=True, reason="quorum_grace")),
+        ("grace cut short by the deadline", POLICY, 3, 0, s(590), None, Decision(quorum_at=s(590), due_at=DEADLINE)),
+        ("past deadline within grace", POLICY, 3, 0, s(600), s(590), Decision(trigger=True, reason="deadline")),
+        ("no grace", CompletionPolicy(quorum=0.6), 3, 0, s(1), None, Decision(trigger=True, reason="quorum")),
+        ("past deadline, partial evidence", POLICY, 1, 2, s(600), None, Decision(trigger=True, reason="deadline")),
+        ("past deadline, no evidence", POLICY, 0, 2, s(601), None, Decision(fail=True, reason="no_evidence")),
+    ],
+)
+def test_decide(case, policy, written, failed, now, quorum_at, expected):
+    got = decide(
+        policy, expected=5, written=written, failed=failed, now=now, deadline_at=DEADLINE, quorum_at=quorum_at
+    )
+    assert got == expected, case
+
+
+def test_decide_without_a_deadline_waits_for_events():
+    policy = CompletionPolicy(deadline_s=0)
+    assert policy.deadline_from(T0) is None
+    assert decide(policy, expected=5, written=4, failed=0, now=s(10**6), deadline_at=None, quorum_at=None) == Decision()
+
+
+def test_quorum_count():
+    assert [CompletionPolicy(quorum=q).quorum_count(5) for q in (0.0, 0.5, 0.6, 1.0, 2.0)] == [1, 3, 3, 5, 5]
+    assert CompletionPolicy().quorum_count(0) == 0
+
+
+# -- fan-out ---------------------------------------------------------------
+
+
+class _Snap:
+    def __init__(self, data):
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+class _Ref:
+    def __init__(self, docs, path=()):
+        self.docs, self.path = docs, path
+
+    def collection(self, name):
+        return _Ref(self.docs, self.path + (name,))
+
+    def document(self, name):
+        return _Ref(self.docs, self.path + (name,))
+
+    def get(self, transaction=None):
+        return _Snap(self.docs.get(self.path))
+
+
+class _Txn:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def update(self, ref, data):
+        self.docs[ref.path] = {**self.docs[ref.path], **data}
+
+
+def _job(status="RUNNING"):
+    path = ("tenants", "t", "jobs", "j")
+    docs = {path: {"status": status, "urls": {"expected": 0, "discovered": 0, "list": []}}}
+    return docs, path
+
+
+def test_zero_url_fanout_fails_the_job_immediately():
+    docs, path = _job()
+    set_urls_and_mark_fetch_requested.to_wrap(_Txn(docs), _Ref(docs), "t", "j", [], DEADLINE)
+    job = docs[path]
+    assert job["status"] == "FAILED"
+    assert job["error"]["code"] == "NO_URLS"
+    assert "evidence" not in job  # no due_at: the sweeper never looks at it
+
+    # a redelivery does not turn it back into a waiting job
+    set_urls_and_mark_fetch_requested.to_wrap(_Txn(docs), _Ref(docs), "t", "j", ["https://a"], DEADLINE)
+    assert docs[path]["status"] == "FAILED"
+
+
+def test_fanout_schedules_the_sweeper():
+    docs, path = _job()
+    set_urls_and_mark_fetch_requested.to_wrap(_Txn(docs), _Ref(docs), "t", "j", ["https://a", "https://b"], DEADLINE)
+    job = docs[path]
+    assert job["status"] == "WAITING_EVIDENCE"
+    assert job["evidence"]["expected"] == 2
+    assert job["evidence"]["due_at"] == job["evidence"]["deadline_at"] == DEADLINE
+
+
+# -- due_at backfill -------------------------------------------------------
+
+
+def test_backfill_only_touches_waiting_jobs_without_due_at():
+    now = s(1000)
+    old = {"status": "WAITING_EVIDENCE", "updated_at": T0, "evidence": {"expected": 3}}
+    assert backfill_update(old, POLICY, now) == {"evidence.due_at": now, "evidence.deadline_at": DEADLINE}
+
+    with_deadline = {"status": "WAITING_EVIDENCE", "evidence": {"deadline_at": s(5)}}
+    assert backfill_update(with_deadline, POLICY, now) == {"evidence.due_at": now}
+
+    # due_at = None is a scheduled "no deadline" job, not a missing field
+    assert backfill_update({"status": "WAITING_EVIDENCE", "evidence": {"due_at": None}}, POLICY, now) is None
+    assert backfill_update({"status": "EVIDENCE_READY", "evidence": {}}, POLICY, now) is None
@@ -0,0 +1,78 @@
+import asyncio
+import base64
+import json
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("google.cloud.firestore")
+
+from fastapi import FastAPI  # noqa: E402
+
+from app import blocking  # noqa: E402
+from app.config import get_settings  # noqa: E402
+from app.routes import pubsub_evidence  # noqa: E402
+
+OBJECT = "tenants/t/jobs/j/evidence/URL_001/evidence.bundle"
+
+
+@pytest.fixture
+def app(monkeypatch):
+    settings = SimpleNamespace(project_id="p", firestore_database="(default)", evidence_bucket="b", blocking_io_threads=2)
+    monkeypatch.setattr(blocking, "get_settings", lambda: settings)
+    monkeypatch.setattr(blocking, "_executor", None)
+    monkeypatch.setattr(pubsub_evidence, "get_db", lambda *a: None)
+
+    written = set()
+
+    def mark_evidence_written(db, tenant_id, job_id, url_id, raw_object, message_id=None):
+        first = url_id not in written
+        written.add(url_id)
+        return {"job_exists": True, "updated": first, "job": {"status": "WAITING_EVIDENCE"}}
+
+    monkeypatch.setattr(pubsub_evidence, "mark_evidence_written", mark_evidence_written)
+
+    app = FastAPI()
+    app.include_router(pubsub_evidence.router)
+    app.dependency_overrides[get_settings] = lambda: settings
+    return app
+
+
+def _push(message_id: str) -> dict:
+    payload = {"event_type": "EVIDENCE_OBJECT_WRITTEN", "payload": {"bucket": "b", "object": OBJECT}}
+    return {"message": {"messageId": message_id, "data": base64.b64encode(json.dumps(payload).encode()).decode()}}
+
+
+def test_redelivery_after_a_failed_trigger_advances_the_job(app, monkeypatch):
+    calls = []
+
+    async def advance_job(settings, db, tenant_id, job_id, job_doc, *, trigger_id, bucket_name, reschedule=False):
+        calls.append(trigger_id)
+        if len(calls) == 1:
+            # synthesis publish failed; advance_job released the trigger and re-raised
+            raise RuntimeError("publish failed")
+        return "triggered"
+
+    monkeypatch.setattr(pubsub_evidence, "advance_job", advance_job)
+
+    async def run():
+        message_id = f"m-{uuid.uuid4()}"
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://runner") as client:
+            first = await client.post("/pubsub/push/evidence", json=_push(message_id))
+            assert first.status_code == 500  # not acked: Pub/Sub redelivers
+
+            again = await client.post("/pubsub/push/evidence", json=_push(message_id))
+            assert again.status_code == 200
+            assert again.json()["phase"] == "PHASE_VI"
+
+            # acked now; a further redelivery to this instance is short-circuited
+            third = await client.post("/pubsub/push/evidence", json=_push(message_id))
+            assert third.json() == {"ok": True, "deduped": True}
+
+        assert calls == [f"evidence:{message_id}"] * 2
+
+    asyncio.run(run())
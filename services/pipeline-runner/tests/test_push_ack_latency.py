@@ -0,0 +1,99 @@
+"""
+Push acks stay fast while JOB_START workers are stuck in blocking I/O.
+
+Every blocking stage (Firestore transaction, SERP call, publish) is a stub
+that sleeps in its thread; the test posts a burst of JOB_START pushes and
+checks the acks don't wait on any of it.
+"""
+import asyncio
+import base64
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("google.cloud.firestore")
+
+from fastapi import FastAPI  # noqa: E402
+
+from app import blocking  # noqa: E402
+from app.config import get_settings  # noqa: E402
+from app.routes import pubsub_jobs  # noqa: E402
+
+JOBS = 24
+SERP_S = 0.3  # the slow, blocking SERP call
+
+
+class SlowSerp:
+    def search_top_urls(self, query, top_n):
+        time.sleep(SERP_S)
+        return []
+
+
+@pytest.fixture
+def app(monkeypatch):
+    settings = SimpleNamespace(
+        project_id="p",
+        firestore_database="(default)",
+        serpapi_top_n=5,
+        max_urls_hard_cap=10,
+        serpapi_engine="google",
+        serpapi_gl="us",
+        serpapi_hl="en",
+        runner_pipeline_version="test",
+        fetch_requests_topic="fetch",
+        blocking_io_threads=4,
+    )
+    monkeypatch.setattr(blocking, "get_settings", lambda: settings)
+    monkeypatch.setattr(blocking, "_executor", None)
+    monkeypatch.setattr(pubsub_jobs, "get_db", lambda *a: SimpleNamespace(transaction=lambda: None))
+    monkeypatch.setattr(pubsub_jobs, "ensure_job_initialized", lambda **kw: {"job_id": kw["job_id"]})
+    monkeypatch.setattr(pubsub_jobs, "get_serp_client", lambda s: SlowSerp())
+    monkeypatch.setattr(pubsub_jobs, "set_urls_and_mark_fetch_requested", lambda *a: None)
+    monkeypatch.setattr(
+        pubsub_jobs.CompletionPolicy, "from_settings", classmethod(lambda cls, s: SimpleNamespace(deadline_from=lambda now: now))
+    )
+    monkeypatch.setattr(
+        pubsub_jobs, "get_publisher", lambda s: SimpleNamespace(publish_json_many=lambda topic, msgs: None)
+    )
+
+    app = FastAPI()
+    app.include_router(pubsub_jobs.router)
+    app.dependency_overrides[get_settings] = lambda: settings
+    return app
+
+
+def _push(i: int) -> dict:
+    payload = {"event_type": "JOB_START", "tenant_id": "t", "job_id": f"job-{i}", "payload": {"user_prompt": "q"}}
+    data = base64.b64encode(json.dumps(payload).encode()).decode()
+    return {"message": {"messageId": f"ack-test-{time.time_ns()}-{i}", "data": data}}
+
+
+def test_acks_stay_fast_with_many_jobs_in_flight(app):
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://runner") as client:
+            acks = []
+            for i in range(JOBS):
+                t0 = time.perf_counter()
+                r = await client.post("/pubsub/push/jobs", json=_push(i))
+                acks.append(time.perf_counter() - t0)
+                assert r.status_code == 200 and r.json()["job_id"] == f"job-{i}"
+
+            # the workers are now queued behind SERP calls on a 4-thread pool
+            assert len(pubsub_jobs._background_jobs) > JOBS // 2
+            blocked = sum(t.name.startswith("blocking-io") for t in threading.enumerate())
+            assert blocked == 4
+
+            acks.sort()
+            p99 = acks[int(len(acks) * 0.99) - 1]
+            print(f"\nack latency with {JOBS} jobs in flight: p50 {acks[len(acks) // 2] * 1000:.1f} ms, p99 {p99 * 1000:.1f} ms")
+            assert p99 < SERP_S / 5
+
+            await asyncio.gather(*list(pubsub_jobs._background_jobs))
+
+    asyncio.run(run())
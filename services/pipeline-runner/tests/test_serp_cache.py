@@ -0,0 +1,41 @@
+import time
+
+import pytest
+
+pytest.importorskip("google.cloud.firestore")
+pytest.importorskip("requests")
+
+from app.external.serp_cache import CachedSerpClient  # noqa: E402
+
+
+class FakeSerp:
+    engine, gl, hl = "google", "us", "en"
+
+    def __init__(self, results):
+        self.results = list(results)
+        self.calls = 0
+
+    def search_top_urls(self, query, top_n):
+        self.calls += 1
+        return self.results.pop(0)
+
+
+def test_hits_are_normalized_and_counted():
+    upstream = FakeSerp([["https://a"]])
+    client = CachedSerpClient(upstream, ttl_s=60, max_entries=8)
+    assert client.search_top_urls("Solar  Panels", 5) == ["https://a"]
+    assert client.search_top_urls(" solar panels ", 5) == ["https://a"]
+    stats = client.stats()
+    assert (upstream.calls, stats["local_hits"], stats["misses"], stats["local_entries"]) == (1, 1, 1, 1)
+
+
+def test_empty_results_expire_after_the_negative_ttl():
+    upstream = FakeSerp([[], ["https://a"]])
+    client = CachedSerpClient(upstream, ttl_s=60, max_entries=8, empty_ttl_s=0.05)
+    assert client.search_top_urls("q", 5) == []
+    assert client.search_top_urls("q", 5) == []
+    assert upstream.calls == 1
+
+    time.sleep(0.06)
+    assert client.search_top_urls("q", 5) == ["https://a"]
+    assert upstream.calls == 2